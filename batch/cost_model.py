@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Module with the historical cost model of Pacini-typing.
+Every search (stage) of a run appends its runtime to a local
+metrics store (JSON lines), together with the input size, the number
+of threads and the identity and size of the database.
+
+A linear model is fitted per stage (genes/SNPs) and file type:
+    seconds = a + b * (input MB / threads) + c * database MB
+The model predicts the runtime of new samples, which is used to:
+    - order the samples of a batch (longest job first)
+    - show the progress and the ETA of a batch
+    - plan a batch without running it (plan subcommand)
+Stages with too few records for the linear model use the mean
+seconds per MB of their records, stages without records are unknown.
+
+The input size is the size of the input files in MB, compressed
+files are counted with an estimated compression ratio.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = [
+    "DEFAULT_METRICS_STORE",
+    "get_input_size",
+    "get_database_size",
+    "record_stage",
+    "load_records",
+    "get_config_databases",
+    "order_samples",
+    "CostModel",
+    "BatchProgress",
+]
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import yaml
+
+from batch.watch_folder import FASTQ_EXTENSIONS
+
+DEFAULT_METRICS_STORE = Path.home() / ".cache" / "pacini_typing" / "metrics.jsonl"
+# ? gzipped sequence files are about four times smaller than the sequences
+GZIP_RATIO = 4.0
+# ? minimal number of records of a stage to fit the linear model
+MIN_RECORDS = 3
+MEGABYTE = 1024 * 1024
+
+_store_lock = threading.Lock()
+
+
+def get_input_size(input_files: list[str]) -> float:
+    """
+    Function that returns the (estimated uncompressed) size
+    of the input files of a sample in MB.
+    ----------
+    Input:
+        - input_files: the input files of the sample
+    Output:
+        - float: size in MB
+    ----------
+    """
+    size = 0.0
+    for input_file in input_files:
+        try:
+            file_size = os.path.getsize(input_file)
+        except OSError:
+            continue
+        size += file_size * GZIP_RATIO if str(input_file).endswith(".gz") else file_size
+    return size / MEGABYTE
+
+
+def get_database_size(database: str) -> float:
+    """
+    Function that returns the size of a database in MB.
+    The database is either a directory (PointFinder database) or
+    the prefix of the index files of BLAST or KMA (path + name).
+    ----------
+    Input:
+        - database: directory or prefix of the database
+    Output:
+        - float: size in MB, 0 if the database does not exist
+    ----------
+    """
+    path = Path(database)
+    if path.is_dir():
+        files = [file for file in path.rglob("*") if file.is_file()]
+    elif path.parent.is_dir():
+        files = [file for file in path.parent.iterdir() if file.is_file() and file.name.startswith(path.name)]
+    else:
+        files = []
+    return sum(file.stat().st_size for file in files) / MEGABYTE
+
+
+def get_database_identity(stage: str, options: dict[str, Any]) -> str:
+    """
+    Function that returns the database of a search.
+    ----------
+    Input:
+        - stage: genes or SNPs
+        - options: the options of the query runner
+    Output:
+        - str: path (prefix) of the database
+    ----------
+    """
+    if stage == "SNPs":
+        return os.path.join(str(options.get("path_snps", "")), str(options.get("species", "")))
+    return os.path.join(str(options.get("database_path", "")), str(options.get("database_name", "")))
+
+
+def record_stage(stage: str, options: dict[str, Any], seconds: float, tool: str = "") -> None:
+    """
+    Function that appends the runtime of a search to the metrics store.
+    The store is never a reason for a run to fail,
+    errors are only logged.
+    ----------
+    Input:
+        - stage: genes or SNPs
+        - options: the options of the query runner
+        - seconds: runtime of the search
+        - tool: the tool of the search
+    ----------
+    """
+    store = Path(options.get("metrics_store") or DEFAULT_METRICS_STORE)
+    database = get_database_identity(stage, options)
+    record = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "stage": stage,
+        "file_type": options.get("file_type"),
+        "tool": tool,
+        "input_mb": round(get_input_size(options.get("input_file_list", [])), 3),
+        "threads": int(options.get("threads", 1)),
+        "database": database,
+        "database_mb": round(get_database_size(database), 3),
+        "seconds": seconds,
+    }
+    try:
+        store.parent.mkdir(parents=True, exist_ok=True)
+        with _store_lock, open(store, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record) + "\n")
+    except OSError as e:
+        logging.warning("Could not write to the metrics store %s: %s", store, e)
+
+
+def load_records(store: str | Path) -> list[dict[str, Any]]:
+    """
+    Function that reads all records of the metrics store.
+    Lines that cannot be read (e.g. an interrupted write) are skipped.
+    ----------
+    Input:
+        - store: path to the metrics store
+    Output:
+        - list with the records
+    ----------
+    """
+    records: list[dict[str, Any]] = []
+    try:
+        with open(store, "r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def get_config_databases(config_path: str | Path) -> dict[str, str]:
+    """
+    Function that returns the databases of a configuration file per stage,
+    without validating the configuration. The configuration is validated
+    by the run itself, so an unreadable configuration is not an error here.
+    ----------
+    Input:
+        - config_path: path to the configuration file
+    Output:
+        - dict with the database per stage (genes/SNPs),
+            empty if the configuration cannot be read
+    ----------
+    """
+    try:
+        with open(config_path, "r", encoding="utf-8") as handle:
+            database = (yaml.safe_load(handle) or {}).get("database") or {}
+    except (OSError, yaml.YAMLError, AttributeError) as e:
+        logging.debug("Could not read the databases of %s: %s", config_path, e)
+        return {}
+    databases = {"genes": os.path.join(str(database.get("path", "")), str(database.get("name", "")))}
+    if "path_snps" in database:
+        databases["SNPs"] = get_database_identity("SNPs", database)
+    return databases
+
+
+def order_samples(
+    input_groups: list[list[str]],
+    model: "CostModel",
+    search_mode: str,
+    database_mb: dict[str, float],
+    threads: int,
+) -> list[tuple[list[str], float, float | None]]:
+    """
+    Function that predicts the runtime of the samples of a batch and
+    orders them longest job first. If the runtime of a sample cannot be
+    predicted, all samples are ordered by their input size instead.
+    ----------
+    Input:
+        - input_groups: the input files per sample
+        - model: the cost model
+        - search_mode: genes, SNPs or both
+        - database_mb: database size in MB per stage
+        - threads: number of threads
+    Output:
+        - list with (input files, input MB, predicted seconds) per sample
+    ----------
+    """
+    samples: list[tuple[list[str], float, float | None]] = []
+    for input_group in input_groups:
+        file_type = "FASTQ" if input_group[0].lower().endswith(FASTQ_EXTENSIONS) else "FASTA"
+        input_mb = get_input_size(input_group)
+        samples.append((input_group, input_mb, model.predict_sample(search_mode, file_type, input_mb, database_mb, threads)))
+    if all(prediction is not None for _, _, prediction in samples):
+        return sorted(samples, key=lambda sample: sample[2] or 0.0, reverse=True)
+    return sorted(samples, key=lambda sample: sample[1], reverse=True)
+
+
+class CostModel:
+    """
+    Class with the fitted cost model per stage and file type.
+    ----------
+    Methods:
+        - __init__: Constructor, fits the models
+        - from_store: Creates the model from a metrics store
+        - predict_stage: Predicts the runtime of a single search
+        - predict_sample: Predicts the runtime of a sample
+    ----------
+    """
+
+    def __init__(self, records: list[dict[str, Any]]) -> None:
+        """
+        Constructor of the CostModel class.
+        ----------
+        Input:
+            - records: the records of the metrics store
+        ----------
+        """
+        grouped: dict[tuple[str, str], list[dict[str, Any]]] = {}
+        for record in records:
+            if record.get("seconds") is not None and record.get("input_mb"):
+                grouped.setdefault((record["stage"], record["file_type"]), []).append(record)
+        # ? key -> ("linear", coefficients) or ("rate", seconds per MB per thread)
+        self.models: dict[tuple[str, str], tuple[str, Any]] = {}
+        for key, group in grouped.items():
+            features = np.array([self._get_features(r["input_mb"], r["database_mb"], r["threads"]) for r in group])
+            seconds = np.array([r["seconds"] for r in group], dtype=float)
+            if len(group) >= MIN_RECORDS:
+                coefficients = np.linalg.lstsq(features, seconds, rcond=None)[0]
+                self.models[key] = ("linear", coefficients)
+            else:
+                self.models[key] = ("rate", float(np.mean(seconds / features[:, 1])))
+
+    @staticmethod
+    def _get_features(input_mb: float, database_mb: float, threads: int) -> list[float]:
+        """
+        Function that returns the features of the linear model.
+        ----------
+        Input:
+            - input_mb: input size in MB
+            - database_mb: database size in MB
+            - threads: number of threads
+        Output:
+            - list with the features
+        ----------
+        """
+        return [1.0, input_mb / max(threads, 1), database_mb]
+
+    @classmethod
+    def from_store(cls, store: str | Path) -> "CostModel":
+        """
+        Function that creates the cost model from a metrics store.
+        ----------
+        Input:
+            - store: path to the metrics store
+        Output:
+            - CostModel object
+        ----------
+        """
+        return cls(load_records(store))
+
+    def predict_stage(self, stage: str, file_type: str, input_mb: float, database_mb: float, threads: int) -> float | None:
+        """
+        Function that predicts the runtime of a single search.
+        ----------
+        Input:
+            - stage: genes or SNPs
+            - file_type: FASTA or FASTQ
+            - input_mb: input size in MB
+            - database_mb: database size in MB
+            - threads: number of threads
+        Output:
+            - float: predicted seconds, or None if the stage has no records
+        ----------
+        """
+        if (stage, file_type) not in self.models:
+            return None
+        kind, parameters = self.models[(stage, file_type)]
+        features = self._get_features(input_mb, database_mb, threads)
+        if kind == "rate":
+            return parameters * features[1]
+        return max(float(np.dot(parameters, features)), 0.0)
+
+    def predict_sample(
+        self,
+        search_mode: str,
+        file_type: str,
+        input_mb: float,
+        database_mb: dict[str, float],
+        threads: int,
+    ) -> float | None:
+        """
+        Function that predicts the runtime of a sample.
+        In search mode both, the searches run concurrently,
+        so the slowest search determines the runtime.
+        ----------
+        Input:
+            - search_mode: genes, SNPs or both
+            - file_type: FASTA or FASTQ
+            - input_mb: input size in MB
+            - database_mb: database size in MB per stage
+            - threads: number of threads
+        Output:
+            - float: predicted seconds, or None if a stage has no records
+        ----------
+        """
+        stages = ["genes", "SNPs"] if search_mode == "both" else [search_mode]
+        predictions = [self.predict_stage(stage, file_type, input_mb, database_mb.get(stage, 0.0), threads) for stage in stages]
+        if any(prediction is None for prediction in predictions):
+            return None
+        return max(prediction for prediction in predictions if prediction is not None)
+
+
+class BatchProgress:
+    """
+    Class that keeps track of the progress of a batch and
+    estimates the remaining time. With predictions for all samples,
+    the remaining predicted time is corrected with the ratio between the
+    actual and the predicted time so far. Otherwise, the remaining
+    input is divided by the throughput so far.
+    ----------
+    Methods:
+        - __init__: Constructor of the class
+        - finish_sample: Registers a finished sample
+        - get_eta: Returns the estimated remaining seconds
+        - get_progress_line: Returns the progress line
+    ----------
+    """
+
+    def __init__(self, sizes: list[float], predictions: list[float | None]) -> None:
+        """
+        Constructor of the BatchProgress class.
+        ----------
+        Input:
+            - sizes: input size in MB per sample, in the order of processing
+            - predictions: predicted seconds per sample (or None)
+        ----------
+        """
+        self.sizes = sizes
+        self.predictions = predictions
+        self.finished = 0
+        self.elapsed = 0.0
+
+    def finish_sample(self, seconds: float) -> None:
+        """
+        Function that registers the next finished sample.
+        ----------
+        Input:
+            - seconds: runtime of the sample
+        ----------
+        """
+        self.finished += 1
+        self.elapsed += seconds
+
+    def get_eta(self) -> float | None:
+        """
+        Function that returns the estimated remaining seconds.
+        ----------
+        Output:
+            - float: remaining seconds, or None if unknown
+        ----------
+        """
+        if not self.finished:
+            known = [prediction for prediction in self.predictions if prediction is not None]
+            return sum(known) if len(known) == len(self.predictions) else None
+        if all(prediction is not None for prediction in self.predictions):
+            predicted_done = sum(p for p in self.predictions[: self.finished] if p is not None)
+            ratio = self.elapsed / predicted_done if predicted_done else 1.0
+            return ratio * sum(p for p in self.predictions[self.finished :] if p is not None)
+        done_mb = sum(self.sizes[: self.finished])
+        if not done_mb:
+            return None
+        return sum(self.sizes[self.finished :]) / (done_mb / max(self.elapsed, 1e-6))
+
+    def get_progress_line(self) -> str:
+        """
+        Function that returns the progress line of the batch.
+        ----------
+        Output:
+            - str: e.g. 'Progress: 3/10 samples (30%), 12.4 MB/s, ETA 0:04:10'
+        ----------
+        """
+        total = len(self.sizes)
+        throughput = sum(self.sizes[: self.finished]) / self.elapsed if self.elapsed else 0.0
+        eta = self.get_eta()
+        eta_text = str(timedelta(seconds=round(eta))) if eta is not None else "unknown"
+        return (
+            f"Progress: {self.finished}/{total} samples ({self.finished / max(total, 1):.0%}), "
+            f"{throughput:.1f} MB/s, ETA {eta_text}"
+        )
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Module that finds samples with identical input files in a batch.
+Re-submissions and copy mistakes put the same assembly or read pair
+in a batch under different names. Such samples are typed once, and
+the report is copied to the other sample names with a relabelled
+Input column (see PaciniTyping.execute_multiple_inputs).
+
+The fingerprint of a sample is based on the SHA256 hashes of its input
+files, the same hashes that the input validation uses to compare
+paired files (these are cached, so a file is only read once).
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["get_input_fingerprint", "find_duplicate_inputs", "write_duplicate_report"]
+
+import hashlib
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+from preprocessing.validation.validating_input_arguments import ArgsValidator
+
+
+def get_input_fingerprint(input_group: list[str]) -> str:
+    """
+    Function that returns the fingerprint of the input files of a sample.
+    The order of the files is kept, so R1/R2 are not interchangeable.
+    ----------
+    Input:
+        - input_group: the input file(s) of a sample
+    Output:
+        - str: the SHA256 fingerprint
+    ----------
+    """
+    fingerprint = hashlib.sha256()
+    for input_file in input_group:
+        fingerprint.update(ArgsValidator.create_sha_hash(input_file).encode())
+    return fingerprint.hexdigest()
+
+
+def find_duplicate_inputs(input_groups: list[list[str]], sample_names: list[str]) -> dict[int, int]:
+    """
+    Function that finds the samples of which the input files are
+    identical to the input files of an earlier sample in the batch.
+    A file that can not be read is not deduplicated, the validation
+    of the sample reports the error.
+    ----------
+    Input:
+        - input_groups: the input file(s) per sample
+        - sample_names: the name per sample, for logging
+    Output:
+        - dict with the index of the duplicate sample -> the index of the typed sample
+    ----------
+    """
+    first_index: dict[str, int] = {}
+    duplicates: dict[int, int] = {}
+    for index, input_group in enumerate(input_groups):
+        try:
+            fingerprint = get_input_fingerprint(input_group)
+        except OSError:
+            continue
+        if fingerprint in first_index:
+            duplicates[index] = first_index[fingerprint]
+            logging.info(
+                "Sample %s has the same input as sample %s (%s), it is typed once",
+                sample_names[index],
+                sample_names[first_index[fingerprint]],
+                fingerprint[:12],
+            )
+        else:
+            first_index[fingerprint] = index
+    if duplicates:
+        logging.info("Found %d duplicate sample(s) in the batch", len(duplicates))
+    return duplicates
+
+
+def write_duplicate_report(report: str | Path, sample_name: str, duplicate_report: str | Path) -> None:
+    """
+    Function that writes the report of a duplicate sample,
+    based on the report of the sample with the same input.
+    The Input column is relabelled with the name of the duplicate.
+    ----------
+    Input:
+        - report: the report of the typed sample
+        - sample_name: the name of the duplicate sample
+        - duplicate_report: the report file of the duplicate sample
+    ----------
+    """
+    data_frame = pd.read_csv(report)
+    data_frame["Input"] = sample_name
+    data_frame.to_csv(duplicate_report, index=False)
+    logging.debug("Wrote %s based on %s", duplicate_report, report)
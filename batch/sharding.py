@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Module that is responsible for splitting a batch of samples into
+static shards and for merging the reports of these shards afterward.
+
+A batch is split with the --shard i/n option. Every sample is assigned
+to exactly one shard by hashing its sample id, so the assignment is
+stable between re-runs and does not depend on the order of the input files.
+This makes the option suitable for HPC job arrays, where every
+array task runs the same command with a different shard index:
+
+    pacini_typing --config O1.yaml --input *.fasta --shard 2/8
+
+Every shard writes its own combined report and a journal with the
+samples it processed. The reports of all shards are combined with
+the merge-shards subcommand:
+
+    pacini_typing merge-shards --reports combined_report_shard_*.csv --output combined_report.csv
+
+The merge is streamed line by line, so the shard reports never have
+to be loaded into memory at the same time.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = [
+    "parse_shard_spec",
+    "assign_shard",
+    "get_shard_report_stem",
+    "BatchJournal",
+    "merge_shard_reports",
+]
+
+import argparse
+import csv
+import hashlib
+import logging
+import os
+import time
+from pathlib import Path
+
+JOURNAL_HEADER = ["timestamp", "sample", "status", "report"]
+
+
+def parse_shard_spec(value: str) -> tuple[int, int]:
+    """
+    Function that parses the value of the --shard argument.
+    The value must be formatted as i/n, where i is the
+    1-based index of the shard and n the total number of shards.
+    The function is used as type in the argument parser.
+    ----------
+    Input:
+        - value: the incoming argument, like "2/8"
+    Output:
+        - tuple with the shard index and the shard count
+    Raises:
+        - argparse.ArgumentTypeError: if the value is not valid
+    ----------
+    """
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"Shard must be formatted as i/n (e.g. 2/8), got '{value}'") from e
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"Shard index must be between 1 and {count}, got '{value}'")
+    return index, count
+
+
+def assign_shard(sample_id: str, shard_count: int) -> int:
+    """
+    Function that deterministically assigns a sample to a shard.
+    A SHA256 hash of the sample id is used, since Python's
+    built-in hash() is salted per process and would therefore
+    give a different assignment on every run.
+    ----------
+    Input:
+        - sample_id: the name of the sample
+        - shard_count: total number of shards
+    Output:
+        - the 1-based index of the shard the sample belongs to
+    ----------
+    """
+    digest = hashlib.sha256(sample_id.encode("utf-8")).hexdigest()
+    return int(digest[:16], 16) % shard_count + 1
+
+
+def get_shard_report_stem(shard: tuple[int, int] | None) -> str:
+    """
+    Little helper function that returns the file stem of the
+    combined report (and journal) of a batch run.
+    Without sharding, the original combined_report name is kept.
+    ----------
+    Input:
+        - shard: tuple with the shard index and count, or None
+    Output:
+        - str: the file stem, like combined_report_shard_2_of_8
+    ----------
+    """
+    if shard is None:
+        return "combined_report"
+    return f"combined_report_shard_{shard[0]}_of_{shard[1]}"
+
+
+class BatchJournal:
+    """
+    Class that keeps a journal of the samples processed in a batch run.
+    Every processed sample is appended as a tab-separated line with
+    a timestamp, the sample name, the status and the report location.
+    The file is flushed after every line, so the journal is usable
+    even if the batch was killed halfway.
+    ----------
+    Methods:
+        - __init__: Constructor of the class, writes the header
+        - record: Appends a single sample to the journal
+    ----------
+    """
+
+    def __init__(self, journal_file: str | Path) -> None:
+        """
+        Constructor of the BatchJournal class.
+        The journal file is (re)created with a header line.
+        ----------
+        Input:
+            - journal_file: path to the journal file
+        ----------
+        """
+        self.journal_file = Path(journal_file)
+        self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_file, "w", encoding="utf-8", newline="") as handle:
+            csv.writer(handle, delimiter="\t").writerow(JOURNAL_HEADER)
+
+    def record(self, sample: str, status: str, report: str | Path = "") -> None:
+        """
+        Function that appends a single sample to the journal.
+        ----------
+        Input:
+            - sample: the name of the sample
+            - status: the status of the sample (e.g. done)
+            - report: path to the report of the sample
+        ----------
+        """
+        with open(self.journal_file, "a", encoding="utf-8", newline="") as handle:
+            csv.writer(handle, delimiter="\t").writerow(
+                [time.strftime("%Y-%m-%dT%H:%M:%S"), sample, status, str(report)],
+            )
+
+
+def _read_header(report_file: str | Path) -> list[str]:
+    """
+    Little helper function that only reads the header of a report.
+    Empty files result in an empty header.
+    ----------
+    Input:
+        - report_file: path to the report
+    Output:
+        - list with the column names
+    ----------
+    """
+    with open(report_file, "r", encoding="utf-8", newline="") as handle:
+        return next(csv.reader(handle), [])
+
+
+def merge_shard_reports(report_files: list[str | Path], output_file: str | Path) -> int:
+    """
+    Function that stream-merges the combined reports of several shards
+    into a single combined report. The ID column is renumbered so the
+    IDs are unique in the merged report.
+
+    The headers are read first, since reports of different shards may
+    contain different columns (e.g. a shard without any SNP hits).
+    The union of all columns is used, in order of appearance,
+    and missing values are left empty.
+    ----------
+    Input:
+        - report_files: list with paths to the shard reports
+        - output_file: path to the merged report
+    Output:
+        - int: number of rows written to the merged report
+    Raises:
+        - FileNotFoundError: if one of the shard reports does not exist
+    ----------
+    """
+    for report_file in report_files:
+        if not os.path.isfile(report_file):
+            logging.error("Shard report %s not found, cannot merge shards", report_file)
+            raise FileNotFoundError(f"Shard report {report_file} not found, cannot merge shards.")
+
+    columns: list[str] = []
+    for report_file in report_files:
+        columns.extend(column for column in _read_header(report_file) if column not in columns)
+    if not columns:
+        raise ValueError("None of the shard reports contain a header, cannot create merged report.")
+
+    rows_written = 0
+    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "w", encoding="utf-8", newline="") as out_handle:
+        writer = csv.DictWriter(out_handle, fieldnames=columns, restval="")
+        writer.writeheader()
+        for report_file in report_files:
+            logging.debug("Merging shard report %s...", report_file)
+            with open(report_file, "r", encoding="utf-8", newline="") as in_handle:
+                for row in csv.DictReader(in_handle):
+                    rows_written += 1
+                    if "ID" in row:
+                        row["ID"] = str(rows_written)
+                    writer.writerow(row)
+    logging.info("Merged %d shard reports into %s with %d rows", len(report_files), output_file, rows_written)
+    return rows_written
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Module with the incremental typing of long reads (--stream mode).
+During a nanopore run, reads are written to a growing FASTQ file
+or to a directory with FASTQ chunks. Instead of waiting for the end
+of the run, the newly arrived reads are searched periodically with KMA
+(long-read settings) and the evidence per gene is accumulated:
+    - depth: summed over all increments
+    - identity: depth-weighted mean over all increments
+    - coverage: highest coverage of a single increment
+A gene is called present if its identity and coverage reach the
+thresholds of the configuration and its depth reaches the minimum depth.
+The report is rewritten whenever a call changes.
+
+Only uncompressed FASTQ files can be tailed while they grow.
+Compressed chunks (.gz) are read as a whole once they are complete.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["FastqTail", "GeneEvidence"]
+
+import csv
+import gzip
+import logging
+import os
+import time
+from pathlib import Path
+from typing import IO
+
+from batch.watch_folder import FASTQ_EXTENSIONS, SENTINEL_SUFFIX, WatchFolder
+
+REPORT_COLUMNS = ["Gene", "Call", "Depth", "Identity", "Coverage", "Reads", "Elapsed"]
+
+
+class FastqTail:
+    """
+    Class that reads the new FASTQ records of a growing
+    FASTQ file or a directory with FASTQ chunks.
+    Only complete records (4 lines) are returned, a record that is
+    still being written is read in the next increment.
+    ----------
+    Methods:
+        - __init__: Constructor of the class
+        - is_finished: Checks if the run is finished (sentinel file)
+        - write_increment: Writes the new records to a FASTQ file
+    ----------
+    """
+
+    def __init__(self, source: str | Path, settle_seconds: float = 10.0) -> None:
+        """
+        Constructor of the FastqTail class.
+        ----------
+        Input:
+            - source: growing FASTQ file or directory with FASTQ chunks
+            - settle_seconds: time that a compressed chunk must be
+                stable before it is read
+        ----------
+        """
+        self.source = Path(source)
+        self.offsets: dict[str, int] = {}
+        self.finished_chunks: set[str] = set()
+        self.reads = 0
+        self.watcher = WatchFolder(self.source if self.source.is_dir() else self.source.parent, os.devnull, settle_seconds)
+
+    def is_finished(self) -> bool:
+        """
+        Function that checks if the sequencing run is finished,
+        which is marked with a sentinel file: <file>.done or
+        a file named 'done' in the chunk directory.
+        ----------
+        Output:
+            - bool: True if the run is finished
+        ----------
+        """
+        if self.source.is_dir():
+            return (self.source / SENTINEL_SUFFIX.lstrip(".")).exists()
+        return Path(f"{self.source}{SENTINEL_SUFFIX}").exists()
+
+    def _read_new_records(self, fastq_file: Path, handle_out: IO[bytes]) -> int:
+        """
+        Function that copies the complete records after the
+        last offset of an uncompressed FASTQ file.
+        ----------
+        Input:
+            - fastq_file: the growing FASTQ file
+            - handle_out: opened (binary) increment file
+        Output:
+            - int: number of records that were copied
+        ----------
+        """
+        offset = self.offsets.get(str(fastq_file), 0)
+        with open(fastq_file, "rb") as handle:
+            handle.seek(offset)
+            data = handle.read()
+        lines = data.split(b"\n")
+        # ? the last element is either empty (complete line) or a line that is still written
+        complete_records = (len(lines) - 1) // 4
+        if not complete_records:
+            return 0
+        chunk = b"\n".join(lines[: complete_records * 4]) + b"\n"
+        handle_out.write(chunk)
+        self.offsets[str(fastq_file)] = offset + len(chunk)
+        return complete_records
+
+    def write_increment(self, increment_file: str | Path, final: bool = False) -> int:
+        """
+        Function that writes all reads that arrived since the
+        previous increment to a new FASTQ file.
+        ----------
+        Input:
+            - increment_file: path of the FASTQ file of the increment
+            - final: True if the run is finished, compressed chunks
+                are then read without waiting for the settle time
+        Output:
+            - int: number of reads in the increment
+        ----------
+        """
+        now = time.time()
+        reads = 0
+        files = sorted(self.source.iterdir()) if self.source.is_dir() else [self.source]
+        with open(increment_file, "wb") as handle_out:
+            for fastq_file in files:
+                name = fastq_file.name.lower()
+                if not fastq_file.is_file() or not name.endswith(FASTQ_EXTENSIONS) or str(fastq_file) in self.finished_chunks:
+                    continue
+                if name.endswith(".gz"):
+                    if final or self.watcher.is_complete(fastq_file, now):
+                        with gzip.open(fastq_file, "rb") as handle_in:
+                            data = handle_in.read()
+                        handle_out.write(data if data.endswith(b"\n") else data + b"\n")
+                        reads += data.count(b"\n") // 4
+                        self.finished_chunks.add(str(fastq_file))
+                else:
+                    reads += self._read_new_records(fastq_file, handle_out)
+        self.reads += reads
+        return reads
+
+
+class GeneEvidence:
+    """
+    Class that accumulates the evidence per gene over the
+    KMA results (.res files) of all increments.
+    ----------
+    Methods:
+        - __init__: Constructor of the class
+        - add_results: Adds the KMA results of an increment
+        - get_calls: Returns the call per gene
+        - write_report: Writes the current evidence to a report
+    ----------
+    """
+
+    def __init__(self, genes: list[str], perc_ident: float, perc_cov: float, min_depth: float) -> None:
+        """
+        Constructor of the GeneEvidence class.
+        ----------
+        Input:
+            - genes: genes of the pattern of the configuration
+            - perc_ident: minimal identity of a present gene
+            - perc_cov: minimal coverage of a present gene
+            - min_depth: minimal accumulated depth of a present gene
+        ----------
+        """
+        self.perc_ident = perc_ident
+        self.perc_cov = perc_cov
+        self.min_depth = min_depth
+        # ? gene -> [depth, depth-weighted identity sum, highest coverage]
+        self.evidence: dict[str, list[float]] = {gene: [0.0, 0.0, 0.0] for gene in genes}
+
+    def add_results(self, res_file: str | Path) -> None:
+        """
+        Function that adds the KMA results of an increment.
+        ----------
+        Input:
+            - res_file: the .res file of the KMA run
+        ----------
+        """
+        with open(res_file, "r", encoding="utf-8", newline="") as handle:
+            reader = csv.reader(handle, delimiter="\t")
+            next(reader, None)
+            # ? positional, the column names of KMA are padded with spaces (see KMA_COLUMNS)
+            for row in reader:
+                gene = row[0].strip()
+                depth = float(row[8])
+                evidence = self.evidence.setdefault(gene, [0.0, 0.0, 0.0])
+                evidence[0] += depth
+                evidence[1] += depth * float(row[4])
+                evidence[2] = max(evidence[2], float(row[5]))
+                logging.debug("Increment evidence for %s: depth %.2f, coverage %s", gene, depth, row[5].strip())
+
+    def get_calls(self) -> dict[str, str]:
+        """
+        Function that returns the call per gene:
+            - present: thresholds and minimal depth are reached
+            - uncertain: reads were found, but not enough evidence yet
+            - absent: no reads were found (yet)
+        ----------
+        Output:
+            - dict with the call per gene
+        ----------
+        """
+        calls: dict[str, str] = {}
+        for gene, (depth, identity_sum, coverage) in self.evidence.items():
+            if not depth:
+                calls[gene] = "absent"
+            elif identity_sum / depth >= self.perc_ident and coverage >= self.perc_cov and depth >= self.min_depth:
+                calls[gene] = "present"
+            else:
+                calls[gene] = "uncertain"
+        return calls
+
+    def write_report(self, report_file: str | Path, reads: int, elapsed: float) -> None:
+        """
+        Function that (re)writes the report with the current evidence.
+        The report is replaced atomically, so it can be read at any time.
+        ----------
+        Input:
+            - report_file: path to the report
+            - reads: total number of reads that were searched
+            - elapsed: seconds since the start of the streaming
+        ----------
+        """
+        calls = self.get_calls()
+        tmp_file = Path(f"{report_file}.tmp")
+        with open(tmp_file, "w", encoding="utf-8", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(REPORT_COLUMNS)
+            for gene, (depth, identity_sum, coverage) in sorted(self.evidence.items()):
+                identity = identity_sum / depth if depth else 0.0
+                writer.writerow([gene, calls[gene], round(depth, 2), round(identity, 2), round(coverage, 2), reads, round(elapsed)])
+        os.replace(tmp_file, report_file)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Module with the watch-folder ingestion of the --watch mode.
+A staging directory (e.g. the output of a sequencer) is polled
+for new FASTA and FASTQ files. A file is considered complete when:
+    - a sentinel file <file>.done exists next to it, or
+    - its size and modification time did not change for the settle time
+FASTQ files are paired with their mate (_1/_2, _R1/_R2, _pR1/_pR2),
+a FASTQ sample is only ready when both mates are complete.
+
+The processed samples are stored in a state file, so a restarted
+watcher does not type the same samples again. The reports of the
+samples are appended to a rolling combined report.
+
+Only polling is used (no inotify), so nothing outside the standard
+library is required and the watcher also works on network mounts.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["WatchFolder", "append_to_combined_report", "get_mate_key", "POLL_SECONDS"]
+
+import csv
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+
+from batch.sharding import _read_header, merge_shard_reports
+
+FASTQ_EXTENSIONS = (".fq", ".fastq", ".fq.gz", ".fastq.gz")
+FASTA_EXTENSIONS = (".fa", ".fasta", ".fna", ".fsa", ".fa.gz", ".fasta.gz", ".fna.gz")
+SENTINEL_SUFFIX = ".done"
+POLL_SECONDS = 2.0
+MATE_PATTERN = re.compile(r"^(?P<key>.+?)_(?:p?R)?(?P<mate>[12])(?:_001)?$")
+
+
+def get_mate_key(input_file: str | Path) -> tuple[str, str]:
+    """
+    Function that returns the key that mates of a
+    paired sample share, and the mate number.
+    ----------
+    Input:
+        - input_file: path to the FASTQ file
+    Output:
+        - tuple with the shared key and the mate ("1", "2"
+            or "" if the file has no mate suffix)
+    ----------
+    """
+    stem = Path(input_file).name.split(".")[0]
+    if match := MATE_PATTERN.match(stem):
+        return str(Path(input_file).parent / match.group("key")), match.group("mate")
+    return str(Path(input_file).parent / stem), ""
+
+
+class WatchFolder:
+    """
+    Class that polls a staging directory for new, complete samples.
+    ----------
+    Methods:
+        - __init__: Constructor, loads the state file
+        - is_complete: Checks if a single file is complete
+        - poll: Returns the new samples that are ready to be typed
+        - mark: Stores the status of a sample in the state file
+    ----------
+    """
+
+    def __init__(self, directory: str | Path, state_file: str | Path, settle_seconds: float = 10.0) -> None:
+        """
+        Constructor of the WatchFolder class.
+        ----------
+        Input:
+            - directory: the staging directory to watch
+            - state_file: JSON file with the already processed samples
+            - settle_seconds: time that the size of a file must be
+                stable before the file is considered complete
+        ----------
+        """
+        self.directory = Path(directory)
+        self.state_file = Path(state_file)
+        self.settle_seconds = settle_seconds
+        # ? file -> (size, mtime, first time this size was seen)
+        self.observed: dict[str, tuple[int, float, float]] = {}
+        self.processed: dict[str, str] = {}
+        if self.state_file.is_file():
+            with open(self.state_file, "r", encoding="utf-8") as handle:
+                self.processed = json.load(handle)
+            logging.info("Loaded %d processed sample(s) from %s", len(self.processed), self.state_file)
+
+    def is_complete(self, input_file: Path, now: float) -> bool:
+        """
+        Function that checks if a file is completely written,
+        either by a sentinel file or by a stable size.
+        ----------
+        Input:
+            - input_file: path to the file
+            - now: the current time
+        Output:
+            - bool: True if the file is complete
+        ----------
+        """
+        if Path(f"{input_file}{SENTINEL_SUFFIX}").exists():
+            return True
+        try:
+            stat = input_file.stat()
+        except FileNotFoundError:
+            return False
+        previous = self.observed.get(str(input_file))
+        if previous is None or previous[:2] != (stat.st_size, stat.st_mtime):
+            self.observed[str(input_file)] = (stat.st_size, stat.st_mtime, now)
+            return False
+        return stat.st_size > 0 and now - previous[2] >= self.settle_seconds
+
+    def poll(self) -> list[list[str]]:
+        """
+        Function that scans the staging directory once and returns the
+        samples that are complete and not processed yet.
+        FASTQ files are grouped by their mate key, unpaired FASTQ
+        files are waited for until their mate arrives.
+        ----------
+        Output:
+            - list with the input files per sample
+        ----------
+        """
+        now = time.time()
+        samples: list[list[str]] = []
+        mates: dict[str, dict[str, str]] = {}
+        for entry in sorted(self.directory.iterdir()):
+            name = entry.name.lower()
+            if not entry.is_file() or name.startswith("."):
+                continue
+            if name.endswith(FASTA_EXTENSIONS):
+                if str(entry) not in self.processed and self.is_complete(entry, now):
+                    samples.append([str(entry)])
+            elif name.endswith(FASTQ_EXTENSIONS):
+                key, mate = get_mate_key(entry)
+                mates.setdefault(key, {})[mate] = str(entry)
+        for key, files in sorted(mates.items()):
+            if key in self.processed or set(files) != {"1", "2"}:
+                continue
+            # ? no short-circuit, both mates must be observed in every poll
+            if all([self.is_complete(Path(files[mate]), now) for mate in ("1", "2")]):
+                samples.append([files["1"], files["2"]])
+        return samples
+
+    def mark(self, sample: list[str], status: str) -> None:
+        """
+        Function that stores the status of a sample in the state file.
+        The state file is replaced atomically, so it is never
+        half-written if the watcher is stopped.
+        ----------
+        Input:
+            - sample: the input files of the sample
+            - status: the status of the sample (done/failed)
+        ----------
+        """
+        if len(sample) == 1:
+            self.processed[sample[0]] = status
+            if sample[0].endswith(".gz"):
+                # ? Pacini-typing unzips next to the input, this file must not be typed again
+                self.processed[sample[0][:-3]] = status
+        else:
+            self.processed[get_mate_key(sample[0])[0]] = status
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.state_file.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as handle:
+            json.dump(self.processed, handle, indent=1)
+        os.replace(tmp_file, self.state_file)
+
+
+def append_to_combined_report(report_file: str | Path, combined_file: str | Path) -> None:
+    """
+    Function that appends the rows of a sample report to the
+    rolling combined report, with continued IDs.
+    If the sample report contains new columns, the combined report
+    is rewritten with the union of the columns (see merge_shard_reports).
+    ----------
+    Input:
+        - report_file: the report of a single sample
+        - combined_file: the rolling combined report
+    ----------
+    """
+    combined_file = Path(combined_file)
+    if not combined_file.is_file():
+        merge_shard_reports([report_file], combined_file)
+        return
+    columns = _read_header(combined_file)
+    if any(column not in columns for column in _read_header(report_file)):
+        tmp_file = combined_file.with_suffix(".tmp")
+        merge_shard_reports([combined_file, report_file], tmp_file)
+        os.replace(tmp_file, combined_file)
+        return
+    with open(combined_file, "r", encoding="utf-8", newline="") as handle:
+        row_count = sum(1 for _ in csv.DictReader(handle))
+    with open(report_file, "r", encoding="utf-8", newline="") as in_handle, open(combined_file, "a", encoding="utf-8", newline="") as out_handle:
+        writer = csv.DictWriter(out_handle, fieldnames=columns, restval="")
+        for row in csv.DictReader(in_handle):
+            row_count += 1
+            if "ID" in row:
+                row["ID"] = str(row_count)
+            writer.writerow(row)
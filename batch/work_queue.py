@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Module with a work queue on a shared filesystem, used by the --worker mode.
+Multiple Pacini-typing processes, possibly on different nodes,
+pull samples from the same queue directory. This balances the work
+dynamically, even when the sizes of the samples differ a lot.
+
+The queue directory has the following layout:
+
+    queue_dir/
+        jobs/<sample>.json      samples that still have to be processed
+        leases/<sample>.lease   claims of workers on a sample
+        done/<sample>.json      samples that were processed successfully
+        failed/<sample>.json    samples that failed
+
+A job is claimed by creating its lease file with O_EXCL, which is atomic,
+also on NFS. The lease holds the worker id and is refreshed by a heartbeat
+while the sample is being processed. Leases that were not refreshed within
+the lease time belong to dead workers and are reclaimed. A stale lease is
+first renamed to a unique name (rename is atomic), so only one worker can
+take over the job. The age of the lease is checked again after the rename:
+a lease that was refreshed or taken in the meantime is put back. A worker
+only removes a lease that still holds its own worker id, and only finishes
+(done or failed) a job of which it still holds the lease.
+
+Jobs with a higher priority are claimed first, the batch gives the
+samples with the longest predicted runtime the highest priority.
+
+Only the standard library is used, so nothing more than a
+shared mount is required.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["WorkQueue", "LeaseHeartbeat", "get_worker_id"]
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+
+def get_worker_id() -> str:
+    """
+    Simple function that returns an id that is unique
+    for every worker process (hostname + process id).
+    ----------
+    Output:
+        - str: the worker id
+    ----------
+    """
+    return f"{socket.gethostname()}_{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    Class that implements the work queue on a shared filesystem.
+    See the module docstring for the layout of the queue directory.
+    ----------
+    Methods:
+        - __init__: Constructor, creates the queue directories
+        - enqueue: Adds a sample to the queue (idempotent)
+        - pending_jobs: Returns the ids of the jobs that are not finished
+        - get_priority: Returns the priority of a job
+        - claim: Claims the next available job
+        - complete: Marks a claimed job as done
+        - fail: Marks a claimed job as failed
+        - release: Releases the lease of a job without finishing it
+    ----------
+    """
+
+    def __init__(self, queue_dir: str | Path, lease_seconds: float = 900.0, worker_id: str | None = None) -> None:
+        """
+        Constructor of the WorkQueue class.
+        ----------
+        Input:
+            - queue_dir: directory of the queue on the shared filesystem
+            - lease_seconds: time after which a lease that is not
+                refreshed is considered expired
+            - worker_id: id of this worker, defaults to hostname_pid
+        ----------
+        """
+        self.queue_dir = Path(queue_dir)
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id or get_worker_id()
+        self.jobs_dir = self.queue_dir / "jobs"
+        self.leases_dir = self.queue_dir / "leases"
+        self.done_dir = self.queue_dir / "done"
+        self.failed_dir = self.queue_dir / "failed"
+        for directory in (self.jobs_dir, self.leases_dir, self.done_dir, self.failed_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+        # ? the priority of a job never changes, so it is only read once
+        self.priorities: dict[str, int] = {}
+
+    def lease_path(self, job_id: str) -> Path:
+        """
+        Little helper function that returns the lease file of a job.
+        ----------
+        Input:
+            - job_id: id of the job
+        Output:
+            - Path: path to the lease file
+        ----------
+        """
+        return self.leases_dir / f"{job_id}.lease"
+
+    def enqueue(self, job_id: str, input_files: list[str], priority: int = 0) -> bool:
+        """
+        Function that adds a sample to the queue.
+        Every worker of a batch enqueues the same samples,
+        so this function is idempotent: samples that are already
+        queued or finished are skipped. The job file is written to a
+        temporary file first and then hard-linked to its final name,
+        which fails atomically if the job already exists.
+        ----------
+        Input:
+            - job_id: id of the job (the sample name)
+            - input_files: list with the input files of the sample
+            - priority: jobs with a higher priority are claimed first
+        Output:
+            - bool: True if the job was added, False if it already existed
+        ----------
+        """
+        job_file = self.jobs_dir / f"{job_id}.json"
+        if job_file.exists() or (self.done_dir / f"{job_id}.json").exists() or (self.failed_dir / f"{job_id}.json").exists():
+            return False
+        tmp_file = self.jobs_dir / f".{job_id}.{self.worker_id}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as handle:
+            json.dump({"sample": job_id, "input": [os.path.abspath(file) for file in input_files], "priority": priority}, handle)
+        try:
+            os.link(tmp_file, job_file)
+        except FileExistsError:
+            return False
+        finally:
+            tmp_file.unlink(missing_ok=True)
+        logging.debug("Added %s to the work queue", job_id)
+        return True
+
+    def pending_jobs(self) -> list[str]:
+        """
+        Function that returns the ids of all jobs that
+        are not finished yet, claimed or not.
+        ----------
+        Output:
+            - list with job ids
+        ----------
+        """
+        return sorted(path.stem for path in self.jobs_dir.glob("*.json"))
+
+    def get_priority(self, job_id: str) -> int:
+        """
+        Function that returns the priority of a job.
+        ----------
+        Input:
+            - job_id: id of the job
+        Output:
+            - int: the priority, 0 if the job has no priority (anymore)
+        ----------
+        """
+        if job_id not in self.priorities:
+            try:
+                with open(self.jobs_dir / f"{job_id}.json", "r", encoding="utf-8") as handle:
+                    self.priorities[job_id] = int(json.load(handle).get("priority", 0))
+            except (OSError, ValueError):
+                return 0
+        return self.priorities[job_id]
+
+    def _try_create_lease(self, job_id: str) -> bool:
+        """
+        Function that tries to create the lease file of a job.
+        O_EXCL guarantees that only one worker succeeds.
+        ----------
+        Input:
+            - job_id: id of the job
+        Output:
+            - bool: True if this worker now holds the lease
+        ----------
+        """
+        try:
+            descriptor = os.open(self.lease_path(job_id), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(descriptor, "w", encoding="utf-8") as handle:
+            json.dump({"worker": self.worker_id, "timestamp": time.time()}, handle)
+        return True
+
+    @staticmethod
+    def _read_lease(lease: Path) -> dict[str, Any]:
+        """
+        Little helper function that reads a lease (or tombstone) file.
+        A lease that was just created can still be empty.
+        ----------
+        Input:
+            - lease: path to the lease file
+        Output:
+            - dict with the worker and timestamp, empty if unreadable
+        ----------
+        """
+        try:
+            with open(lease, "r", encoding="utf-8") as handle:
+                content = json.load(handle)
+        except (OSError, ValueError):
+            return {}
+        return content if isinstance(content, dict) else {}
+
+    def _take_lease(self, job_id: str, reason: str) -> Path | None:
+        """
+        Function that moves the lease of a job to a tombstone of this
+        worker. The rename is atomic, so only one worker gets the lease.
+        ----------
+        Input:
+            - job_id: id of the job
+            - reason: part of the tombstone name (expired or released)
+        Output:
+            - Path of the tombstone, or None if there was no lease
+        ----------
+        """
+        tombstone = self.leases_dir / f".{job_id}.{reason}.{self.worker_id}"
+        try:
+            os.rename(self.lease_path(job_id), tombstone)
+        except FileNotFoundError:
+            return None
+        return tombstone
+
+    def _restore_lease(self, job_id: str, tombstone: Path) -> None:
+        """
+        Function that puts a lease that was taken by _take_lease back.
+        The tombstone is linked instead of renamed, so a lease that was
+        created by another worker in the meantime is not overwritten.
+        ----------
+        Input:
+            - job_id: id of the job
+            - tombstone: the tombstone of the lease
+        ----------
+        """
+        try:
+            os.link(tombstone, self.lease_path(job_id))
+        except FileExistsError:
+            logging.warning("The lease of %s was taken by another worker while it was checked", job_id)
+        finally:
+            tombstone.unlink(missing_ok=True)
+
+    def _reclaim_expired_lease(self, job_id: str) -> bool:
+        """
+        Function that removes the lease of a job if it is expired.
+        The lease is renamed to a unique tombstone first, so if
+        several workers notice the expired lease at the same time,
+        only one of them removes it. The age is checked again on the
+        tombstone: if another worker reclaimed the job in between,
+        the tombstone is its fresh lease, which is put back.
+        ----------
+        Input:
+            - job_id: id of the job
+        Output:
+            - bool: True if an expired lease was removed by this worker
+        ----------
+        """
+        try:
+            if time.time() - self.lease_path(job_id).stat().st_mtime < self.lease_seconds:
+                return False
+        except FileNotFoundError:
+            return True
+        tombstone = self._take_lease(job_id, "expired")
+        if tombstone is None:
+            return False
+        try:
+            age = time.time() - tombstone.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        holder = self._read_lease(tombstone).get("worker")
+        if age < self.lease_seconds:
+            logging.debug("The lease of %s is held by %s again, not reclaimed", job_id, holder)
+            self._restore_lease(job_id, tombstone)
+            return False
+        tombstone.unlink(missing_ok=True)
+        logging.warning("Reclaimed expired lease of %s from %s (not refreshed for %.0f seconds)", job_id, holder, age)
+        return True
+
+    def claim(self) -> dict[str, Any] | None:
+        """
+        Function that claims the next available job of the queue,
+        the job with the highest priority first.
+        Jobs with an expired lease are reclaimed.
+        ----------
+        Output:
+            - dict with the job (sample and input files),
+                or None if no job could be claimed
+        ----------
+        """
+        for job_id in sorted(self.pending_jobs(), key=self.get_priority, reverse=True):
+            if not self._try_create_lease(job_id):
+                if not self._reclaim_expired_lease(job_id) or not self._try_create_lease(job_id):
+                    continue
+            job_file = self.jobs_dir / f"{job_id}.json"
+            try:
+                with open(job_file, "r", encoding="utf-8") as handle:
+                    job: dict[str, Any] = json.load(handle)
+            except FileNotFoundError:
+                # ? finished by another worker between listing and claiming
+                self.release(job_id)
+                continue
+            logging.info("Worker %s claimed %s", self.worker_id, job_id)
+            return job
+        return None
+
+    def _get_lease_holder(self, job_id: str) -> str | None:
+        """
+        Function that returns the worker that holds the lease of a job.
+        A lease that another worker is checking at this moment (see
+        _reclaim_expired_lease) is only missing for a short time, so
+        it is waited for while such a tombstone exists.
+        ----------
+        Input:
+            - job_id: id of the job
+        Output:
+            - str with the id of the worker, or None if there is no lease
+        ----------
+        """
+        deadline = time.time() + 1.0
+        while True:
+            holder = self._read_lease(self.lease_path(job_id)).get("worker")
+            if holder is not None or time.time() >= deadline or not any(self.leases_dir.glob(f".{job_id}.*")):
+                return holder
+            time.sleep(0.05)
+
+    def _finish(self, job_id: str, target_dir: Path, extra: dict[str, Any]) -> bool:
+        """
+        Function that moves a claimed job to the done or failed directory
+        and removes its lease. A job of which the lease expired and was
+        reclaimed by another worker, or that was already finished
+        elsewhere, is left to the other worker.
+        ----------
+        Input:
+            - job_id: id of the job
+            - target_dir: the done or failed directory
+            - extra: additional information to store with the job
+        Output:
+            - bool: True if this worker finished the job
+        ----------
+        """
+        holder = self._get_lease_holder(job_id)
+        if holder != self.worker_id:
+            logging.warning("The lease of %s is held by %s, not finished by %s", job_id, holder, self.worker_id)
+            return False
+        job_file = self.jobs_dir / f"{job_id}.json"
+        try:
+            with open(job_file, "r", encoding="utf-8") as handle:
+                job = json.load(handle)
+        except FileNotFoundError:
+            logging.warning("Job %s was already finished elsewhere, skipped by %s", job_id, self.worker_id)
+            self.release(job_id)
+            return False
+        job.update(extra, worker=self.worker_id, finished=time.time())
+        tmp_file = target_dir / f".{job_id}.{self.worker_id}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as handle:
+            json.dump(job, handle)
+        os.replace(tmp_file, target_dir / f"{job_id}.json")
+        job_file.unlink(missing_ok=True)
+        self.release(job_id)
+        return True
+
+    def complete(self, job_id: str, report: str | Path = "") -> bool:
+        """
+        Function that marks a claimed job as done.
+        ----------
+        Input:
+            - job_id: id of the job
+            - report: path to the report of the sample
+        Output:
+            - bool: True if this worker finished the job (see _finish)
+        ----------
+        """
+        return self._finish(job_id, self.done_dir, {"report": str(report)})
+
+    def fail(self, job_id: str, error: str) -> bool:
+        """
+        Function that marks a claimed job as failed,
+        so other workers do not retry it.
+        ----------
+        Input:
+            - job_id: id of the job
+            - error: description of the error
+        Output:
+            - bool: True if this worker finished the job (see _finish)
+        ----------
+        """
+        return self._finish(job_id, self.failed_dir, {"error": error})
+
+    def release(self, job_id: str) -> None:
+        """
+        Function that removes the lease of a job, if this worker still
+        holds it. A lease of another worker (e.g. after this lease
+        expired and was reclaimed) is put back.
+        ----------
+        Input:
+            - job_id: id of the job
+        ----------
+        """
+        tombstone = self._take_lease(job_id, "released")
+        if tombstone is None:
+            return
+        holder = self._read_lease(tombstone).get("worker")
+        if holder != self.worker_id:
+            logging.warning("The lease of %s is held by %s, not released by %s", job_id, holder, self.worker_id)
+            self._restore_lease(job_id, tombstone)
+            return
+        tombstone.unlink(missing_ok=True)
+
+
+class LeaseHeartbeat:
+    """
+    Context manager that refreshes the lease of a job in a background
+    thread while the sample is being processed. Long-running samples
+    therefore keep their lease, while the lease of a killed worker
+    expires after the lease time.
+    ----------
+    Methods:
+        - __init__: Constructor of the class
+        - __enter__: Starts the heartbeat thread
+        - __exit__: Stops the heartbeat thread
+    ----------
+    """
+
+    def __init__(self, queue: WorkQueue, job_id: str) -> None:
+        """
+        Constructor of the LeaseHeartbeat class.
+        The lease is refreshed three times per lease time.
+        ----------
+        Input:
+            - queue: the work queue
+            - job_id: id of the claimed job
+        ----------
+        """
+        self.lease = queue.lease_path(job_id)
+        self.interval = max(queue.lease_seconds / 3, 0.1)
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._beat, name=f"lease-{job_id}", daemon=True)
+
+    def _beat(self) -> None:
+        """
+        Function that runs in the background thread and
+        touches the lease file until the heartbeat is stopped.
+        """
+        missing = False
+        while not self.stop_event.wait(self.interval):
+            try:
+                os.utime(self.lease)
+                missing = False
+            except FileNotFoundError:
+                # ? the lease can be checked by another worker at this moment, it is put back if it is fresh
+                if not missing:
+                    logging.warning("Lease %s disappeared while the job was running", self.lease)
+                missing = True
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop_event.set()
+        self.thread.join()
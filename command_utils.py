@@ -35,22 +35,481 @@ Or capture output in a file:
                         stderr_file=e,
                     )).execute()
 
-The capturing in a file is currently not used in the operations,
-but is built in for future use.
+Or stream the output to (rotating) log files, which is used for the
+tools that produce a lot of output (KMA, BLASTn, PointFinder):
+
+        >>> CommandInvoker(ShellCommand(
+                ["kma", "-i", "sample.fq", ...],
+                log_prefix="output/sample.kma",
+            )).execute()
+
+This writes output/sample.kma.stdout.log and output/sample.kma.stderr.log.
+Only the last part of stderr is kept in memory, for the error message.
+
+Several commands can be chained with OS pipes, without a shell and
+without intermediate files. A stage can also be a Python function
+that gets the chunks of the previous stage and yields new chunks:
+
+        >>> def only_headers(chunks):
+                ...
+        >>> stdout, stderr = CommandInvoker(PipelineCommand(
+                [["gzip", "-dc", "sample.fasta.gz"], only_headers, ["sort"]],
+                capture=True,
+            )).execute()
+
+An AsyncShellCommand runs a command with asyncio, so one coordinator
+can wait for the tools of many samples at the same time. The number
+of concurrent commands is limited per resource class, e.g. CPU-heavy
+aligners ("cpu") versus lightweight version checks ("light"):
+
+        >>> set_command_limits(cpu=2, light=8)
+        >>> results = execute_concurrently([
+                AsyncShellCommand(["kma", "-i", "A.fq", ...]),
+                AsyncShellCommand(["kma", "-i", "B.fq", ...]),
+                AsyncShellCommand(["kma", "-v"], capture=True, resource_class="light"),
+            ])
+
+Every command runs in its own process group (session), including the
+processes that the tool starts itself (e.g. PointFinder starting KMA).
+A command can have a timeout, by default the timeout of its tool
+(see set_tool_timeouts). The timeouts belong to the context of a run, so
+the jobs of the daemon have their own timeouts; worker threads of a run
+are started with submit_in_context to get them. On a timeout, Ctrl-C or a SystemExit, the whole
+group gets a SIGTERM and, after TERMINATE_GRACE_SECONDS, a SIGKILL.
+A timeout raises a CommandTimeoutError. Ctrl-C and SIGTERM only reach the
+main thread, so the process groups of all commands are registered and
+stopped by the signal handlers (see stop_process_groups): the commands of
+worker threads (parallel searches, configurations, daemon jobs) then exit,
+and their thread pools can be shut down.
+
+Every command records its resource usage (wall time, CPU time,
+peak memory, block I/O and context switches) in the usage attribute
+of the ShellCommand and the CommandInvoker. With streaming, the usage
+of the process itself is read with os.wait4, otherwise it is the
+difference of getrusage(RUSAGE_CHILDREN), which also counts other
+commands that finish at the same time in other threads.
 """
 
 __author__ = "Mark van de Streek"
 __date__ = "2024-11-01"
-__all__ = ["ShellCommand", "CommandInvoker", "Command"]
+__all__ = [
+    "ShellCommand",
+    "PipelineCommand",
+    "AsyncShellCommand",
+    "CommandInvoker",
+    "Command",
+    "OutputLog",
+    "get_usage",
+    "parse_tool_timeout",
+    "set_tool_timeouts",
+    "get_tool_timeouts",
+    "get_tool_timeout",
+    "submit_in_context",
+    "stop_process_group",
+    "set_termination_signal",
+    "get_termination_signal",
+    "running_command",
+    "get_running_commands",
+    "register_process_group",
+    "unregister_process_group",
+    "stop_process_groups",
+    "reset_process_groups",
+    "set_command_limits",
+    "execute_concurrently",
+]
 
+import argparse
+import asyncio
+import contextlib
+import contextvars
 import logging
+import os
+import resource
 import shlex
+import signal
 import subprocess
+import sys
+import threading
+import time
+import weakref
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor, Future
 from pathlib import Path
-from typing import IO, Any, Tuple
+from typing import IO, Any, Callable, Iterable, Iterator, Tuple
+
+from preprocessing.exceptions.command_utils_exceptions import CommandTimeoutError, SubprocessError
+
+# ? a log file is rotated at LOG_MAX_BYTES, with LOG_BACKUPS old files (.1, .2)
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUPS = 2
+# ? part of the output that is kept in memory for the error message
+TAIL_BYTES = 8 * 1024
+CHUNK_SIZE = 64 * 1024
+# ? a stage of a PipelineCommand: a command, or a function that gets the chunks
+#   of the previous stage (None for the first stage) and yields new chunks
+PipelineStage = list[str] | Callable[[Iterator[bytes] | None], Iterable[bytes]]
+PIPELINE_USAGE_SUMS = (
+    "user_seconds",
+    "system_seconds",
+    "block_input",
+    "block_output",
+    "voluntary_context_switches",
+    "involuntary_context_switches",
+)
+# ? seconds between the SIGTERM and the SIGKILL of a process group
+TERMINATE_GRACE_SECONDS = 10.0
+# ? timeout per tool of the current run (see set_tool_timeouts), "default" applies to all other tools
+_tool_timeouts: contextvars.ContextVar[dict[str, float]] = contextvars.ContextVar("tool_timeouts")
+# ? the signal (e.g. SIGTERM) that stops the process, see set_termination_signal
+_termination_signal: int | None = None
+# ? commands that are running in any thread, and that were started, see running_command
+_running_commands = 0
+_started_commands = 0
+_commands_lock = threading.Lock()
+# ? process groups of the commands of all threads, see stop_process_groups
+#   (reentrant, since the signal handlers run in the main thread, which may hold the lock)
+_process_groups: set[int] = set()
+_stopping_process_groups = False
+_process_groups_lock = threading.RLock()
+# ? number of concurrent AsyncShellCommands per resource class (see set_command_limits)
+COMMAND_LIMITS = {"cpu": 1, "light": 8}
+_command_limits = dict(COMMAND_LIMITS)
+_limiters: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]] = weakref.WeakKeyDictionary()
+# ? ru_maxrss is in kilobytes on Linux, but in bytes on macOS
+MAXRSS_PER_MB = 1024 * 1024 if sys.platform == "darwin" else 1024
+
+
+def get_tool_name(cmd: list[str] | str) -> str:
+    """
+    Function that returns the name of the executable of a command.
+    ----------
+    Input:
+        - cmd: the command
+    Output:
+        - str: the name of the executable
+    ----------
+    """
+    return os.path.basename(cmd.split()[0] if isinstance(cmd, str) else cmd[0])
+
+
+def get_usage(cmd: list[str] | str, wall_seconds: float, returncode: int, after: Any, before: Any = None) -> dict[str, Any]:
+    """
+    Function that converts the resource usage of a command to a dictionary.
+    With a before value, the difference of two getrusage calls is used,
+    the peak memory is then only known if the children's peak grew.
+    ----------
+    Input:
+        - cmd: the command
+        - wall_seconds: the wall time of the command
+        - returncode: the return code of the command
+        - after: the resource usage (of os.wait4 or getrusage)
+        - before: the getrusage(RUSAGE_CHILDREN) before the command, if any
+    Output:
+        - dict with the resource usage
+    ----------
+    """
+
+    def delta(field: str) -> Any:
+        return getattr(after, field) - (getattr(before, field) if before is not None else 0)
+
+    max_rss = after.ru_maxrss if before is None or after.ru_maxrss > before.ru_maxrss else None
+    return {
+        "tool": get_tool_name(cmd),
+        "returncode": returncode,
+        "wall_seconds": round(wall_seconds, 3),
+        "user_seconds": round(delta("ru_utime"), 3),
+        "system_seconds": round(delta("ru_stime"), 3),
+        "max_rss_mb": round(max_rss / MAXRSS_PER_MB, 1) if max_rss is not None else None,
+        "block_input": delta("ru_inblock"),
+        "block_output": delta("ru_oublock"),
+        "voluntary_context_switches": delta("ru_nvcsw"),
+        "involuntary_context_switches": delta("ru_nivcsw"),
+    }
+
+
+def parse_tool_timeout(value: str) -> tuple[str, float]:
+    """
+    Function that parses the value of the --timeout argument,
+    TOOL=SECONDS (e.g. kma=3600) or SECONDS for all tools.
+    The function is used as type in the argument parser.
+    ----------
+    Input:
+        - value: the incoming argument
+    Output:
+        - tuple with the tool ("default" for all tools) and the timeout
+    Raises:
+        - argparse.ArgumentTypeError: if the value is invalid
+    ----------
+    """
+    tool, _, seconds = value.rpartition("=")
+    try:
+        timeout = float(seconds)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"invalid timeout '{value}', use TOOL=SECONDS or SECONDS") from e
+    if timeout <= 0:
+        raise argparse.ArgumentTypeError(f"invalid timeout '{value}', the timeout must be a positive number of seconds")
+    return (tool or "default").lower(), timeout
+
+
+def set_tool_timeouts(timeouts: dict[str, float]) -> None:
+    """
+    Function that sets the timeout per tool, e.g. {"kma": 3600}.
+    The tool "default" applies to all tools without a timeout.
+    The timeouts are set for the current context (thread) only, so
+    jobs of the daemon that run at the same time do not overwrite
+    each other's timeouts.
+    ----------
+    Input:
+        - timeouts: the timeout in seconds per tool name
+    ----------
+    """
+    _tool_timeouts.set({tool.lower(): timeout for tool, timeout in timeouts.items()})
+
+
+def get_tool_timeouts() -> dict[str, float]:
+    """
+    Function that returns the timeouts per tool of the current context.
+    ----------
+    Output:
+        - dict with the timeout in seconds per tool name
+    ----------
+    """
+    return dict(_tool_timeouts.get({}))
 
-from preprocessing.exceptions.command_utils_exceptions import SubprocessError
+
+def submit_in_context(executor: Executor, function: Callable[..., Any], *args: Any) -> Future:
+    """
+    Function that submits a function to a thread pool in a copy of
+    the current context, so the function uses the timeouts of the run
+    that submitted it (a new thread does not get them otherwise).
+    ----------
+    Input:
+        - executor: the thread pool
+        - function: the function to run
+        - args: the arguments of the function
+    Output:
+        - Future of the function
+    ----------
+    """
+    return executor.submit(contextvars.copy_context().run, function, *args)
+
+
+def get_tool_timeout(cmd: list[str] | str) -> float | None:
+    """
+    Function that returns the timeout of a command, based on the name
+    of the executable or, for scripts ('python PointFinder.py'),
+    the name of the script.
+    ----------
+    Input:
+        - cmd: the command
+    Output:
+        - float: the timeout in seconds, or None if there is no timeout
+    ----------
+    """
+    timeouts = _tool_timeouts.get({})
+    arguments = shlex.split(cmd) if isinstance(cmd, str) else cmd
+    for argument in arguments[:2]:
+        name = Path(argument).name.lower()
+        for key in (name, Path(name).stem):
+            if key in timeouts:
+                return timeouts[key]
+    return timeouts.get("default")
+
+
+def set_termination_signal(signum: int | None) -> None:
+    """
+    Function that records that the process was asked to stop by a
+    signal, before its handler raises a SystemExit. This SystemExit can
+    then be told apart from a sys.exit() of the code that was running.
+    ----------
+    Input:
+        - signum: the received signal, None to reset
+    ----------
+    """
+    global _termination_signal  # pylint: disable=global-statement
+    _termination_signal = signum
+
+
+def get_termination_signal() -> int | None:
+    """
+    Function that returns the signal that stops the process.
+    ----------
+    Output:
+        - int: the signal, or None if no termination signal was received
+    ----------
+    """
+    return _termination_signal
+
+
+@contextlib.contextmanager
+def running_command() -> Iterator[None]:
+    """
+    Context manager that counts a command as running while it is
+    executed, by the CommandInvoker or the AsyncShellCommand.
+    Code that changes the state of the whole process (e.g. the in-process
+    PointFinder) uses the count to know if other commands run at the same time.
+    """
+    global _running_commands, _started_commands  # pylint: disable=global-statement
+    with _commands_lock:
+        _running_commands += 1
+        _started_commands += 1
+    try:
+        yield
+    finally:
+        with _commands_lock:
+            _running_commands -= 1
+
+
+def get_running_commands() -> tuple[int, int]:
+    """
+    Function that returns how many commands are running and
+    how many commands were started by this process.
+    ----------
+    Output:
+        - tuple with the number of running and of started commands
+    ----------
+    """
+    with _commands_lock:
+        return _running_commands, _started_commands
+
+
+def register_process_group(pid: int) -> None:
+    """
+    Function that registers the process group of a started command, so it
+    can be stopped from the signal handlers (see stop_process_groups),
+    also if the command is waited for in another thread.
+    A command that starts while the groups are being stopped is stopped at once.
+    ----------
+    Input:
+        - pid: the process id of the command (the id of its group)
+    ----------
+    """
+    with _process_groups_lock:
+        _process_groups.add(pid)
+        stopping = _stopping_process_groups
+    if stopping:
+        signal_process_group(pid, signal.SIGTERM)
+
+
+def unregister_process_group(pid: int) -> None:
+    """
+    Function that removes the process group of a command
+    from the registry, once the command has been reaped.
+    ----------
+    Input:
+        - pid: the process id of the command (the id of its group)
+    ----------
+    """
+    with _process_groups_lock:
+        _process_groups.discard(pid)
+
+
+def kill_process_groups(pids: set[int]) -> None:
+    """
+    Function that kills the process groups that got a SIGTERM. Also the
+    groups of commands that have been reaped in the meantime, since child
+    processes that ignore SIGTERM keep the group alive after the command exits.
+    ----------
+    Input:
+        - pids: the process groups that got a SIGTERM
+    ----------
+    """
+    for pid in pids:
+        signal_process_group(pid, signal.SIGKILL)
+
+
+def stop_process_groups(grace: float | None = None) -> None:
+    """
+    Function that stops the commands of all threads: SIGTERM to every
+    registered process group now and SIGKILL to these groups after the
+    grace period. The threads that wait for the commands
+    then get their exit codes, so a thread pool can be shut down. This function
+    does not block, so it can be called from a signal handler.
+    ----------
+    Input:
+        - grace: seconds between SIGTERM and SIGKILL (default: TERMINATE_GRACE_SECONDS)
+    ----------
+    """
+    global _stopping_process_groups  # pylint: disable=global-statement
+    with _process_groups_lock:
+        _stopping_process_groups = True
+        pids = set(_process_groups)
+    if not pids:
+        return
+    for pid in pids:
+        signal_process_group(pid, signal.SIGTERM)
+    timer = threading.Timer(TERMINATE_GRACE_SECONDS if grace is None else grace, kill_process_groups, args=(pids,))
+    timer.daemon = True
+    timer.start()
+
+
+def reset_process_groups() -> None:
+    """
+    Function that allows commands to run again after stop_process_groups,
+    used at the start of a run.
+    """
+    global _stopping_process_groups  # pylint: disable=global-statement
+    with _process_groups_lock:
+        _stopping_process_groups = False
+
+
+def signal_process_group(pid: int, signum: int) -> None:
+    """
+    Function that sends a signal to the process group of a command,
+    a group that has already exited is ignored.
+    ----------
+    Input:
+        - pid: the process id of the command (the id of its group)
+        - signum: the signal to send
+    ----------
+    """
+    try:
+        os.killpg(pid, signum)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def wait_for_process_group(pid: int, until: float) -> None:
+    """
+    Function that waits until all processes of a process group have
+    exited, or until the given time. The command itself may already
+    have exited while its child processes are still running.
+    ----------
+    Input:
+        - pid: the process id of the command (the id of its group)
+        - until: the time (time.time) to stop waiting
+    ----------
+    """
+    while time.time() < until:
+        try:
+            os.killpg(pid, 0)
+        except (ProcessLookupError, PermissionError):
+            return
+        time.sleep(0.05)
+
+
+def stop_process_group(process: subprocess.Popen, grace: float | None = None) -> None:
+    """
+    Function that stops a command and all of its child processes:
+    SIGTERM to the process group and SIGKILL to the processes that
+    did not exit within the grace period. The command is reaped
+    and its pipes are drained.
+    ----------
+    Input:
+        - process: the command, started in its own session
+        - grace: seconds between SIGTERM and SIGKILL (default: TERMINATE_GRACE_SECONDS)
+    ----------
+    """
+    logging.warning("Stopping process group %d (%s)...", process.pid, process.args)
+    kill_at = time.time() + (TERMINATE_GRACE_SECONDS if grace is None else grace)
+    signal_process_group(process.pid, signal.SIGTERM)
+    try:
+        process.communicate(timeout=max(kill_at - time.time(), 0))
+    except subprocess.TimeoutExpired:
+        pass
+    wait_for_process_group(process.pid, kill_at)
+    signal_process_group(process.pid, signal.SIGKILL)
+    process.communicate()
 
 
 class Command(ABC):
@@ -89,6 +548,8 @@ class ShellCommand(Command):
     Methods:
         - execute: implementation of the execute method
             for shell commands
+        - execute_streaming: executes the command with the
+            output streamed to log files
     ----------
     """
 
@@ -100,6 +561,8 @@ class ShellCommand(Command):
         stdout_file: IO[Any] | None = None,
         stderr_file: IO[Any] | None = None,
         allow_fail: bool = False,
+        log_prefix: str | Path | None = None,
+        timeout: float | None = None,
     ) -> None:
         """
         Constructor of the ShellCommand class
@@ -112,6 +575,9 @@ class ShellCommand(Command):
             - stdout_file: Path, file to write standard output
             - stderr_file: Path, file to write standard error
             - allow_fail: bool, whether to allow command failures without exception
+            - log_prefix: prefix of the log files to stream the output to
+                (<prefix>.stdout.log and <prefix>.stderr.log), instead of capturing it
+            - timeout: seconds before the command is stopped (default: the timeout of the tool)
         ----------
         """
         self.cmd = cmd
@@ -120,6 +586,9 @@ class ShellCommand(Command):
         self.stdout_file = stdout_file
         self.stderr_file = stderr_file
         self.allow_fail = allow_fail
+        self.log_prefix = log_prefix
+        self.timeout = timeout if timeout is not None else get_tool_timeout(cmd)
+        self.usage: dict[str, Any] | None = None
 
     def execute(self) -> Tuple[str, str] | bool:
         """
@@ -138,28 +607,796 @@ class ShellCommand(Command):
             - bool indicating success if capture is False
         Raises:
             - SubprocessError: if the command fails and allow_fail is False
+            - CommandTimeoutError: if the command exceeds its timeout
         ----------
         """
+        cmd_to_run = self.cmd if isinstance(self.cmd, str) else list(self.cmd)
+        logging.info("running command: '%s'", shlex.join(cmd_to_run) if isinstance(cmd_to_run, list) else cmd_to_run)
+        if self.log_prefix is not None:
+            return self.execute_streaming(cmd_to_run)
+        start = time.time()
+        before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        returncode = -1
         try:
-            cmd_to_run = self.cmd if isinstance(self.cmd, str) else list(self.cmd)
-            logging.info("running command: '%s'", shlex.join(cmd_to_run) if isinstance(cmd_to_run, list) else cmd_to_run)
-            result = subprocess.run(
+            process = subprocess.Popen(
                 cmd_to_run,
                 shell=isinstance(cmd_to_run, str),  # ? must be true only for string and false for a list
                 cwd=self.directory,
                 stdout=(self.stdout_file or (subprocess.PIPE if self.capture else None)),
                 stderr=(self.stderr_file or (subprocess.PIPE if self.capture else None)),
                 text=True,
-                check=True,
+                start_new_session=True,
             )
+            register_process_group(process.pid)
+            try:
+                stdout, stderr = process.communicate(timeout=self.timeout)
+            except subprocess.TimeoutExpired as e:
+                stop_process_group(process)
+                raise CommandTimeoutError(get_tool_name(cmd_to_run), self.timeout or 0) from e
+            except (KeyboardInterrupt, SystemExit):
+                stop_process_group(process)
+                raise
+            finally:
+                unregister_process_group(process.pid)
+            returncode = process.returncode
+            if returncode != 0:
+                logging.error("Command failed with return code %d:\n%s\n%s", returncode, cmd_to_run, stderr)
+                if not self.allow_fail:
+                    raise SubprocessError(stderr)
+                return False
             if self.capture:
-                return result.stdout, result.stderr
-            return result.returncode == 0
-        except subprocess.CalledProcessError as e:
-            logging.error("Command failed with return code %d:\n%s\n%s", e.returncode, e.cmd, e.stderr)
+                return stdout, stderr
+            return True
+        finally:
+            self.usage = get_usage(cmd_to_run, time.time() - start, returncode, resource.getrusage(resource.RUSAGE_CHILDREN), before)
+
+    def execute_streaming(self, cmd_to_run: list[str] | str) -> bool:
+        """
+        Executes the command with stdout and stderr streamed to
+        rotating log files (see OutputLog), so the output of verbose
+        tools is never buffered in memory as a whole.
+        If the command fails, only the tail of stderr is logged.
+        ----------
+        Input:
+            - cmd_to_run: the command to be executed
+        Output:
+            - bool indicating success
+        Raises:
+            - SubprocessError: if the command fails and allow_fail is False
+            - CommandTimeoutError: if the command exceeds its timeout
+        ----------
+        """
+        start = time.time()
+        process = subprocess.Popen(
+            cmd_to_run,
+            shell=isinstance(cmd_to_run, str),
+            cwd=self.directory,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+        logs = [OutputLog(pipe, f"{self.log_prefix}.{name}.log") for pipe, name in ((process.stdout, "stdout"), (process.stderr, "stderr"))]
+        threads = [threading.Thread(target=log.copy, daemon=True) for log in logs]
+        for thread in threads:
+            thread.start()
+        register_process_group(process.pid)
+        try:
+            status, rusage, timed_out = self.wait_for_process(process)
+        finally:
+            unregister_process_group(process.pid)
+        returncode = process.returncode = os.waitstatus_to_exitcode(status)
+        self.usage = get_usage(cmd_to_run, time.time() - start, returncode, rusage)
+        for thread in threads:
+            thread.join()
+        if timed_out:
+            raise CommandTimeoutError(get_tool_name(cmd_to_run), self.timeout or 0)
+        if returncode == 0:
+            return True
+        tail = logs[1].get_tail()
+        logging.error("Command failed with return code %d:\n%s\n%s\n(full output in %s)", returncode, cmd_to_run, tail, logs[1].log_file)
+        if not self.allow_fail:
+            raise SubprocessError(tail)
+        return False
+
+    def wait_for_process(self, process: subprocess.Popen) -> tuple[int, Any, bool]:
+        """
+        Waits for a streaming command with os.wait4, which reaps the
+        process and returns the resource usage of this process only.
+        With a timeout, the process is polled, and its process group is
+        stopped (SIGTERM, then SIGKILL) when the timeout is exceeded.
+        The group is also stopped on Ctrl-C or a SystemExit (SIGTERM).
+        Errors of os.wait4 itself (e.g. a process that was already
+        reaped) are raised, since waiting again would not end.
+        ----------
+        Input:
+            - process: the command, started in its own session
+        Output:
+            - tuple with the wait status, the resource usage and
+                whether the command timed out
+        ----------
+        """
+        deadline = time.time() + self.timeout if self.timeout is not None else None
+        kill_at: float | None = None
+        timed_out = False
+        interrupted: BaseException | None = None
+        while True:
+            try:
+                pid, status, rusage = os.wait4(process.pid, 0 if deadline is None and kill_at is None else os.WNOHANG)
+                if pid:
+                    break
+                now = time.time()
+                if kill_at is not None and now >= kill_at:
+                    signal_process_group(process.pid, signal.SIGKILL)
+                    kill_at = None
+                elif deadline is not None and now >= deadline:
+                    logging.warning("Command %s exceeded its timeout of %g seconds", process.args, self.timeout)
+                    signal_process_group(process.pid, signal.SIGTERM)
+                    timed_out = True
+                    kill_at = now + TERMINATE_GRACE_SECONDS
+                    deadline = None
+                time.sleep(0.05)
+            except (KeyboardInterrupt, SystemExit) as error:
+                # ? Ctrl-C or SystemExit (SIGTERM): stop the group, a second interrupt kills it
+                kill_at = time.time() + TERMINATE_GRACE_SECONDS if interrupted is None else 0.0
+                deadline = None
+                interrupted = interrupted or error
+                signal_process_group(process.pid, signal.SIGTERM)
+        if kill_at is not None:
+            # ? the command has exited, its child processes get the rest of the grace period
+            wait_for_process_group(process.pid, kill_at)
+            signal_process_group(process.pid, signal.SIGKILL)
+        if interrupted is not None:
+            process.returncode = os.waitstatus_to_exitcode(status)
+            raise interrupted
+        return status, rusage, timed_out
+
+
+class OutputLog:
+    """
+    Class that copies the output of a process (pipe) to
+    a log file, which is rotated when it exceeds LOG_MAX_BYTES.
+    Only the last TAIL_BYTES are kept in memory.
+    Without a log file, only the tail is kept.
+    ----------
+    Methods:
+        - copy: Copies the pipe to the log file until it is closed
+        - rotate: Rotates the log file
+        - get_tail: Returns the last part of the output
+    ----------
+    """
+
+    def __init__(self, pipe: IO[bytes], log_file: str | Path | None) -> None:
+        """
+        Constructor of the OutputLog class
+        ----------
+        Input:
+            - pipe: the stdout or stderr pipe of the process
+            - log_file: path of the log file, or None to keep only the tail
+        ----------
+        """
+        self.pipe = pipe
+        self.log_file = Path(log_file) if log_file is not None else None
+        self.tail = b""
+
+    def rotate(self) -> None:
+        """
+        Rotates the log file: <log>.1 becomes <log>.2, <log> becomes <log>.1.
+        """
+        for backup in range(LOG_BACKUPS - 1, 0, -1):
+            if os.path.exists(f"{self.log_file}.{backup}"):
+                os.replace(f"{self.log_file}.{backup}", f"{self.log_file}.{backup + 1}")
+        os.replace(self.log_file, f"{self.log_file}.1")
+
+    def copy(self) -> None:
+        """
+        Copies the pipe to the log file in chunks, until the process
+        closes the pipe. The file is rotated when it becomes too large.
+        """
+        if self.log_file is None:
+            try:
+                while chunk := os.read(self.pipe.fileno(), 64 * 1024):
+                    self.tail = (self.tail + chunk)[-TAIL_BYTES:]
+            finally:
+                self.pipe.close()
+            return
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        handle = open(self.log_file, "wb")
+        size = 0
+        try:
+            while chunk := os.read(self.pipe.fileno(), 64 * 1024):
+                if size + len(chunk) > LOG_MAX_BYTES and size:
+                    handle.close()
+                    self.rotate()
+                    handle = open(self.log_file, "wb")
+                    size = 0
+                handle.write(chunk)
+                size += len(chunk)
+                self.tail = (self.tail + chunk)[-TAIL_BYTES:]
+        finally:
+            handle.close()
+            self.pipe.close()
+
+    def get_tail(self) -> str:
+        """
+        Returns the last part of the output (at most TAIL_BYTES).
+        ----------
+        Output:
+            - str: the decoded tail
+        ----------
+        """
+        return self.tail.decode("utf-8", errors="replace")
+
+
+def read_chunks(pipe: IO[bytes]) -> Iterator[bytes]:
+    """
+    Function that yields the chunks of a pipe until it is closed.
+    ----------
+    Input:
+        - pipe: the pipe to read
+    Output:
+        - the chunks of at most CHUNK_SIZE bytes
+    ----------
+    """
+    while chunk := os.read(pipe.fileno(), CHUNK_SIZE):
+        yield chunk
+
+
+class PipelineCommand(Command):
+    """
+    Concrete implementation of a pipeline of commands
+    (like 'decompress | filter | align') as a subclass of the Command
+    interface. The stages are connected with OS pipes (Popen with the
+    stdout of a stage as the stdin of the next stage), so no shell and
+    no intermediate files are used. A stage can also be a Python
+    function, which runs in a thread.
+    The first failing stage determines the error. Stages that only
+    failed because a later stage stopped reading (SIGPIPE) are ignored,
+    and all other stages are stopped once a stage has failed, the
+    pipeline has exceeded its timeout or it was interrupted (SIGTERM
+    to their process groups, SIGKILL after TERMINATE_GRACE_SECONDS).
+    ----------
+    Methods:
+        - execute: Starts the stages and waits for them
+        - start_stages: Starts the processes and threads of the stages
+        - run_python_stage: Runs a Python stage (in a thread)
+        - wait_for_stages: Waits for the stages, stops all stages on a failure or timeout
+        - stop_remaining: Stops the processes that are still running
+        - kill_remaining: Kills the processes that are still running
+        - get_failure: Returns the first failing stage
+    ----------
+    """
+
+    def __init__(
+        self,
+        stages: list[PipelineStage],
+        directory: Path = Path.cwd(),
+        capture: bool = False,
+        stdout_file: IO[Any] | None = None,
+        allow_fail: bool = False,
+        log_prefix: str | Path | None = None,
+        timeout: float | None = None,
+    ) -> None:
+        """
+        Constructor of the PipelineCommand class.
+        ----------
+        Input:
+            - stages: the commands (lists of arguments) or Python functions
+            - directory: the directory in which to execute the commands
+            - capture: whether to capture the output of the last stage
+            - stdout_file: file to write the output of the last stage
+            - allow_fail: whether to allow failures without exception
+            - log_prefix: prefix of the stderr log files of the stages
+                (<prefix>.<stage>.<tool>.stderr.log), otherwise only the tail is kept
+            - timeout: seconds before the pipeline is stopped (default: the
+                lowest timeout of the tools of the stages, which all run at the same time)
+        ----------
+        """
+        if not stages:
+            raise ValueError("A pipeline requires at least one stage")
+        self.stages = stages
+        self.directory = directory
+        self.capture = capture
+        self.stdout_file = stdout_file
+        self.allow_fail = allow_fail
+        self.log_prefix = log_prefix
+        self.names = [os.path.basename(stage[0]) if isinstance(stage, list) else getattr(stage, "__name__", "python") for stage in stages]
+        self.processes: dict[int, subprocess.Popen] = {}
+        self.threads: list[threading.Thread] = []
+        self.stderr_logs: dict[int, OutputLog] = {}
+        self.errors: dict[int, BaseException] = {}
+        self.returncodes: dict[int, int] = {}
+        self.output: list[bytes] = []
+        self.usage: dict[str, Any] | None = None
+        self.timeout = timeout if timeout is not None else min(
+            (tool_timeout for stage in stages if isinstance(stage, list) and (tool_timeout := get_tool_timeout(stage)) is not None),
+            default=None,
+        )
+        self.timed_out = False
+        # ? process groups that got a SIGTERM and the time of their SIGKILL (see stop_remaining)
+        self.stopped: list[int] = []
+        self.kill_at: float | None = None
+
+    def get_last_target(self) -> IO[bytes] | None:
+        """
+        Function that returns the file for the output of a Python
+        last stage: a pipe that is read into self.output (capture),
+        a copy of the stdout file, or a copy of stdout.
+        ----------
+        Output:
+            - binary file object
+        ----------
+        """
+        if self.capture:
+            read_end, write_end = os.pipe()
+            self.start_thread(self.collect_output, os.fdopen(read_end, "rb"))
+            return os.fdopen(write_end, "wb")
+        target = self.stdout_file if self.stdout_file is not None else sys.stdout
+        target.flush()
+        return os.fdopen(os.dup(target.fileno()), "wb")
+
+    def collect_output(self, pipe: IO[bytes]) -> None:
+        """
+        Function that reads the output of the last stage (capture).
+        ----------
+        Input:
+            - pipe: the output of the last stage
+        ----------
+        """
+        try:
+            self.output.extend(read_chunks(pipe))
+        finally:
+            pipe.close()
+
+    def start_thread(self, target: Callable[..., None], *args: Any) -> None:
+        """
+        Function that starts a thread of the pipeline.
+        ----------
+        Input:
+            - target: the function of the thread
+            - args: the arguments of the function
+        ----------
+        """
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+
+    def run_python_stage(self, index: int, source: IO[bytes] | None, target: IO[bytes]) -> None:
+        """
+        Function that runs a Python stage: the chunks of the previous stage
+        go into the function and its chunks are written to the next stage.
+        Both pipes are closed at the end, so the neighbouring stages
+        get an end of file or a SIGPIPE.
+        ----------
+        Input:
+            - index: the index of the stage
+            - source: the output of the previous stage, or None
+            - target: the input of the next stage
+        ----------
+        """
+        function: Any = self.stages[index]
+        try:
+            for chunk in function(read_chunks(source) if source is not None else None):
+                target.write(chunk)
+        except BrokenPipeError:
+            # ? the next stage stopped reading, its exit code is reported
+            pass
+        except Exception as error:
+            self.errors[index] = error
+        finally:
+            for pipe in (target, source):
+                try:
+                    if pipe is not None:
+                        pipe.close()
+                except OSError:
+                    pass
+
+    def start_stages(self) -> None:
+        """
+        Function that starts all stages, from the first to the last.
+        The copy of a pipe in this process is closed once the next
+        stage has it, so a stage gets a SIGPIPE when the next stage exits.
+        If a stage can not be started, the output of the previous stage and
+        the pipes that were opened for the stage are closed, so a Python
+        stage that writes to them does not block forever.
+        """
+        previous: IO[bytes] | None = None
+        # ? pipes of the stage that is being started, until its thread has them
+        opened: list[IO[bytes]] = []
+        try:
+            for index, stage in enumerate(self.stages):
+                last = index == len(self.stages) - 1
+                if isinstance(stage, list):
+                    process = subprocess.Popen(
+                        stage,
+                        cwd=self.directory,
+                        stdin=previous if previous is not None else subprocess.DEVNULL,
+                        stdout=subprocess.PIPE if not last or self.capture else self.stdout_file,
+                        stderr=subprocess.PIPE,
+                        start_new_session=True,
+                    )
+                    self.processes[index] = process
+                    register_process_group(process.pid)
+                    if previous is not None:
+                        previous.close()
+                    log_file = f"{self.log_prefix}.{index}.{self.names[index]}.stderr.log" if self.log_prefix is not None else None
+                    self.stderr_logs[index] = OutputLog(process.stderr, log_file)
+                    self.start_thread(self.stderr_logs[index].copy)
+                    previous = process.stdout if not last else None
+                    if last and self.capture:
+                        self.start_thread(self.collect_output, process.stdout)
+                else:
+                    if last:
+                        target = self.get_last_target()
+                        next_previous = None
+                        opened = [target] if target is not None else []
+                    else:
+                        read_end, write_end = os.pipe()
+                        target, next_previous = os.fdopen(write_end, "wb"), os.fdopen(read_end, "rb")
+                        opened = [target, next_previous]
+                    self.start_thread(self.run_python_stage, index, previous, target)
+                    opened = []
+                    previous = next_previous
+        except BaseException:
+            # ? nobody reads these pipes anymore, a stage that writes to them gets a broken pipe
+            for pipe in [*opened, previous]:
+                if pipe is not None:
+                    pipe.close()
+            raise
+
+    def stop_remaining(self) -> None:
+        """
+        Function that sends a SIGTERM to the process groups of the stages
+        that have not been reaped yet, wait_for_stages sends the SIGKILL
+        after TERMINATE_GRACE_SECONDS. os.killpg is used, since Popen.terminate
+        could reap the process before os.wait4 reads its resource usage.
+        """
+        if self.kill_at is not None:
+            return
+        self.kill_at = time.time() + TERMINATE_GRACE_SECONDS
+        self.stopped = [process.pid for index, process in self.processes.items() if index not in self.returncodes]
+        for pid in self.stopped:
+            signal_process_group(pid, signal.SIGTERM)
+
+    def kill_remaining(self) -> None:
+        """
+        Function that kills the process groups of the stages that have
+        not been reaped yet.
+        """
+        for index, process in self.processes.items():
+            if index not in self.returncodes:
+                signal_process_group(process.pid, signal.SIGKILL)
+
+    def wait_for_stages(self, start: float) -> list[dict[str, Any]]:
+        """
+        Function that waits for all processes and threads of the pipeline.
+        When a process fails or the timeout is exceeded, the other
+        processes are stopped. With a timeout or while the stages are
+        being stopped, the processes are polled, otherwise os.wait4 blocks.
+        ----------
+        Input:
+            - start: the start time of the pipeline
+        Output:
+            - list with the resource usage per process
+        ----------
+        """
+        usages: list[dict[str, Any]] = []
+        deadline = start + self.timeout if self.timeout is not None and not self.timed_out else None
+        killed = False
+        while pending := [index for index in self.processes if index not in self.returncodes]:
+            for index in pending:
+                process = self.processes[index]
+                pid, status, rusage = os.wait4(process.pid, os.WNOHANG if deadline is not None or self.kill_at is not None else 0)
+                if not pid:
+                    continue
+                unregister_process_group(process.pid)
+                process.returncode = self.returncodes[index] = os.waitstatus_to_exitcode(status)
+                usages.append(get_usage(self.stages[index], time.time() - start, process.returncode, rusage))  # type: ignore[arg-type]
+                if process.returncode not in (0, -signal.SIGPIPE):
+                    self.stop_remaining()
+            now = time.time()
+            if deadline is not None and now >= deadline:
+                logging.warning("Pipeline %s exceeded its timeout of %g seconds", " | ".join(self.names), self.timeout)
+                self.timed_out = True
+                deadline = None
+                self.stop_remaining()
+            elif self.kill_at is not None and now >= self.kill_at and not killed:
+                self.kill_remaining()
+                killed = True
+            if deadline is not None or self.kill_at is not None:
+                time.sleep(0.05)
+        if self.kill_at is not None:
+            # ? the stages have exited, their child processes get the rest of the grace period
+            for pid in self.stopped:
+                wait_for_process_group(pid, self.kill_at)
+                signal_process_group(pid, signal.SIGKILL)
+        for thread in self.threads:
+            thread.join()
+        return usages
+
+    def get_failure(self) -> str | None:
+        """
+        Function that returns the error of the first failing stage.
+        A stage that was stopped by a SIGPIPE only counts as failure
+        if no other stage failed.
+        ----------
+        Output:
+            - str with the error, or None if all stages succeeded
+        ----------
+        """
+        failures: dict[int, str] = {index: f"{error!r}" for index, error in self.errors.items()}
+        for index, returncode in self.returncodes.items():
+            if returncode not in (0, -signal.SIGPIPE):
+                failures[index] = f"exit code {returncode}: {self.stderr_logs[index].get_tail()}"
+        if not failures:
+            failures = {index: f"exit code {code}: {self.stderr_logs[index].get_tail()}" for index, code in self.returncodes.items() if code != 0}
+        if not failures:
+            return None
+        index = min(failures)
+        return f"stage {index} ({self.names[index]}) failed with {failures[index]}"
+
+    def execute(self) -> Tuple[str, str] | bool:
+        """
+        Executes the pipeline. All stages are stopped and reaped,
+        also if a stage could not be started.
+        ----------
+        Output:
+            - tuple of (stdout, stderr) if capture is True
+            - bool indicating success if capture is False
+        Raises:
+            - SubprocessError: if a stage fails and allow_fail is False
+            - CommandTimeoutError: if the pipeline exceeds its timeout
+        ----------
+        """
+        logging.info("running pipeline: '%s'", " | ".join(shlex.join(stage) if isinstance(stage, list) else self.names[index] for index, stage in enumerate(self.stages)))
+        start = time.time()
+        try:
+            self.start_stages()
+            usages = self.wait_for_stages(start)
+        except BaseException:
+            self.stop_remaining()
+            self.wait_for_stages(start)
+            raise
+        failure = self.get_failure()
+        # ? the usage of the pipeline is the sum of its processes, with the peak RSS of the largest
+        self.usage = {
+            "tool": " | ".join(self.names),
+            "returncode": next((code for code in self.returncodes.values() if code != 0), 1 if failure else 0),
+            "wall_seconds": round(time.time() - start, 3),
+            **{key: round(sum(usage[key] for usage in usages), 3) for key in PIPELINE_USAGE_SUMS},
+            "max_rss_mb": max((usage["max_rss_mb"] for usage in usages if usage["max_rss_mb"] is not None), default=None),
+        }
+        stderr = "".join(log.get_tail() for log in self.stderr_logs.values())
+        if self.timed_out:
+            raise CommandTimeoutError(" | ".join(self.names), self.timeout or 0)
+        if failure:
+            logging.error("Pipeline failed, %s", failure)
             if not self.allow_fail:
-                raise SubprocessError(e.stderr) from e
+                raise SubprocessError(failure)
             return False
+        if self.capture:
+            return b"".join(self.output).decode("utf-8", errors="replace"), stderr
+        return True
+
+
+def set_command_limits(**limits: int) -> None:
+    """
+    Function that sets the number of AsyncShellCommands that may run
+    at the same time per resource class, e.g. set_command_limits(cpu=4).
+    The limits apply to the event loops that are started afterwards.
+    ----------
+    Input:
+        - limits: the number of concurrent commands per resource class
+    Raises:
+        - ValueError: if a limit is lower than 1
+    ----------
+    """
+    for resource_class, limit in limits.items():
+        if limit < 1:
+            raise ValueError(f"The limit of resource class '{resource_class}' must be at least 1, got {limit}")
+        _command_limits[resource_class] = limit
+
+
+def get_limiter(resource_class: str) -> asyncio.Semaphore:
+    """
+    Function that returns the semaphore of a resource class.
+    A semaphore belongs to one event loop, so the semaphores are kept
+    per running loop and shared by all commands in that loop.
+    ----------
+    Input:
+        - resource_class: the resource class of the command
+    Output:
+        - asyncio.Semaphore: the limiter of the resource class
+    Raises:
+        - ValueError: if the resource class has no limit
+    ----------
+    """
+    if resource_class not in _command_limits:
+        raise ValueError(f"Unknown resource class '{resource_class}', choose from {', '.join(_command_limits)}")
+    limiters = _limiters.setdefault(asyncio.get_running_loop(), {})
+    if resource_class not in limiters:
+        limiters[resource_class] = asyncio.Semaphore(_command_limits[resource_class])
+    return limiters[resource_class]
+
+
+class AsyncShellCommand(Command):
+    """
+    Concrete implementation of a shell command that runs with asyncio
+    (asyncio.create_subprocess_exec), as a subclass of the Command interface.
+    The command waits for a free slot of its resource class before it
+    starts, so a coordinator can schedule the tools of many samples
+    at once without overloading the machine.
+    ----------
+    Methods:
+        - execute: Runs the command in a new event loop
+        - execute_async: Runs the command in the running event loop
+    ----------
+    """
+
+    def __init__(
+        self,
+        cmd: list[str] | str,
+        directory: Path = Path.cwd(),
+        capture: bool = False,
+        stdout_file: IO[Any] | None = None,
+        stderr_file: IO[Any] | None = None,
+        allow_fail: bool = False,
+        resource_class: str = "cpu",
+        timeout: float | None = None,
+    ) -> None:
+        """
+        Constructor of the AsyncShellCommand class,
+        with the same parameters as the ShellCommand class.
+        ----------
+        Input:
+            - cmd: list of strings or str (runs in a shell), the command to be executed
+            - directory: Path, the directory in which to execute the command
+            - capture: bool, whether to capture the output of the command
+            - stdout_file: file to write standard output
+            - stderr_file: file to write standard error
+            - allow_fail: bool, whether to allow command failures without exception
+            - resource_class: the limiter of the command (see set_command_limits)
+            - timeout: seconds before the command is stopped (default: the timeout of the tool)
+        ----------
+        """
+        self.cmd = cmd
+        self.directory = directory
+        self.capture = capture
+        self.stdout_file = stdout_file
+        self.stderr_file = stderr_file
+        self.allow_fail = allow_fail
+        self.resource_class = resource_class
+        self.timeout = timeout if timeout is not None else get_tool_timeout(cmd)
+        self.usage: dict[str, Any] | None = None
+
+    def execute(self) -> Tuple[str, str] | bool:
+        """
+        Executes the command in a new event loop,
+        so it can be used by the CommandInvoker like a ShellCommand.
+        ----------
+        Output:
+            - tuple of (stdout, stderr) if capture is True
+            - bool indicating success if capture is False
+        Raises:
+            - SubprocessError: if the command fails and allow_fail is False
+        ----------
+        """
+        return asyncio.run(self.execute_async())
+
+    async def execute_async(self) -> Tuple[str, str] | bool:
+        """
+        Executes the command in the running event loop, after a slot of
+        its resource class is free. The resource usage is the difference of
+        getrusage(RUSAGE_CHILDREN), like ShellCommand without streaming.
+        On a timeout or when the task is cancelled, the process group of
+        the command is stopped (SIGTERM, then SIGKILL).
+        ----------
+        Output:
+            - tuple of (stdout, stderr) if capture is True
+            - bool indicating success if capture is False
+        Raises:
+            - SubprocessError: if the command fails and allow_fail is False
+            - CommandTimeoutError: if the command exceeds its timeout
+        ----------
+        """
+        async with get_limiter(self.resource_class):
+            with running_command():
+                logging.info("running command: '%s'", shlex.join(self.cmd) if isinstance(self.cmd, list) else self.cmd)
+                stdout = self.stdout_file or (subprocess.PIPE if self.capture else None)
+                stderr = self.stderr_file or (subprocess.PIPE if self.capture else None)
+                start = time.time()
+                before = resource.getrusage(resource.RUSAGE_CHILDREN)
+                returncode = -1
+                try:
+                    if isinstance(self.cmd, str):
+                        process = await asyncio.create_subprocess_shell(self.cmd, cwd=self.directory, stdout=stdout, stderr=stderr, start_new_session=True)
+                    else:
+                        process = await asyncio.create_subprocess_exec(*self.cmd, cwd=self.directory, stdout=stdout, stderr=stderr, start_new_session=True)
+                    register_process_group(process.pid)
+                    try:
+                        out, err = await asyncio.wait_for(process.communicate(), self.timeout)
+                    except asyncio.TimeoutError as e:
+                        await self.terminate(process)
+                        raise CommandTimeoutError(get_tool_name(self.cmd), self.timeout or 0) from e
+                    except BaseException:
+                        await asyncio.shield(self.terminate(process))
+                        raise
+                    finally:
+                        unregister_process_group(process.pid)
+                    returncode = process.returncode if process.returncode is not None else -1
+                finally:
+                    self.usage = get_usage(self.cmd, time.time() - start, returncode, resource.getrusage(resource.RUSAGE_CHILDREN), before)
+        out_text = out.decode("utf-8", errors="replace") if out is not None else ""
+        err_text = err.decode("utf-8", errors="replace") if err is not None else ""
+        if returncode != 0:
+            logging.error("Command failed with return code %d:\n%s\n%s", returncode, self.cmd, err_text)
+            if not self.allow_fail:
+                raise SubprocessError(err_text)
+            return False
+        if self.capture:
+            return out_text, err_text
+        return True
+
+    @staticmethod
+    async def terminate(process: asyncio.subprocess.Process) -> None:
+        """
+        Function that stops the process group of a command:
+        SIGTERM and SIGKILL after TERMINATE_GRACE_SECONDS.
+        ----------
+        Input:
+            - process: the running command
+        ----------
+        """
+        kill_at = time.time() + TERMINATE_GRACE_SECONDS
+        signal_process_group(process.pid, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(process.wait(), TERMINATE_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        while time.time() < kill_at:
+            try:
+                os.killpg(process.pid, 0)
+            except (ProcessLookupError, PermissionError):
+                break
+            await asyncio.sleep(0.05)
+        signal_process_group(process.pid, signal.SIGKILL)
+        await process.wait()
+
+
+async def run_concurrently(commands: list[AsyncShellCommand]) -> list[Tuple[str, str] | bool]:
+    """
+    Function that runs commands in the running event loop,
+    limited by the resource classes of the commands.
+    ----------
+    Input:
+        - commands: the commands to run
+    Output:
+        - list with the result per command, in the order of the commands
+    Raises:
+        - SubprocessError: if a command fails and allow_fail is False,
+            after all other commands have finished
+    ----------
+    """
+    results = await asyncio.gather(*(command.execute_async() for command in commands), return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results  # type: ignore[return-value]
+
+
+def execute_concurrently(commands: list[AsyncShellCommand]) -> list[Tuple[str, str] | bool]:
+    """
+    Function that runs commands concurrently from a single coordinator
+    thread (a new event loop), limited by their resource classes.
+    ----------
+    Input:
+        - commands: the commands to run
+    Output:
+        - list with the result per command, in the order of the commands
+    Raises:
+        - SubprocessError: if a command fails and allow_fail is False
+    ----------
+    """
+    return asyncio.run(run_concurrently(commands))
 
 
 class CommandInvoker:
@@ -182,14 +1419,21 @@ class CommandInvoker:
         ----------
         """
         self.command = command
+        self.usage: dict[str, Any] | None = None
 
     def execute(self) -> Tuple[str, str] | bool:
         """
-        Method that starts the execution of the command
+        Method that starts the execution of the command.
+        The resource usage of the command is kept in the usage
+        attribute (see get_usage), also if the command fails.
         ----------
         Output:
             - tuple of (stdout, stderr) if capture is True
             - bool indicating success if capture is False
         ----------
         """
-        return self.command.execute()
+        try:
+            with running_command():
+                return self.command.execute()
+        finally:
+            self.usage = getattr(self.command, "usage", None)
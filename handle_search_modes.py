@@ -19,17 +19,27 @@ __author__ = "Mark van de Streek"
 __date__ = "2025-05-07"
 __all__ = ["HandleSearchModes"]
 
+import copy
 import logging
 import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
 from typing import Any
 
+import run_metadata
+import sample_metrics
+from command_utils import submit_in_context
 from make_gene_database import GeneDatabaseBuilder
 from make_snp_database import SNPDatabaseBuilder
+from parsing.codon_caller import CodonCaller, get_results_filename
 from parsing.read_config_pattern import ReadConfigPattern
+from parsing.snp_gate import SNPGate
 from preprocessing.exceptions.validate_database_exceptions import InvalidDatabaseError, InvalidSNPDatabaseError
 from preprocessing.validation.validate_database import check_for_database_path
 from preprocessing.validation.validate_pointfinder_database import PointFinderReferenceChecker
-from queries.query_runners import run_gene_query, run_snp_query
+from queries.query_runners import run_gene_query, run_native_snp_query, run_snp_query
+from queries.union_database import UnionDatabase
 
 
 class HandleSearchModes:
@@ -48,7 +58,18 @@ class HandleSearchModes:
         - check_valid_SNP_database: Checks if the SNP database exists
         - handle_gene_search_mode: Handles the gene search mode
         - handle_snp_search_mode: Handles the SNP search mode
+        - handle_native_snp_query: Runs the SNP search with the native engine
+        - handle_gated_snp_search_mode: Handles the SNP search mode,
+            unless the run_snps_if gate of the configuration is not met
         - handle: determines which search modes to run (both, genes, SNPs)
+        - split_threads: Divides the threads between the gene and SNP search
+        - handle_both_search_modes: Runs the gene and SNP search concurrently
+        - get_combined_database: Combines the target genes and SNP genes
+        - for_combined_search: Returns a handler for the combined database
+        - handle_single_alignment_search_modes: Runs the gene and SNP search
+            with a single alignment against the combined database
+        - get_kma_databases: Validates (or creates) the KMA databases
+            of the configuration and returns their paths
     ----------
     """
 
@@ -147,15 +168,27 @@ class HandleSearchModes:
         this is why we need to check if the gene database exists here.
         Blastn can directly search for SNPs in FASTA files.
         """
+        self.validate_or_create_snp_gene_database()
+        run_snp_query(self.pattern.creation_dict)
+
+    def validate_or_create_snp_gene_database(self) -> dict[str, Any]:
+        """
+        Function that checks if the (KMA) gene database inside the
+        SNP database exists and creates it if it does not exist.
+        ----------
+        Output:
+            - dict with the database path and name
+        Raises:
+            - InvalidDatabaseError: if the database could not be created
+        ----------
+        """
         custom_database_builder: dict[str, Any] = {
             "database_path": self.pattern.creation_dict["path_snps"] + "/" + self.pattern.creation_dict["species"],
             "database_name": self.pattern.creation_dict["species"],
             "file_type": self.file_type,
         }
         logging.debug("Checking if the gene database exists for the FASTQ file type...")
-        if self.check_valid_gene_database_path(custom_database_builder):
-            run_snp_query(self.pattern.creation_dict)
-        else:
+        if not self.check_valid_gene_database_path(custom_database_builder):
             logging.warning("Gene database does not exist inside SNP database, trying to create it...")
             self.create_genes_database(custom_database_builder)
             if not self.check_valid_gene_database_path(custom_database_builder):
@@ -163,14 +196,14 @@ class HandleSearchModes:
                     custom_database_builder["database_name"],
                     custom_database_builder["file_type"],
                 )
-            else:
-                run_snp_query(self.pattern.creation_dict)
+        return custom_database_builder
 
     def create_genes_database(self, custom_database_builder: dict[str, Any]) -> None:
         """
         Little helper function that creates the gene database
         for the SNP database. it's confusing, but the PointFinder database
         requires a gene database only when the file type is FASTQ.
+        The native SNP engine also uses a BLAST database for FASTA files.
         The developed class is used for this purpose, with different params.
         ----------
         Input:
@@ -179,7 +212,7 @@ class HandleSearchModes:
         """
         genes_fasta = f"{self.pattern.creation_dict['path_snps']}/{self.pattern.creation_dict['species']}/genes.fasta"
         custom_database_builder["input_fasta_file"] = genes_fasta if os.path.exists(genes_fasta) else self.pattern.creation_dict["target_snps_file"]
-        custom_database_builder["database_type"] = "FASTQ"
+        custom_database_builder["database_type"] = self.file_type
         GeneDatabaseBuilder(custom_database_builder)
 
     def handle_gene_search_mode(self) -> None:
@@ -191,6 +224,19 @@ class HandleSearchModes:
         creating of a new database if it does not exist and finally
         calls the query operation to the right runner class.
         """
+        self.validate_or_create_gene_database()
+        logging.debug("Database exists, starting the query operation...")
+        run_gene_query(self.pattern.creation_dict)
+
+    def validate_or_create_gene_database(self) -> None:
+        """
+        Function that checks if the gene database of the
+        configuration exists and creates it if it does not exist.
+        ----------
+        Raises:
+            - InvalidDatabaseError: if the database could not be created
+        ----------
+        """
         if not self.check_valid_gene_database_path(self.pattern.creation_dict):
             logging.debug("Database does not exist, creating the database...")
             self.run_makedatabase(self.pattern.creation_dict)
@@ -200,8 +246,6 @@ class HandleSearchModes:
                 self.pattern.creation_dict["database_name"],
                 self.pattern.creation_dict["file_type"],
             )
-        logging.debug("Database exists, starting the query operation...")
-        run_gene_query(self.pattern.creation_dict)
 
     def handle_snp_search_mode(self) -> None:
         """
@@ -214,7 +258,9 @@ class HandleSearchModes:
         """
         self.validate_or_create_SNP_database()
         logging.info("SNP database exists, starting the query operation...")
-        if self.file_type == "FASTQ":
+        if self.pattern.creation_dict.get("snp_engine") == "native":
+            self.handle_native_snp_query()
+        elif self.file_type == "FASTQ":
             logging.info("File type is FASTQ, starting additional validation steps...")
             # File type is FASTQ, PointFinder requires again a indexed
             # database, so we can reuse our own creation class to achieve
@@ -225,6 +271,51 @@ class HandleSearchModes:
             logging.info("File type is FASTA, starting the SNP query operation...")
             run_snp_query(self.pattern.creation_dict)
 
+    def handle_native_snp_query(self) -> None:
+        """
+        Function that runs the SNP search with the native engine
+        (snp_engine: native in the configuration). The input is aligned
+        once against the genes of the SNP database, with BLASTn (FASTA)
+        or KMA (FASTQ), and the configured codons are called in-process
+        from the alignments (see parsing/codon_caller.py). The calls are
+        written in the format of PointFinder's results file,
+        so the SNPs are parsed and reported in the same way.
+        """
+        creation_dict = self.pattern.creation_dict
+        database_builder = self.validate_or_create_snp_gene_database()
+        output = Path(creation_dict["output"])
+        snp_output = os.path.join(creation_dict["run_output_snps"], f"{output.name}_snps")
+        logging.info("Aligning against the SNP genes for the native SNP engine...")
+        run_native_snp_query(
+            {
+                **creation_dict,
+                "database_path": database_builder["database_path"],
+                "database_name": database_builder["database_name"],
+                "output": snp_output,
+                "subject_alignments": True,
+            }
+        )
+        # ? the resource usage is reported with the other searches of the sample
+        for usage in sample_metrics.pop_records(snp_output):
+            stage = usage.pop("stage")
+            sample_metrics.record(creation_dict["output"], stage, {**usage, "snp_engine": "native"})
+        results_file = os.path.join(creation_dict["run_output_snps"], get_results_filename(output.name, self.file_type))
+        CodonCaller(creation_dict["SNP_list"], self.file_type).write_results(snp_output, results_file)
+
+    def handle_gated_snp_search_mode(self) -> None:
+        """
+        Function that runs the SNP search after the gene search,
+        unless the run_snps_if gate of the configuration is not met
+        by the gene search results (see parsing/snp_gate.py).
+        A skipped search is marked in the creation_dict, so the
+        ParsingManager adds a row for it to the report.
+        """
+        if self.pattern.creation_dict.get("run_snps_if") and not SNPGate(self.pattern.pattern, self.pattern.creation_dict).is_met():
+            logging.info("SNP gate is not met, skipping the SNP search...")
+            self.pattern.creation_dict["snp_search_skipped"] = True
+            return
+        self.handle_snp_search_mode()
+
     def handle(self) -> None:
         """
         Function that handles the calling of all the config
@@ -232,9 +323,183 @@ class HandleSearchModes:
         search mode is selected and calls the right function(s).
         """
         logging.info("Handling search modes...")
+        if self.search_mode == "both" and self.pattern.creation_dict.get("single_alignment"):
+            logging.debug("Search mode is set to 'both' with a single alignment, aligning against the combined database...")
+            self.handle_single_alignment_search_modes()
+            return
+        if self.search_mode == "both" and self.pattern.creation_dict.get("run_snps_if"):
+            logging.debug("Search mode is set to 'both' with a SNP gate, running the gene search first...")
+            self.handle_gene_search_mode()
+            self.handle_gated_snp_search_mode()
+            return
+        if self.search_mode == "both":
+            logging.debug("Search mode is set to 'both', running the gene and SNP search concurrently...")
+            self.handle_both_search_modes()
+            return
         if self.search_mode in ["genes", "both"]:
             logging.debug("Search mode is set to 'genes' or 'both', handling gene search mode...")
             self.handle_gene_search_mode()
         if self.search_mode in ["snps", "both"]:
             logging.debug("Search mode is set to 'snps' or 'both', handling SNP search mode...")
             self.handle_snp_search_mode()
+
+    def split_threads(self) -> tuple[int, int]:
+        """
+        Function that divides the threads of the run between
+        the gene search and the SNP search, based on the
+        --snp-thread-ratio option. Both searches get at least one thread.
+        ----------
+        Output:
+            - tuple with the threads for the gene and the SNP search
+        ----------
+        """
+        threads: int = self.pattern.creation_dict["threads"]
+        snp_threads = min(max(round(threads * self.option["config"].get("snp_thread_ratio", 0.5)), 1), threads)
+        return max(threads - snp_threads, 1), max(snp_threads, 1)
+
+    def for_search(self, threads: int) -> "HandleSearchModes":
+        """
+        Function that returns a handler for a single search, with its
+        own copy of the creation_dict, so the two searches of the
+        'both' mode do not change each other's settings.
+        ----------
+        Input:
+            - threads: number of threads for the search
+        Output:
+            - HandleSearchModes object with a copied pattern
+        ----------
+        """
+        pattern = copy.copy(self.pattern)
+        pattern.creation_dict = {**self.pattern.creation_dict, "threads": threads}
+        return HandleSearchModes(pattern, self.option)
+
+    def handle_both_search_modes(self) -> None:
+        """
+        Function that runs the gene and the SNP search concurrently.
+        Both searches are independent until the parsing of the results,
+        so the wall time approaches the time of the slower search.
+        The threads are divided between the searches (see split_threads).
+        This function only returns when both searches are finished,
+        an error of either search is raised afterwards.
+        """
+        gene_threads, snp_threads = self.split_threads()
+        logging.info("Running gene search (%d threads) and SNP search (%d threads) concurrently...", gene_threads, snp_threads)
+        run_metadata.record("threads", {"gene_search": gene_threads, "snp_search": snp_threads})
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="search") as executor:
+            futures = [
+                submit_in_context(executor, self.for_search(gene_threads).handle_gene_search_mode),
+                submit_in_context(executor, self.for_search(snp_threads).handle_snp_search_mode),
+            ]
+            wait(futures)
+        for future in futures:
+            future.result()
+
+    def get_combined_database(self) -> UnionDatabase:
+        """
+        Function that combines the target genes and the genes of the
+        SNP database in a single database (--single-alignment),
+        with the templates prefixed by genes__ or snps__.
+        The FASTA file is written next to the gene database,
+        if it does not exist yet (see queries/union_database.py).
+        ----------
+        Output:
+            - UnionDatabase object of the combined database
+        ----------
+        """
+        self.validate_or_create_SNP_database()
+        snp_genes = f"{self.pattern.creation_dict['path_snps']}/{self.pattern.creation_dict['species']}/genes.fasta"
+        combined = UnionDatabase(
+            {
+                "genes": self.pattern.creation_dict["input_fasta_file"],
+                "snps": snp_genes if os.path.exists(snp_genes) else self.pattern.creation_dict["target_snps_file"],
+            },
+            Path(self.pattern.creation_dict["database_path"]).parent,
+            name="combined",
+        )
+        combined.write()
+        return combined
+
+    def for_combined_search(self, combined: UnionDatabase, output: str) -> "HandleSearchModes":
+        """
+        Function that returns a handler for a gene search
+        against the combined database.
+        ----------
+        Input:
+            - combined: the combined database
+            - output: output prefix of the combined search
+        Output:
+            - HandleSearchModes object with a copied pattern
+        ----------
+        """
+        pattern = copy.copy(self.pattern)
+        pattern.creation_dict = {
+            **self.pattern.creation_dict,
+            "database_path": combined.database_path,
+            "database_name": combined.database_name,
+            "input_fasta_file": combined.fasta_file,
+            "output": output,
+            # ? the SNPs are called from the alignments of BLASTn (see parsing/codon_caller.py)
+            "subject_alignments": True,
+        }
+        return HandleSearchModes(pattern, self.option)
+
+    def handle_single_alignment_search_modes(self) -> None:
+        """
+        Function that runs the gene and the SNP search of search mode both
+        with a single alignment (--single-alignment). The sample is aligned
+        once against the combined database, with KMA or BLASTn like the gene
+        search. The results of the target genes are split into the output
+        of the gene search, which is parsed as usual. The SNPs are called
+        from the alignments of the SNP genes (see parsing/codon_caller.py)
+        instead of by PointFinder, which would align the sample again.
+        The SNP gate (run_snps_if) is checked with the gene results.
+        """
+        creation_dict = self.pattern.creation_dict
+        combined = self.get_combined_database()
+        output = Path(creation_dict["output"])
+        combined_dir = output.parent / "combined"
+        combined_output = str(combined_dir / output.name)
+        snp_output = str(combined_dir / f"{output.name}_snps")
+        logging.info("Aligning once against the combined database %s of the target and SNP genes...", combined.database_name)
+        self.for_combined_search(combined, combined_output).handle_gene_search_mode()
+        combined.demultiplex(combined_output, {"genes": creation_dict["output"], "snps": snp_output}, self.file_type)
+        for usage in sample_metrics.pop_records(combined_output):
+            stage = usage.pop("stage")
+            sample_metrics.record(creation_dict["output"], stage, {**usage, "combined_database": combined.database_name})
+        if creation_dict.get("run_snps_if") and not SNPGate(self.pattern.pattern, creation_dict).is_met():
+            logging.info("SNP gate is not met, skipping the SNP calling...")
+            creation_dict["snp_search_skipped"] = True
+        else:
+            results_file = os.path.join(creation_dict["run_output_snps"], get_results_filename(output.name, self.file_type))
+            CodonCaller(creation_dict["SNP_list"], self.file_type).write_results(snp_output, results_file)
+        shutil.rmtree(combined_dir, ignore_errors=True)
+
+    def get_kma_databases(self) -> list[str]:
+        """
+        Function that returns the KMA databases that are used
+        by the selected search mode(s) for FASTQ input:
+            - genes: the gene database of the configuration
+            - SNPs: the gene database inside the PointFinder database,
+                which is used by the KMA run of PointFinder
+            - both with a single alignment: only the combined database
+        The databases are validated and created if they do not exist,
+        so they can be loaded into shared memory before a batch.
+        The paths are written in the same way as in the queries.
+        ----------
+        Output:
+            - list with path + name of the KMA databases
+        ----------
+        """
+        databases: list[str] = []
+        if self.search_mode == "both" and self.pattern.creation_dict.get("single_alignment"):
+            handler = self.for_combined_search(self.get_combined_database(), self.pattern.creation_dict["output"])
+            handler.validate_or_create_gene_database()
+            return [handler.pattern.creation_dict["database_path"] + handler.pattern.creation_dict["database_name"]]
+        if self.search_mode in ["genes", "both"]:
+            self.validate_or_create_gene_database()
+            databases.append(self.pattern.creation_dict["database_path"] + self.pattern.creation_dict["database_name"])
+        if self.search_mode in ["snps", "both"]:
+            self.validate_or_create_SNP_database()
+            database_builder = self.validate_or_create_snp_gene_database()
+            databases.append(database_builder["database_path"] + database_builder["database_name"])
+        return databases
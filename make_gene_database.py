@@ -22,13 +22,16 @@ specific subcommand can be found in the README.md file of this repository.
 
 __author__ = "Mark van de Streek"
 __date__ = "2024-09-27"
-__all__ = ["GeneDatabaseBuilder"]
+__all__ = ["GeneDatabaseBuilder", "KMASharedMemory"]
 
 import logging
 import os
+import signal
+import threading
 from typing import Any, Tuple
 
-from command_utils import CommandInvoker, ShellCommand
+from command_utils import CommandInvoker, ShellCommand, set_termination_signal
+from preprocessing.exceptions.command_utils_exceptions import SubprocessError
 from preprocessing.validation.determine_input_type import InputFileInspector
 
 
@@ -42,6 +45,8 @@ class GeneDatabaseBuilder:
         - build_database: Generic function to build the database
         - create_kma_database: Method that creates the KMA database
         - create_blast_database: Method that creates the BLAST database
+        - load_kma_shared_memory: Loads a KMA database into shared memory
+        - destroy_kma_shared_memory: Removes a KMA database from shared memory
     ----------
     """
 
@@ -97,7 +102,7 @@ class GeneDatabaseBuilder:
         Command: kma_index -i input_fasta_file -o path + name
         ----------
         Output:
-            - captured output of the shell command
+            - bool indicating success
         ----------
         """
         logging.debug("Running KMA subprocess to create database")
@@ -110,7 +115,7 @@ class GeneDatabaseBuilder:
                     "-o",
                     self.full_database_path,
                 ],
-                capture=True,
+                log_prefix=f"{self.full_database_path}.kma_index",
             )
         ).execute()
 
@@ -124,7 +129,7 @@ class GeneDatabaseBuilder:
             -dbtype nucl -out path + name
         ----------
         Output:
-            - captured output of the shell command
+            - bool indicating success
         ----------
         """
         logging.debug("Running BLAST subprocess to create database")
@@ -139,6 +144,110 @@ class GeneDatabaseBuilder:
                     "-out",
                     self.full_database_path,
                 ],
+                log_prefix=f"{self.full_database_path}.makeblastdb",
+            )
+        ).execute()
+
+    @staticmethod
+    def load_kma_shared_memory(full_database_path: str) -> Tuple[str, str] | bool:
+        """
+        Method that loads an existing KMA database into shared memory,
+        so following KMA queries with -shm do not read the index from disk.
+        Command: kma shm -t_db path + name -shmLvl 1
+        ----------
+        Input:
+            - full_database_path: path + name of the KMA database
+        Output:
+            - captured output of the shell command
+        ----------
+        """
+        logging.info("Loading KMA database %s into shared memory...", full_database_path)
+        return CommandInvoker(
+            ShellCommand(
+                cmd=["kma", "shm", "-t_db", full_database_path, "-shmLvl", "1"],
+                capture=True,
+            )
+        ).execute()
+
+    @staticmethod
+    def destroy_kma_shared_memory(full_database_path: str) -> Tuple[str, str] | bool:
+        """
+        Method that removes a KMA database from shared memory.
+        Command: kma shm -t_db path + name -shmLvl 1 -destroy
+        ----------
+        Input:
+            - full_database_path: path + name of the KMA database
+        Output:
+            - captured output of the shell command
+        ----------
+        """
+        logging.info("Removing KMA database %s from shared memory...", full_database_path)
+        return CommandInvoker(
+            ShellCommand(
+                cmd=["kma", "shm", "-t_db", full_database_path, "-shmLvl", "1", "-destroy"],
                 capture=True,
             )
         ).execute()
+
+
+class KMASharedMemory:
+    """
+    Context manager that keeps KMA databases resident in shared memory
+    for the duration of a batch (--kma-shm).
+    Shared memory segments outlive the process, so the segments are
+    always removed on exit, also if a sample fails or if the
+    process is terminated with SIGTERM (e.g. by a job scheduler).
+    ----------
+    Methods:
+        - __init__: Constructor of the class
+        - __enter__: Loads the databases into shared memory
+        - __exit__: Removes the databases from shared memory
+    ----------
+    """
+
+    def __init__(self, databases: list[str]) -> None:
+        """
+        Constructor of the KMASharedMemory class.
+        ----------
+        Input:
+            - databases: list with path + name of the KMA databases
+        ----------
+        """
+        self.databases = list(dict.fromkeys(databases))
+        self.loaded: list[str] = []
+        self.previous_sigterm_handler: Any = None
+
+    def _handle_sigterm(self, signum: int, frame: Any) -> None:
+        """
+        Signal handler that records SIGTERM (see set_termination_signal)
+        and passes it on to the previous handler, e.g. the handler of main().
+        Without a previous handler, SIGTERM becomes a SystemExit,
+        so the segments are removed in __exit__.
+        """
+        set_termination_signal(signum)
+        if callable(self.previous_sigterm_handler):
+            self.previous_sigterm_handler(signum, frame)
+        raise SystemExit(128 + signum)
+
+    def __enter__(self) -> "KMASharedMemory":
+        if threading.current_thread() is threading.main_thread():
+            self.previous_sigterm_handler = signal.signal(signal.SIGTERM, self._handle_sigterm)
+        try:
+            for database in self.databases:
+                GeneDatabaseBuilder.load_kma_shared_memory(database)
+                self.loaded.append(database)
+        except BaseException:
+            self.__exit__()
+            raise
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        for database in reversed(self.loaded):
+            try:
+                GeneDatabaseBuilder.destroy_kma_shared_memory(database)
+            except SubprocessError:
+                logging.warning("Could not remove KMA database %s from shared memory, remove it with 'kma shm -t_db %s -destroy'", database, database)
+        self.loaded = []
+        if self.previous_sigterm_handler is not None:
+            signal.signal(signal.SIGTERM, self.previous_sigterm_handler)
+            self.previous_sigterm_handler = None
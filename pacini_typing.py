@@ -52,28 +52,60 @@ __date__ = "2024-09-27"
 __all__ = ["PaciniTyping", "main"]
 
 import argparse
+import contextlib
+import copy
 import gzip
 import logging
 import os
 import shutil
+import signal
 import sys
 import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
 from pathlib import Path
 from typing import Any
 
 import pandas as pd
 
 import preprocessing.argsparse.build_parser
+import run_metadata
+import sample_metrics
+from batch.cost_model import DEFAULT_METRICS_STORE, BatchProgress, CostModel, get_config_databases, get_database_size, order_samples
+from batch.dedup import find_duplicate_inputs, write_duplicate_report
+from batch.sharding import BatchJournal, assign_shard, get_shard_report_stem, merge_shard_reports
+from batch.stream_typing import FastqTail, GeneEvidence
+from batch.watch_folder import POLL_SECONDS, WatchFolder, append_to_combined_report
+from batch.work_queue import LeaseHeartbeat, WorkQueue
+from command_utils import (
+    CommandInvoker,
+    ShellCommand,
+    get_termination_signal,
+    reset_process_groups,
+    set_termination_signal,
+    set_tool_timeouts,
+    stop_process_groups,
+    submit_in_context,
+)
 from handle_search_modes import HandleSearchModes
-from make_gene_database import GeneDatabaseBuilder
+from make_gene_database import GeneDatabaseBuilder, KMASharedMemory
 from parsing.parsing_manager import ParsingManager
-from parsing.read_config_pattern import ReadConfigPattern
+from parsing.read_config_pattern import ReadConfigPattern, get_config_ids
+from preprocessing.exceptions.command_utils_exceptions import CommandTimeoutError
 from preprocessing.exceptions.determine_input_type_exceptions import InvalidSequencingTypesError
 from preprocessing.exceptions.validate_database_exceptions import InvalidDatabaseError
 from preprocessing.validation.determine_input_type import InputFileInspector
 from preprocessing.validation.validate_database import check_for_database_path
 from preprocessing.validation.validating_input_arguments import ArgsValidator
+from process_sampler import ProcessTreeSampler
+from queries.kma_runner import KMA
 from queries.query_runners import run_gene_query
+from queries.union_database import UnionDatabase
+from run_metadata import write_run_metadata
+from service.daemon import serve
+from thread_budget import divide_threads, get_usable_cpus
 
 logging.basicConfig(
     level=logging.INFO,
@@ -87,6 +119,7 @@ class PaciniTyping:
     Main class for the Pacini-Typing application.
     ----------
     Methods:
+        - resolve_threads: Resolves the number of threads (--threads auto)
         - parse_all_args: Parse all arguments into a dictionary
         - setup_logging: Setup logging format and level
         - get_input_filenames: Retrieve the input files based on args
@@ -99,6 +132,8 @@ class PaciniTyping:
         - save_intermediates: Save intermediate files in a zip archive
         - delete_intermediates: Delete intermediate files
         - handle_makedatabase_option: Handle the makedatabase option
+        - handle_merge_shards_option: Handle the merge-shards option
+        - handle_serve_option: Handle the serve option (daemon mode)
         - handle_config_or_query_option: Handle the config or query option
         - handle_config_option: Handle all config related operations
         - handle_config_option_parse_query: Parse the query operation
@@ -107,7 +142,7 @@ class PaciniTyping:
     ----------
     """
 
-    def __init__(self, input_args: argparse.Namespace) -> None:
+    def __init__(self, input_args: argparse.Namespace, pattern_cache: Any = None) -> None:
         """
         Constructor for the PaciniTyping class.
         The constructor accepts the input arguments from argparse.
@@ -117,14 +152,38 @@ class PaciniTyping:
         ----------
         Input:
             - input_args: argparse.Namespace object with parsed arguments
+            - pattern_cache: cache with validated configuration files,
+                only provided by the daemon (see service/daemon.py)
         ----------
         """
         self.input_args = input_args
+        self.pattern_cache = pattern_cache
         self.option: dict[str, Any] = {}
         self.sample_name: str = ""
         self.file_type: str = ""
-        self.threads: int = self.input_args.threads
+        self.threads: int = self.resolve_threads()
         self.output_dir = None
+        self.kma_shm_loaded: bool = False
+
+    def resolve_threads(self) -> int:
+        """
+        Function that resolves the number of threads of the run.
+        With --threads auto, the number of usable CPUs is determined
+        from the CPU affinity and the cgroup CPU quota (see thread_budget.py).
+        The effective number of threads is recorded in the run metadata.
+        ----------
+        Output:
+            - int: the number of threads
+        ----------
+        """
+        threads = self.input_args.threads
+        if threads == "auto":
+            usable, affinity, quota = get_usable_cpus()
+            threads = usable
+            logging.info("--threads auto: using %d thread(s)", threads)
+            run_metadata.record("cpus", {"affinity": affinity, "cgroup_quota": quota, "usable": usable})
+        run_metadata.record("threads", {"requested": str(self.input_args.threads), "effective": threads})
+        return threads
 
     def parse_all_args(self) -> None:
         """
@@ -139,6 +198,12 @@ class PaciniTyping:
             self.set_query_attributes()
         elif self.input_args.options == "makedatabase":
             self.set_makedatabase_attributes()
+        elif self.input_args.options == "merge-shards":
+            self.set_merge_shards_attributes()
+        elif self.input_args.options == "serve":
+            self.set_serve_attributes()
+        elif self.input_args.options == "plan":
+            self.set_plan_attributes()
         elif self.input_args.options is None:
             self.set_config_attributes()
 
@@ -160,6 +225,12 @@ class PaciniTyping:
             "config": None,
             "query": None,
             "makedatabase": None,
+            "merge_shards": None,
+            "serve": None,
+            "plan": None,
+            "metrics_store": (self.input_args.metrics_store if hasattr(self.input_args, "metrics_store") else None),
+            "profile_interval": (self.input_args.profile_interval if hasattr(self.input_args, "profile_interval") else None),
+            "tool_timeouts": (dict(self.input_args.timeout) if hasattr(self.input_args, "timeout") else {}),
         }
 
     def set_query_attributes(self) -> None:
@@ -185,6 +256,41 @@ class PaciniTyping:
             "input": self.input_args.input_file,
         }
 
+    def set_merge_shards_attributes(self) -> None:
+        """
+        Function that sets the merge-shards related attributes
+        in the self.option variable.
+        """
+        logging.debug("Parsing merge-shards-related attributes...")
+        self.option["merge_shards"] = {
+            "reports": self.input_args.reports,
+            "output": self.input_args.output,
+        }
+
+    def set_serve_attributes(self) -> None:
+        """
+        Function that sets the serve related attributes
+        in the self.option variable.
+        """
+        logging.debug("Parsing serve-related attributes...")
+        self.option["serve"] = {
+            "socket": self.input_args.socket,
+            "workers": self.input_args.workers,
+            "job_dir": self.input_args.job_dir,
+        }
+
+    def set_plan_attributes(self) -> None:
+        """
+        Function that sets the plan related attributes
+        in the self.option variable.
+        """
+        logging.debug("Parsing plan-related attributes...")
+        self.option["plan"] = {
+            "config_path": self.input_args.plan_config,
+            "input": self.input_args.plan_input,
+            "search_mode": self.input_args.plan_search_mode,
+        }
+
     def set_config_attributes(self) -> None:
         """
         Function that sets the config-scheme related attributes
@@ -193,11 +299,26 @@ class PaciniTyping:
         logging.debug("Parsing config-related attributes...")
         self.option["config"] = {
             "input": self.input_args.input,
-            "config_path": self.input_args.config,
+            # ? the first configuration, every configuration runs with its own copy of the options
+            "config_path": self.input_args.config[0],
+            "config_paths": self.input_args.config,
             "fasta_out": self.input_args.fasta_out,
             "search_mode": self.input_args.search_mode,
             "output_report": self.input_args.output_report,
             "tmp_dir": self.input_args.tmp_dir,
+            "shard": self.input_args.shard,
+            "worker": self.input_args.worker,
+            "worker_lease": self.input_args.worker_lease,
+            "kma_shm": self.input_args.kma_shm,
+            "pointfinder_subprocess": self.input_args.pointfinder_subprocess,
+            "snp_thread_ratio": self.input_args.snp_thread_ratio,
+            "watch": self.input_args.watch,
+            "watch_settle": self.input_args.watch_settle,
+            "stream": self.input_args.stream,
+            "stream_interval": self.input_args.stream_interval,
+            "stream_min_depth": self.input_args.stream_min_depth,
+            "union_database": self.input_args.union_database,
+            "single_alignment": self.input_args.single_alignment,
         }
 
     def setup_logging(self) -> None:
@@ -250,7 +371,8 @@ class PaciniTyping:
             input_files_list.append(self.option["makedatabase"]["input"])
         # Double check if the config option is really the only option
         elif self.option["config"] and self.option["option"] is None:
-            input_files_list.extend(self.option["config"]["input"])
+            # ? no input files in --watch mode, the samples are found while watching
+            input_files_list.extend(self.option["config"]["input"] or [])
         logging.debug("Input files have been retrieved: %s", input_files_list)
         logging.debug("Adding input files to the args variable...")
         self.option["input_file_list"] = input_files_list
@@ -261,7 +383,22 @@ class PaciniTyping:
         The sample name is the first part of the filename.
         """
         logging.debug("Retrieving the sample name from the input file...")
-        self.sample_name = self.option["input_file_list"][0].split("/")[-1].split(".")[0].replace("_1", "").replace("_pR1", "")
+        self.sample_name = self.get_sample_name(self.option["input_file_list"][0])
+
+    @staticmethod
+    def get_sample_name(input_file: str) -> str:
+        """
+        Static function that derives the sample name from an input file.
+        The sample name is the first part of the filename,
+        without the mate suffix of paired files.
+        ----------
+        Input:
+            - input_file: path to the (first) input file of a sample
+        Output:
+            - str: the sample name
+        ----------
+        """
+        return input_file.split("/")[-1].split(".")[0].replace("_1", "").replace("_pR1", "")
 
     def check_for_unzip_files(self) -> None:
         """
@@ -413,13 +550,34 @@ class PaciniTyping:
             if self.option["config"]["search_mode"] in {"SNPs", "both"}:
                 run_output_snps_override = Path(user_specified_reportdir) / "snps"
 
-        pattern = ReadConfigPattern(
-            self.option["config"]["config_path"],
-            self.file_type,
-            self.option["config"]["search_mode"],
-            run_output_override=run_output_override,
-            run_output_snps_override=run_output_snps_override,
-        )
+        if self.pattern_cache is None:
+            pattern = ReadConfigPattern(
+                self.option["config"]["config_path"],
+                self.file_type,
+                self.option["config"]["search_mode"],
+                run_output_override=run_output_override,
+                run_output_snps_override=run_output_snps_override,
+            )
+        else:
+            # ? daemon mode: the config is read and validated once,
+            # ? the output overrides differ per job and are applied to the copy
+            pattern = self.pattern_cache.get(
+                (
+                    os.path.abspath(self.option["config"]["config_path"]),
+                    self.file_type,
+                    self.option["config"]["search_mode"],
+                ),
+                lambda: ReadConfigPattern(
+                    self.option["config"]["config_path"],
+                    self.file_type,
+                    self.option["config"]["search_mode"],
+                ),
+            )
+            pattern.run_output_override = run_output_override
+            pattern.run_output_snps_override = run_output_snps_override
+            pattern.apply_output_overrides()
+            if "run_output_snps" in pattern.creation_dict:
+                pattern.creation_dict["run_output_snps"] = pattern.get_output_dir()
 
         # Additionally, the query input and output must be set.
         # The output is not specified by the user, because
@@ -444,6 +602,12 @@ class PaciniTyping:
         pattern.creation_dict["input_fasta_file"] = str(config_fasta)
         # Set threads for creation operations (makeblastdb/query)
         pattern.creation_dict["threads"] = self.threads
+        pattern.creation_dict["metrics_store"] = self.option.get("metrics_store")
+        # Let the KMA queries use the databases in shared memory (--kma-shm)
+        pattern.creation_dict["kma_shm"] = self.kma_shm_loaded
+        pattern.creation_dict["pointfinder_subprocess"] = self.option["config"].get("pointfinder_subprocess", False)
+        # Align once against the combined database in search mode both (--single-alignment)
+        pattern.creation_dict["single_alignment"] = self.option["config"].get("single_alignment", False)
         # Store the fasta-output option in the pattern object
         pattern.pattern["fasta_out"] = self.option["config"]["fasta_out"]
 
@@ -563,6 +727,49 @@ class PaciniTyping:
         }
         self.run_makedatabase(database_builder)
 
+    def handle_merge_shards_option(self) -> None:
+        """
+        Function that handles the merge-shards option.
+        The combined reports of the shards are streamed into
+        a single combined report, see batch/sharding.py.
+        """
+        logging.info("Merging the combined reports of %d shards...", len(self.option["merge_shards"]["reports"]))
+        merge_shard_reports(self.option["merge_shards"]["reports"], self.option["merge_shards"]["output"])
+
+    def handle_serve_option(self) -> None:
+        """
+        Function that handles the serve option.
+        The daemon keeps the configurations, tool versions and a pool
+        of workers warm and accepts typing jobs on a Unix socket,
+        see service/daemon.py.
+        """
+        serve(
+            self.option["serve"]["socket"],
+            self.option["serve"]["workers"],
+            self.option["serve"]["job_dir"],
+        )
+
+    def handle_plan_option(self) -> None:
+        """
+        Function that handles the plan option.
+        The runtime of every sample of the batch is predicted with the
+        cost model of the metrics store (see batch/cost_model.py) and
+        printed in the order in which a batch would process them.
+        Nothing is run.
+        """
+        self.option["input_file_list"] = self.option["plan"]["input"]
+        samples = self.order_input_groups(self.get_input_groups(), self.option["plan"]["config_path"], self.option["plan"]["search_mode"])
+        print(f"{'Sample':<30}{'Input (MB)':>12}{'Predicted':>12}")
+        for input_group, input_mb, prediction in samples:
+            predicted = str(timedelta(seconds=round(prediction))) if prediction is not None else "unknown"
+            print(f"{self.get_sample_name(input_group[0]):<30}{input_mb:>12.1f}{predicted:>12}")
+        predictions = [prediction for _, _, prediction in samples]
+        if all(prediction is not None for prediction in predictions):
+            total = str(timedelta(seconds=round(sum(p for p in predictions if p is not None))))
+        else:
+            total = "unknown (no metrics of earlier runs for every sample)"
+        print(f"Total predicted time of {len(samples)} sample(s) with {self.threads} thread(s): {total}")
+
     def handle_config_or_query_option(self) -> None:
         """
         Function that handles the config or query option.
@@ -585,18 +792,154 @@ class PaciniTyping:
         HandleSearchModes is initialized and executed, and
         finally the filtering and parsing of the results is delegated.
         """
+        if len(self.option["config"].get("config_paths") or []) > 1:
+            self.handle_multiple_configs()
+            return
         pattern: ReadConfigPattern = self.initialize_config_pattern()
         handler: HandleSearchModes = HandleSearchModes(pattern, self.option)
         handler.handle()
         self.filter_and_parse_results(pattern)
 
+    def get_config_runs(self) -> dict[str, "PaciniTyping"]:
+        """
+        Function that creates a run per configuration file, for a sample
+        that is typed against multiple configuration files.
+        A run is a copy of this object with its own configuration options,
+        the reports are written to <output_report>/<config id> and the
+        intermediate files to <tmp_dir>/<config id>, so the runs do not
+        overwrite each other. Without --tmp-dir, the intermediate files
+        go to the report directory of the run (see initialize_config_pattern). The input files are already prepared and
+        are shared by all runs. The threads are divided between the
+        runs that run at the same time.
+        ----------
+        Output:
+            - dict with the run per config id
+        ----------
+        """
+        config_ids = get_config_ids(self.option["config"]["config_paths"])
+        concurrent_runs = min(len(config_ids), self.threads)
+        runs: dict[str, PaciniTyping] = {}
+        tmp_dir = Path(self.option["config"]["tmp_dir"])
+        for config_id, config_path in config_ids.items():
+            run = copy.copy(self)
+            run.option = {
+                **self.option,
+                "config": {
+                    **self.option["config"],
+                    "config_path": config_path,
+                    "config_paths": [config_path],
+                    "output_report": Path(self.option["config"]["output_report"]) / config_id,
+                    "tmp_dir": tmp_dir / config_id if tmp_dir != Path(".") else tmp_dir,
+                },
+            }
+            run.threads = divide_threads(self.threads, concurrent_runs)
+            runs[config_id] = run
+        return runs
+
+    def handle_multiple_configs(self) -> None:
+        """
+        Function that types the prepared sample against every
+        configuration file (--config with multiple files or a directory).
+        The configurations run concurrently as far as the threads allow.
+        Every configuration writes its own report in <output_report>/<config id>,
+        and the reports are combined in the normal report of the sample,
+        with an additional Config column. An error of a configuration
+        is raised after all configurations are finished.
+        With --union-database, the gene search runs once for all
+        configurations (see run_union_gene_search).
+        """
+        runs = self.get_config_runs()
+        logging.info("Typing %s against %d configurations: %s", self.sample_name, len(runs), ", ".join(runs))
+        with ThreadPoolExecutor(max_workers=min(len(runs), self.threads), thread_name_prefix="config") as executor:
+            if self.option["config"].get("union_database") and self.option["config"]["search_mode"] in {"genes", "both"}:
+                patterns = self.run_union_gene_search(runs)
+                futures = [submit_in_context(executor, run.handle_union_config_option, patterns[config_id]) for config_id, run in runs.items()]
+            else:
+                futures = [submit_in_context(executor, run.handle_config_option) for run in runs.values()]
+            wait(futures)
+        for future in futures:
+            future.result()
+
+        reports: list[pd.DataFrame] = []
+        for config_id, run in runs.items():
+            report = pd.read_csv(Path(run.option["config"]["output_report"]) / f"{self.sample_name}_report.csv")
+            report.insert(1 if "ID" in report.columns else 0, "Config", config_id)
+            reports.append(report)
+        combined = pd.concat(reports, ignore_index=True)
+        if "ID" in combined.columns:
+            combined["ID"] = range(1, len(combined) + 1)
+        combined_report = Path(self.option["config"]["output_report"]) / f"{self.sample_name}_report.csv"
+        combined.to_csv(combined_report, index=False)
+        logging.info("Wrote %s with the results of %d configurations", combined_report, len(runs))
+
+    def run_union_gene_search(self, runs: dict[str, "PaciniTyping"]) -> dict[str, ReadConfigPattern]:
+        """
+        Function that runs a single gene search for all configurations
+        against the union of their target genes (--union-database) and
+        splits the results into the output files of the configurations,
+        see queries/union_database.py. The union database is created
+        next to the database of the first configuration if it does not exist.
+        ----------
+        Input:
+            - runs: the run per config id
+        Output:
+            - dict with the configuration (pattern) per config id
+        ----------
+        """
+        patterns = {config_id: run.initialize_config_pattern() for config_id, run in runs.items()}
+        first_pattern = next(iter(patterns.values()))
+        union = UnionDatabase(
+            {config_id: pattern.creation_dict["input_fasta_file"] for config_id, pattern in patterns.items()},
+            Path(first_pattern.creation_dict["database_path"]).parent,
+        )
+        union.write()
+        # ? like initialize_config_pattern, without --tmp-dir the report directory is used
+        tmp_dir = Path(self.option["config"]["tmp_dir"])
+        union_output = (tmp_dir if tmp_dir != Path(".") else Path(self.option["config"]["output_report"])) / "union" / self.sample_name
+        union_pattern = copy.copy(first_pattern)
+        union_pattern.creation_dict = {
+            **first_pattern.creation_dict,
+            "database_path": union.database_path,
+            "database_name": union.database_name,
+            "input_fasta_file": union.fasta_file,
+            "output": str(union_output),
+            "threads": self.threads,
+            # ? only the databases of the configurations are loaded in shared memory
+            "kma_shm": False,
+        }
+        logging.info("Searching %s once against the union database %s...", self.sample_name, union.database_name)
+        HandleSearchModes(union_pattern, self.option).handle_gene_search_mode()
+        union.demultiplex(str(union_output), {config_id: pattern.creation_dict["output"] for config_id, pattern in patterns.items()}, self.file_type)
+        # ? the union search is shared, its resource usage is reported for every configuration
+        for usage in sample_metrics.pop_records(str(union_output)):
+            stage = usage.pop("stage")
+            for pattern in patterns.values():
+                sample_metrics.record(pattern.creation_dict["output"], stage, {**usage, "union_database": union.database_name})
+        shutil.rmtree(union_output.parent, ignore_errors=True)
+        return patterns
+
+    def handle_union_config_option(self, pattern: ReadConfigPattern) -> None:
+        """
+        Function that finishes a configuration of which the gene search
+        results are already written by the union search: the SNP search
+        (search mode both, if its gate is met) is run and the results are parsed.
+        ----------
+        Input:
+            - pattern: The configuration file options
+        ----------
+        """
+        if self.option["config"]["search_mode"] == "both":
+            HandleSearchModes(pattern, self.option).handle_gated_snp_search_mode()
+        self.filter_and_parse_results(pattern)
+
     def filter_and_parse_results(self, pattern: ReadConfigPattern) -> None:
         """
         Function that handles the parsing of the genetic variation
         that is found by the query operation.
         The ParsingManager class is called with the right parameters.
-        After parsing, the function makes a decision to save or delete
-        the intermediate files based on the input arguments.
+        After parsing, the resource usage of the searches is written
+        (<sample>_metrics.json) and the function makes a decision to save
+        or delete the intermediate files based on the input arguments.
         ----------
         Input:
             - pattern: The configuration file options
@@ -610,6 +953,11 @@ class PaciniTyping:
             self.option["config"]["search_mode"],
             output_report_dir=self.option["config"]["output_report"],
         )
+        sample_metrics.write_sample_metrics(
+            Path(self.option["config"]["output_report"]) / f"{self.sample_name}_metrics.json",
+            self.sample_name,
+            sample_metrics.pop_records(pattern.creation_dict["output"]),
+        )
         # Determine if the intermediate files should be saved or deleted
         self.save_or_delete_intermediate(pattern)
 
@@ -632,6 +980,7 @@ class PaciniTyping:
             "database_name": self.option["database_name"],
             "output": self.option["query"]["output"],
             "threads": self.threads,
+            "metrics_store": self.option.get("metrics_store"),
         }
         if self.check_valid_gene_database_path(query_builder):
             run_gene_query(query_builder)
@@ -653,6 +1002,23 @@ class PaciniTyping:
         """
         self.parse_all_args()
         self.setup_logging()
+        set_tool_timeouts(self.option.get("tool_timeouts") or {})
+
+        # ? start the daemon and serve typing jobs until interrupted
+        if self.option.get("serve"):
+            self.handle_serve_option()
+            return
+
+        # ? only merge the reports of a sharded batch and exit
+        if self.option.get("merge_shards"):
+            self.handle_merge_shards_option()
+            return
+
+        # ? only print the predicted runtime of a batch and exit
+        if self.option.get("plan"):
+            self.handle_plan_option()
+            return
+
         self.get_input_filenames()
 
         # ? only make database and exit: for the "makedatabase" CLI option
@@ -661,13 +1027,81 @@ class PaciniTyping:
             self.handle_makedatabase_option()
             return
 
-        # ? multiple/glob-samples flow
-        if self.should_execute_multiple_inputs():
-            self.execute_multiple_inputs()
+        with self.sample_process_tree():
+            self.execute_flow()
+        if self.option.get("config"):
+            write_run_metadata(self.option["config"]["output_report"])
+
+    def sample_process_tree(self) -> ProcessTreeSampler | contextlib.nullcontext:
+        """
+        Function that returns the sampler of the process tree
+        (--profile-interval), which writes the timeline of the run
+        to the report directory. Without the option, nothing is sampled.
+        ----------
+        Output:
+            - ProcessTreeSampler or an empty context manager
+        ----------
+        """
+        if not self.option.get("profile_interval"):
+            return contextlib.nullcontext()
+        output_dir = self.option["config"]["output_report"] if self.option.get("config") else Path(".")
+        return ProcessTreeSampler(self.option["profile_interval"], output_dir)
+
+    def execute_flow(self) -> None:
+        """
+        Function that selects the flow for the input samples:
+        watch-folder, streaming, work queue, batch or single sample.
+        """
+        # ? watch-folder flow, types new samples until interrupted
+        if self.option.get("config") and self.option["config"]["watch"]:
+            self.execute_watch()
+            return
+
+        # ? streaming flow, types a growing long-read run until it is finished
+        if self.option.get("config") and self.option["config"]["stream"]:
+            self.execute_stream()
             return
 
-        # ? single-sample flow
-        self.execute()
+        with self.keep_kma_databases_resident():
+            # ? shared work queue flow, for multiple workers on multiple nodes
+            if self.option.get("config") and self.option["config"]["worker"]:
+                self.execute_worker()
+                return
+
+            # ? multiple/glob-samples flow
+            if self.should_execute_multiple_inputs():
+                self.execute_multiple_inputs()
+                return
+
+            # ? single-sample flow
+            self.execute()
+
+    def keep_kma_databases_resident(self) -> KMASharedMemory | contextlib.nullcontext[None]:
+        """
+        Function that returns the context in which the samples are processed.
+        With --kma-shm and FASTQ input, the KMA databases of the config
+        are validated (or created) and loaded into shared memory once,
+        and removed from shared memory when all samples are processed.
+        Otherwise, nothing is done.
+        ----------
+        Output:
+            - KMASharedMemory context manager or an empty context
+        ----------
+        """
+        fastq_exts = (".fq", ".fastq", ".fq.gz", ".fastq.gz")
+        if (
+            not self.option.get("config")
+            or not self.option["config"].get("kma_shm")
+            or not all(file.lower().endswith(fastq_exts) for file in self.option["input_file_list"])
+        ):
+            return contextlib.nullcontext()
+        logging.info("Preparing the KMA databases of the config for shared memory...")
+        self.file_type = "FASTQ"
+        databases: list[str] = []
+        for run in self.get_config_runs().values():
+            databases.extend(HandleSearchModes(run.initialize_config_pattern(), run.option).get_kma_databases())
+        self.kma_shm_loaded = True
+        return KMASharedMemory(databases)
 
     def should_execute_multiple_inputs(self) -> bool:
         """
@@ -680,7 +1114,12 @@ class PaciniTyping:
         reject invalid combinations.
         """
         input_files = self.option.get("input_file_list", [])
-        if not self.option.get("config") or len(input_files) < 2:
+        if not self.option.get("config"):
+            return False
+        # ? a shard is always processed as a batch, even if it is a single sample
+        if self.option["config"].get("shard"):
+            return True
+        if len(input_files) < 2:
             return False
 
         lower_input_files = [file.lower() for file in input_files]
@@ -697,6 +1136,215 @@ class PaciniTyping:
         self.check_for_unzip_files()
         self.validate_file_arguments()
 
+    def get_input_groups(self) -> list[list[str]]:
+        """
+        Function that splits the input files of a batch into samples.
+        FASTQ files are sorted and paired per two files,
+        every FASTA file is a sample on its own.
+        ----------
+        Output:
+            - list with the input files per sample
+        Raises:
+            - InvalidSequencingTypesError: uneven number of FASTQ files
+        ----------
+        """
+        input_files = list(self.option["input_file_list"])
+        fastq_exts = (".fq", ".fastq", ".fq.gz", ".fastq.gz")
+        if input_files and all(file.lower().endswith(fastq_exts) for file in input_files):
+            input_files = sorted(input_files)
+            if len(input_files) % 2 != 0:
+                raise InvalidSequencingTypesError(input_files)
+            return [input_files[i : i + 2] for i in range(0, len(input_files), 2)]
+        return [[input_file] for input_file in input_files]
+
+    def order_input_groups(
+        self,
+        input_groups: list[list[str]],
+        config_path: str,
+        search_mode: str,
+    ) -> list[tuple[list[str], float, float | None]]:
+        """
+        Function that predicts the runtime of the samples of the input
+        with the cost model of the metrics store and orders them
+        longest job first, see batch/cost_model.py.
+        ----------
+        Input:
+            - input_groups: the input files per sample
+            - config_path: path to the configuration file
+            - search_mode: genes, SNPs or both
+        Output:
+            - list with (input files, input MB, predicted seconds) per sample
+        ----------
+        """
+        model = CostModel.from_store(self.option.get("metrics_store") or DEFAULT_METRICS_STORE)
+        database_mb = {stage: get_database_size(database) for stage, database in get_config_databases(config_path).items()}
+        return order_samples(input_groups, model, search_mode, database_mb, self.threads)
+
+    def execute_worker(self) -> None:
+        """
+        Run as a worker that pulls samples from a work queue on a
+        shared filesystem (--worker). Every worker first adds all
+        samples of its input to the queue, which is idempotent, and then
+        processes samples until the queue is empty. Samples that are
+        claimed by other (live) workers are waited for, so samples of
+        workers that died are reclaimed once their lease expires.
+        A worker that is stopped (Ctrl-C, SIGTERM) releases its sample
+        for the other workers, a sample that exits the run (e.g. an
+        input file that is not valid) is marked as failed and the worker
+        continues. A sample of which the lease was reclaimed by another
+        worker is left to that worker.
+        Reports are written to the normal report directory.
+        See batch/work_queue.py for the queue itself.
+        """
+        queue = WorkQueue(self.option["config"]["worker"], lease_seconds=self.option["config"]["worker_lease"])
+        samples = self.order_input_groups(self.get_input_groups(), self.option["config"]["config_path"], self.option["config"]["search_mode"])
+        # ? the longest samples are claimed first, so no worker ends with a long sample
+        for rank, (input_group, _, _) in enumerate(samples):
+            queue.enqueue(self.get_sample_name(input_group[0]), input_group, priority=len(samples) - rank)
+
+        report_dir = Path(self.option["config"]["output_report"])
+        journal = BatchJournal(report_dir / f"worker_{queue.worker_id}_journal.tsv")
+        while pending := queue.pending_jobs():
+            job = queue.claim()
+            if job is None:
+                logging.debug("%d sample(s) claimed by other workers, waiting...", len(pending))
+                time.sleep(min(queue.lease_seconds / 3, 30))
+                continue
+            self.option["config"]["input"] = job["input"]
+            self.option["input_file_list"] = job["input"]
+            try:
+                with LeaseHeartbeat(queue, job["sample"]):
+                    self.execute()
+                report = report_dir / f"{self.sample_name}_report.csv"
+                if queue.complete(job["sample"], report):
+                    journal.record(job["sample"], "done", report)
+            except (Exception, SystemExit) as e:
+                if isinstance(e, SystemExit) and get_termination_signal() is not None:
+                    logging.warning("Worker %s was stopped, releasing %s", queue.worker_id, job["sample"])
+                    queue.release(job["sample"])
+                    raise
+                error = str(e) if isinstance(e, Exception) else f"exited with status {e.code}"
+                logging.error("Sample %s failed in worker %s: %s", job["sample"], queue.worker_id, error)
+                if queue.fail(job["sample"], error):
+                    journal.record(job["sample"], "failed")
+            except KeyboardInterrupt:
+                logging.warning("Worker %s was stopped, releasing %s", queue.worker_id, job["sample"])
+                queue.release(job["sample"])
+                raise
+        logging.info("Work queue %s is empty, worker %s is finished", queue.queue_dir, queue.worker_id)
+
+    def execute_watch(self) -> None:
+        """
+        Watch a staging directory (--watch) and type every new sample
+        through the normal config flow as soon as it is complete.
+        The reports are appended to a rolling combined_report.csv and
+        the processed samples are stored in a state file in the report
+        directory, so a restarted watcher continues where it stopped.
+        A failing sample is recorded and does not stop the watcher, also
+        a sample that exits the run (e.g. an input file that is not valid).
+        A SystemExit of a termination signal (SIGTERM) stops the watcher.
+        See batch/watch_folder.py for the detection of new samples.
+        """
+        report_dir = Path(self.option["config"]["output_report"])
+        watcher = WatchFolder(
+            self.option["config"]["watch"],
+            report_dir / "watch_state.json",
+            settle_seconds=self.option["config"]["watch_settle"],
+        )
+        journal = BatchJournal(report_dir / "watch_journal.tsv")
+        logging.info("Watching %s for new samples, press Ctrl+C to stop...", watcher.directory)
+        try:
+            while True:
+                for input_group in watcher.poll():
+                    self.option["config"]["input"] = input_group
+                    self.option["input_file_list"] = input_group
+                    try:
+                        self.execute()
+                    except (Exception, SystemExit) as e:
+                        if isinstance(e, SystemExit) and get_termination_signal() is not None:
+                            raise
+                        logging.error("Sample %s failed: %s", input_group[0], e if isinstance(e, Exception) else f"exited with status {e.code}")
+                        watcher.mark(input_group, "failed")
+                        journal.record(self.get_sample_name(input_group[0]), "failed")
+                        continue
+                    report = report_dir / f"{self.sample_name}_report.csv"
+                    append_to_combined_report(report, report_dir / "combined_report.csv")
+                    watcher.mark(input_group, "done")
+                    journal.record(self.sample_name, "done", report)
+                time.sleep(POLL_SECONDS)
+        except KeyboardInterrupt:
+            logging.info("Stopped watching %s", watcher.directory)
+
+    def execute_stream(self) -> None:
+        """
+        Type a growing long-read FASTQ file or a directory with FASTQ
+        chunks (--stream) while it is being sequenced.
+        Every interval, the newly arrived reads are searched with KMA
+        (long-read settings) and the evidence per gene is accumulated.
+        The report <sample>_stream_report.csv is rewritten whenever a
+        call changes (e.g. when a gene reaches the minimal depth) and
+        at the end. The run is finished when a sentinel file is present
+        (see batch/stream_typing.py) or when the user stops it.
+        """
+        source = Path(self.option["config"]["stream"])
+        self.sample_name = self.get_sample_name(str(source).rstrip("/"))
+        self.file_type = "FASTQ"
+        pattern = self.initialize_config_pattern()
+        handler = HandleSearchModes(pattern, self.option)
+        handler.validate_or_create_gene_database()
+
+        report_dir = Path(self.option["config"]["output_report"])
+        report_dir.mkdir(parents=True, exist_ok=True)
+        report = report_dir / f"{self.sample_name}_stream_report.csv"
+        increment_dir = Path(pattern.creation_dict["output"] + "_stream")
+        increment_dir.mkdir(parents=True, exist_ok=True)
+        tail = FastqTail(source)
+        evidence = GeneEvidence(
+            [entry["gene"] for entry in pattern.pattern["pattern"]],
+            float(pattern.pattern["global_settings"]["perc_ident"]),
+            float(pattern.pattern["global_settings"]["perc_cov"]),
+            self.option["config"]["stream_min_depth"],
+        )
+        calls = evidence.get_calls()
+        database = pattern.creation_dict["database_path"] + pattern.creation_dict["database_name"]
+        shared_memory = KMASharedMemory([database]) if self.option["config"]["kma_shm"] else contextlib.nullcontext()
+        start = time.time()
+        logging.info("Streaming reads of %s, press Ctrl+C to stop...", source)
+        try:
+            with shared_memory:
+                increment = 0
+                while True:
+                    finished = tail.is_finished()
+                    increment_output = increment_dir / f"increment_{increment}"
+                    reads = tail.write_increment(f"{increment_output}.fastq", final=finished)
+                    if reads:
+                        logging.info("Searching %d new read(s) (%d in total)...", reads, tail.reads)
+                        options = {
+                            **pattern.creation_dict,
+                            "input_file_list": [f"{increment_output}.fastq"],
+                            "output": str(increment_output),
+                            "kma_shm": self.option["config"]["kma_shm"],
+                        }
+                        CommandInvoker(ShellCommand(cmd=KMA.get_long_read_query(options), log_prefix=f"{increment_output}.kma")).execute()
+                        evidence.add_results(f"{increment_output}.res")
+                        if (new_calls := evidence.get_calls()) != calls:
+                            for gene, call in new_calls.items():
+                                if calls.get(gene) != call:
+                                    logging.info("Call of %s changed to %s after %.0f seconds", gene, call, time.time() - start)
+                            evidence.write_report(report, tail.reads, time.time() - start)
+                            calls = new_calls
+                        increment += 1
+                    if finished:
+                        break
+                    time.sleep(self.option["config"]["stream_interval"])
+        except KeyboardInterrupt:
+            logging.info("Stopped streaming %s", source)
+        finally:
+            if not self.input_args.save_intermediates:
+                shutil.rmtree(increment_dir, ignore_errors=True)
+        evidence.write_report(report, tail.reads, time.time() - start)
+        logging.info("Wrote %s with the evidence of %d read(s)", report, tail.reads)
+
     def execute_multiple_inputs(self) -> None:
         """
         Process multiple input files and write results to `combined.csv`.
@@ -706,28 +1354,71 @@ class PaciniTyping:
         collects the per-sample report filenames. At the end it concatenates
         any found reports into `combined_report.csv` (hardcoded name) into
         the `output_report` directory.
+
+        If --shard i/n is given, only the samples assigned to shard i are
+        processed and the combined report is named after the shard.
+        Every processed sample is recorded in a journal next to the report.
+
+        The samples are processed longest job first, as predicted by the
+        cost model (see batch/cost_model.py), and the progress and ETA are
+        logged after every sample. The combined report keeps the input order.
+
+        Samples with the same input files as an earlier sample are typed
+        once, their report is a copy with their own name (see batch/dedup.py).
+
+        A sample of which a tool exceeds its timeout (--timeout) is marked
+        as failed in the journal and left out of the combined report,
+        the batch continues with the next sample.
         """
         results_files: list[str | Path] = []
         report_dir = str(self.option["config"]["output_report"])
-        combined_report_file = Path(report_dir) / "combined_report.csv"
-        input_files = list(self.option["input_file_list"])
-
-        fastq_exts = (".fq", ".fastq", ".fq.gz", ".fastq.gz")
-        input_groups: list[list[str]]
-        if input_files and all(file.lower().endswith(fastq_exts) for file in input_files):
-            input_files = sorted(input_files)
-            if len(input_files) % 2 != 0:
-                raise InvalidSequencingTypesError(input_files)
-            input_groups = [input_files[i : i + 2] for i in range(0, len(input_files), 2)]
-        else:
-            input_groups = [[input_file] for input_file in input_files]
-
-        for input_group in input_groups:
+        shard: tuple[int, int] | None = self.option["config"].get("shard")
+        report_stem = get_shard_report_stem(shard)
+        combined_report_file = Path(report_dir) / f"{report_stem}.csv"
+        journal = BatchJournal(Path(report_dir) / f"{report_stem}_journal.tsv")
+        input_groups = self.get_input_groups()
+
+        if shard:
+            input_groups = [group for group in input_groups if assign_shard(self.get_sample_name(group[0]), shard[1]) == shard[0]]
+            logging.info("Shard %d/%d contains %d sample(s)", shard[0], shard[1], len(input_groups))
+            if not input_groups:
+                logging.warning("No samples were assigned to shard %d/%d, no combined report is written", *shard)
+                return
+
+        sample_names = [self.get_sample_name(group[0]) for group in input_groups]
+        duplicates = find_duplicate_inputs(input_groups, sample_names)
+        unique_groups = [group for index, group in enumerate(input_groups) if index not in duplicates]
+        samples = self.order_input_groups(unique_groups, self.option["config"]["config_path"], self.option["config"]["search_mode"])
+        progress = BatchProgress([input_mb for _, input_mb, _ in samples], [prediction for _, _, prediction in samples])
+        reports: dict[int, Path] = {}
+        failed: set[int] = set()
+        for input_group, _, _ in samples:
             # set per-sample inputs
             self.option["config"]["input"] = input_group
             self.option["input_file_list"] = input_group
-            self.execute()
-            results_files.append(Path(report_dir) / f"{self.sample_name}_report.csv")
+            index = input_groups.index(input_group)
+            start = time.time()
+            try:
+                self.execute()
+            except CommandTimeoutError as e:
+                logging.error("Sample %s failed, %s", sample_names[index], e.message)
+                journal.record(sample_names[index], f"failed: {e.message}")
+                failed.add(index)
+            progress.finish_sample(time.time() - start)
+            if index not in failed:
+                reports[index] = Path(report_dir) / f"{self.sample_name}_report.csv"
+                journal.record(self.sample_name, "done", reports[index])
+            logging.info(progress.get_progress_line())
+        for index, typed_index in duplicates.items():
+            if typed_index in failed:
+                journal.record(sample_names[index], f"failed: duplicate of {sample_names[typed_index]}")
+                continue
+            reports[index] = Path(report_dir) / f"{sample_names[index]}_report.csv"
+            write_duplicate_report(reports[typed_index], sample_names[index], reports[index])
+            journal.record(sample_names[index], f"duplicate of {sample_names[typed_index]}", reports[index])
+        results_files.extend(reports[index] for index in sorted(reports))
+        if failed:
+            logging.warning("%d sample(s) failed, see %s", len(failed), journal.journal_file)
 
         # ? Combine per-sample reports into combined.csv (if any; built on the above hacky assumption)
         dfs: list[pd.DataFrame] = []
@@ -750,6 +1441,29 @@ class PaciniTyping:
         self.handle_config_or_query_option()
 
 
+def _exit_on_sigterm(signum: int, frame: Any) -> None:
+    """
+    Signal handler that converts SIGTERM into a SystemExit.
+    The signal is recorded first, so this SystemExit is not
+    mistaken for the exit of a tool (see set_termination_signal).
+    The commands of all threads are stopped, since the SystemExit
+    only reaches the main thread.
+    """
+    set_termination_signal(signum)
+    stop_process_groups()
+    raise SystemExit(128 + signum)
+
+
+def _stop_on_interrupt(signum: int, frame: Any) -> None:
+    """
+    Signal handler for Ctrl-C (SIGINT), which stops the commands of
+    all threads (they run in their own session and do not get the
+    SIGINT of the terminal) and raises the KeyboardInterrupt.
+    """
+    stop_process_groups()
+    signal.default_int_handler(signum, frame)
+
+
 def main(provided_args: list[str] | None = None) -> None:
     """
     Main entry point for the Pacini-Typing application
@@ -768,7 +1482,24 @@ def main(provided_args: list[str] | None = None) -> None:
         args = preprocessing.argsparse.build_parser.main(sys.argv[1:])
 
     pacini_typing = PaciniTyping(args)
-    pacini_typing.split_flow_and_execute()
+    # ? SIGTERM (e.g. of a job scheduler) becomes a SystemExit, so the
+    #   process groups of the running tools are stopped as well,
+    #   Ctrl-C also stops the tools of the other threads
+    previous_sigterm_handler = None
+    previous_sigint_handler = None
+    if threading.current_thread() is threading.main_thread():
+        set_termination_signal(None)
+        reset_process_groups()
+        previous_sigterm_handler = signal.signal(signal.SIGTERM, _exit_on_sigterm)
+        if signal.getsignal(signal.SIGINT) is signal.default_int_handler:
+            previous_sigint_handler = signal.signal(signal.SIGINT, _stop_on_interrupt)
+    try:
+        pacini_typing.split_flow_and_execute()
+    finally:
+        if previous_sigterm_handler is not None:
+            signal.signal(signal.SIGTERM, previous_sigterm_handler)
+        if previous_sigint_handler is not None:
+            signal.signal(signal.SIGINT, previous_sigint_handler)
     logging.info("Pacini-typing pipeline has finished successfully!")
 
 
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Module with a native caller of the SNPs of the configuration.
+PointFinder aligns the input again to look up a few codons
+(SNP, ref, alt and pos in the pattern of the configuration).
+If the alignments of the SNP genes are already available, e.g. from
+the single alignment of search mode both (--single-alignment),
+the codons can be read directly from these alignments:
+    - KMA: the template and query lines of the .aln file
+    - BLASTn: the sseq (gene) and qseq (input) columns of the .tsv file,
+        a hit on the reverse strand is reverse complemented first
+
+Every alignment column is mapped to the position in the gene,
+the codon at the configured position is translated with the
+CodonTable and called if the amino acid is one of the alternatives.
+The calls are written in the format of PointFinder's results file,
+so the SNPParser reports them in the same way.
+
+Only substitutions are called: a codon with a deletion or an
+insertion, or that is not covered by an alignment, is not called.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["RESULT_COLUMNS", "CodonCaller", "get_results_filename"]
+
+import csv
+import logging
+import os
+from typing import Any
+
+import pandas as pd
+
+from codon_table_enum import CodonTable
+from parsing.fasta_parser import BLAST_ALIGNMENT_COLUMNS, BLAST_COLUMNS
+
+# ? columns of PointFinder's results file that are read by the SNPParser
+RESULT_COLUMNS = ["Mutation", "Nucleotide change", "Amino acid change", "Resistance", "PMID"]
+COMPLEMENT = str.maketrans("ACGTNacgtn", "TGCANtgcan")
+
+
+def get_results_filename(sample_name: str, file_type: str) -> str:
+    """
+    Function that returns the name of the results file of the
+    SNP search, named like PointFinder names it:
+    <sample prefix>_<method>_results.tsv
+    ----------
+    Input:
+        - sample_name: the name of the sample
+        - file_type: FASTA (blastn) or FASTQ (kma)
+    Output:
+        - str: the file name
+    ----------
+    """
+    sample_prefix = sample_name.split(".")[0].split("_")[0]
+    method_name = "kma" if file_type == "FASTQ" else "blastn"
+    return f"{sample_prefix}_{method_name}_results.tsv"
+
+
+def reverse_complement(sequence: str) -> str:
+    """
+    Little helper that returns the reverse complement of
+    an aligned sequence, gaps are kept.
+    """
+    return sequence.translate(COMPLEMENT)[::-1]
+
+
+def translate(codon: str) -> str | None:
+    """
+    Little helper that translates a codon,
+    None for a codon with an ambiguous base.
+    """
+    try:
+        return CodonTable.get_amino_acid(codon.upper())
+    except KeyError:
+        return None
+
+
+class CodonCaller:
+    """
+    Class that calls the configured SNPs from the alignments
+    of the SNP genes and writes them in PointFinder's format.
+    ----------
+    Methods:
+        - __init__: Constructor of the class
+        - read_kma_alignments: Reads the alignments of a KMA .aln file
+        - read_blast_alignments: Reads the alignments of a BLASTn .tsv file
+        - get_codons: Returns the reference and query codon at a position
+        - call: Calls the configured SNPs
+        - write_results: Writes the calls to a results file
+    ----------
+    """
+
+    def __init__(self, snp_list: list[dict[str, Any]], file_type: str) -> None:
+        """
+        Constructor of the CodonCaller class.
+        ----------
+        Input:
+            - snp_list: the SNPs of the configuration (SNP, ref, alt, pos)
+            - file_type: FASTA (BLASTn alignments) or FASTQ (KMA alignments)
+        ----------
+        """
+        self.snp_list = snp_list
+        self.file_type = file_type
+
+    @staticmethod
+    def read_kma_alignments(aln_file: str) -> dict[str, list[tuple[int, str, str]]]:
+        """
+        Function that reads the alignments of a KMA .aln file.
+        KMA aligns the whole template, in blocks of template,
+        match and query lines per template.
+        ----------
+        Input:
+            - aln_file: path to the .aln file
+        Output:
+            - dict with (start in the gene, gene row, query row) per gene
+        ----------
+        """
+        rows: dict[str, tuple[list[str], list[str]]] = {}
+        current: tuple[list[str], list[str]] | None = None
+        with open(aln_file, "r", encoding="utf-8") as handle:
+            for line in handle:
+                if line.startswith("#"):
+                    current = rows.setdefault(line[1:].split()[0], ([], []))
+                elif current is not None and line.startswith("template:"):
+                    current[0].append(line.split()[1])
+                elif current is not None and line.startswith("query:"):
+                    current[1].append(line.split()[1])
+        return {gene: [(1, "".join(template), "".join(query))] for gene, (template, query) in rows.items()}
+
+    @staticmethod
+    def read_blast_alignments(tsv_file: str) -> dict[str, list[tuple[int, str, str]]]:
+        """
+        Function that reads the alignments of a BLASTn .tsv file,
+        in the order of BLASTn (best hits first).
+        ----------
+        Input:
+            - tsv_file: path to the .tsv file
+        Output:
+            - dict with (start in the gene, gene row, query row) per gene
+        ----------
+        """
+        try:
+            data_frame = pd.read_csv(tsv_file, sep="\t", header=None, names=[*BLAST_COLUMNS, *BLAST_ALIGNMENT_COLUMNS], dtype=str)
+        except pd.errors.EmptyDataError:
+            return {}
+        alignments: dict[str, list[tuple[int, str, str]]] = {}
+        for _, row in data_frame.iterrows():
+            start, end = int(row["sstart"]), int(row["send"])
+            gene_row, query_row = row["sseq"], row["qseq"]
+            if start > end:
+                # ? hit on the reverse strand of the gene, both rows are on the strand of the input
+                start, gene_row, query_row = end, reverse_complement(gene_row), reverse_complement(query_row)
+            alignments.setdefault(row["sseqid"], []).append((start, gene_row, query_row))
+        return alignments
+
+    @staticmethod
+    def get_codons(start: int, gene_row: str, query_row: str, codon_position: int) -> tuple[str, str] | None:
+        """
+        Function that returns the codon of the gene and of the query at
+        a codon position, by counting the gene positions of the columns.
+        ----------
+        Input:
+            - start: position in the gene of the first column
+            - gene_row: aligned gene (template) sequence
+            - query_row: aligned query sequence
+            - codon_position: the codon position (1-based)
+        Output:
+            - tuple with the gene and query codon, or None if the codon
+                is not covered or contains an insertion or deletion
+        ----------
+        """
+        first = 3 * (codon_position - 1) + 1
+        if first < start:
+            return None
+        position = start - 1
+        gene_codon: list[str] = []
+        query_codon: list[str] = []
+        for gene_base, query_base in zip(gene_row, query_row):
+            if gene_base == "-":
+                if first <= position < first + 2:
+                    return None  # ? insertion in the codon
+                continue
+            position += 1
+            if position < first:
+                continue
+            if query_base == "-":
+                return None  # ? deletion in the codon, or not covered by the reads
+            gene_codon.append(gene_base.upper())
+            query_codon.append(query_base.upper())
+            if position == first + 2:
+                return "".join(gene_codon), "".join(query_codon)
+        return None
+
+    def call(self, alignments: dict[str, list[tuple[int, str, str]]]) -> list[dict[str, str]]:
+        """
+        Function that calls the configured SNPs. The first alignment
+        that covers the codon is used. A SNP is called if the amino acid
+        of the query differs from the reference and is one of the
+        alternatives (alt, comma-separated).
+        ----------
+        Input:
+            - alignments: (start, gene row, query row) per gene
+        Output:
+            - list with a row of the results file per call
+        ----------
+        """
+        calls: list[dict[str, str]] = []
+        for snp in self.snp_list:
+            gene, position = str(snp["SNP"]), int(snp["pos"])
+            alternatives = {alt.strip().upper() for alt in str(snp["alt"]).split(",")}
+            codons = next(
+                (codons for alignment in alignments.get(gene, []) if (codons := self.get_codons(*alignment, position)) is not None),
+                None,
+            )
+            if codons is None:
+                logging.debug("Codon %d of %s is not covered by a gapless alignment, not called", position, gene)
+                continue
+            reference_codon, query_codon = codons
+            if reference_codon != str(snp["ref"]).upper():
+                logging.warning("Codon %d of %s is %s in the database, but %s in the configuration", position, gene, reference_codon, snp["ref"])
+            reference_acid, query_acid = translate(reference_codon), translate(query_codon)
+            if query_acid is None or query_acid == reference_acid or query_acid not in alternatives:
+                continue
+            calls.append(
+                {
+                    "Mutation": f"{gene} p.{reference_acid}{position}{query_acid}",
+                    "Nucleotide change": f"{reference_codon} -> {query_codon}",
+                    "Amino acid change": f"{reference_acid} -> {query_acid}",
+                    "Resistance": "Custom",
+                    "PMID": "-",
+                }
+            )
+        return calls
+
+    def write_results(self, alignment_output: str, results_file: str) -> int:
+        """
+        Function that reads the alignments of the SNP genes, calls
+        the SNPs and writes them to the results file. Without
+        alignments (no hits), only the header is written.
+        ----------
+        Input:
+            - alignment_output: output prefix of the alignments (.aln or .tsv)
+            - results_file: path of the results file
+        Output:
+            - int: the number of calls
+        ----------
+        """
+        if self.file_type == "FASTQ":
+            alignment_file = alignment_output + ".aln"
+            read_alignments = self.read_kma_alignments
+        else:
+            alignment_file = alignment_output + ".tsv"
+            read_alignments = self.read_blast_alignments
+        alignments = read_alignments(alignment_file) if os.path.exists(alignment_file) else {}
+        calls = self.call(alignments)
+        os.makedirs(os.path.dirname(results_file) or ".", exist_ok=True)
+        with open(results_file, "w", encoding="utf-8", newline="") as handle:
+            writer = csv.DictWriter(handle, fieldnames=RESULT_COLUMNS, delimiter="\t")
+            writer.writeheader()
+            writer.writerows(calls)
+        logging.info("Called %d of %d configured SNPs from the alignments of %d genes", len(calls), len(self.snp_list), len(alignments))
+        return len(calls)
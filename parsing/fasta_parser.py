@@ -42,6 +42,10 @@ BLAST_COLUMNS = {
     "slen": "subject length",
     "gaps": "number of gaps",
 }
+# ? only in the output of the searches of the native codon caller (see BLASTn.get_query)
+BLAST_ALIGNMENT_COLUMNS = {
+    "sseq": "alignment sequence in hit",
+}
 
 
 class FASTAParser(ParserStrategy):
@@ -76,7 +80,8 @@ class FASTAParser(ParserStrategy):
         ----------
         """
         logging.debug("Reading BLAST output file: %s...", filename)
-        data_frame = pd.read_csv(filename + ".tsv", sep="\t", header=None)
+        # ? the alignment columns of a combined search (--single-alignment) are not part of the report
+        data_frame = pd.read_csv(filename + ".tsv", sep="\t", header=None, usecols=range(len(BLAST_COLUMNS)))
         data_frame.columns = list(BLAST_COLUMNS.keys())
         data_frame["pident"] = data_frame["pident"].astype(float)
         data_frame["coverage_pct"] = 100 * (data_frame["length"] - data_frame["gaps"]) / data_frame["slen"]
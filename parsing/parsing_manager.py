@@ -26,12 +26,14 @@ from typing import Any
 
 import pandas as pd
 
+from parsing.codon_caller import get_results_filename
 from parsing.coverage_filter import CoverageFilter
 from parsing.fasta_parser import FASTAParser
 from parsing.fastq_parser import FASTQParser
 from parsing.identity_filter import PercentageIdentityFilter
 from parsing.parser import Parser
 from parsing.read_config_pattern import ReadConfigPattern
+from parsing.snp_gate import SNP_GATE_SKIPPED
 from parsing.snp_parser import SNPParser
 from preprocessing.exceptions.parsing_exceptions import HandlingError
 
@@ -80,6 +82,7 @@ class ParsingManager:
             SNPs or both
         - _run_snps: Function that handles the parsing process for SNPs
         - _run_both: Function that handles the parsing process for both genes and SNPs
+        - create_snp_skipped_frame: Function that creates the row of a skipped SNP search
         - get_config_gene_names: Function that retrieves the gene names
         - get_config_identity: Function that retrieves the identity
         - get_config_coverage: Function that retrieves the coverage
@@ -201,16 +204,16 @@ class ParsingManager:
             + "_" + method
             + "_"
             + output_files[i]
-        The above code is sort of reproduced in this function.
+        The above code is sort of reproduced in get_results_filename,
+        which is also used by the native codon caller.
         ----------
         Output:
             - str: path to the PointFinder output file
         ----------
         """
-        sample_prefix = self.sample_name.split(".")[0].split("_")[0]
         method_name = self._get_correct_method_name()
         output_dir = self.pattern.creation_dict["run_output_snps"]
-        filename = f"{sample_prefix}_{method_name}_results.tsv"
+        filename = get_results_filename(self.sample_name, self.file_type)
         expected_path = os.path.join(output_dir, filename)
         if os.path.isfile(expected_path):
             return expected_path
@@ -343,6 +346,26 @@ class ParsingManager:
         empty_row["ID"] = 1
         return pd.DataFrame([empty_row], columns=columns)
 
+    def create_snp_skipped_frame(self) -> pd.DataFrame:
+        """
+        Create the report row of a SNP search that was skipped,
+        because the run_snps_if gate of the configuration was not met.
+        The row makes the skip visible downstream, other values are NA.
+        """
+        columns = self.get_expected_report_columns()
+        skipped_row: dict[str, Any] = {column: pd.NA for column in columns}
+        skipped_row.update(
+            {
+                "ID": 1,
+                "Input": self.sample_name,
+                "Configuration": self.pattern.pattern["metadata"]["filename"],
+                "Type/Genes": self.pattern.pattern["metadata"]["type"],
+                "Mode": "SNP",
+                "Hits": SNP_GATE_SKIPPED,
+            }
+        )
+        return pd.DataFrame([skipped_row], columns=columns)
+
     def _run_both(self) -> None:
         """
         Main function that handles the parsing of both genes and SNPs.
@@ -354,12 +377,14 @@ class ParsingManager:
         logging.debug("Running both gene and SNP parsers...")
         gene_parser = self._prepare_gene_parser()
         gene_parser.parse()
-        snp_parser = self._create_snp_parser()
-        snp_parser.parse()
-        # Define the reports and check their content
-        # Check if parsers generated any data
         gene_report = pd.DataFrame() if gene_parser.data_frame.empty else gene_parser.output_report
-        snp_report = pd.DataFrame() if snp_parser.data_frame.empty else snp_parser.output_report
+        if self.pattern.creation_dict.get("snp_search_skipped"):
+            # ? the SNP search did not run (run_snps_if), there is no PointFinder output
+            snp_report = self.create_snp_skipped_frame()
+        else:
+            snp_parser = self._create_snp_parser()
+            snp_parser.parse()
+            snp_report = pd.DataFrame() if snp_parser.data_frame.empty else snp_parser.output_report
 
         logging.debug("Gene report has %d entries", len(gene_report))
         logging.debug("SNP report has %d entries", len(snp_report))
@@ -15,15 +15,17 @@ certain keys that are required for the analysis.
 The ReadConfigPattern class reads the configuration file,
 validates the keys, and constructs a dictionary with
 parameters required for the database creation and the query operation.
+
+The get_config_files and get_config_ids functions support running
+a sample against multiple configuration files in one run.
 """
 
 __author__ = "Mark van de Streek"
 __date__ = "2024-11-08"
-__all__ = ["ReadConfigPattern"]
+__all__ = ["ReadConfigPattern", "get_config_files", "get_config_ids"]
 
 import logging
 import os
-import shutil
 from pathlib import Path
 from typing import Any
 
@@ -31,6 +33,7 @@ import yaml
 
 from preprocessing.exceptions.parsing_exceptions import YAMLLoadingError, YAMLStructureError
 from preprocessing.exceptions.snp_detection_exceptions import IncorrectSNPConfiguration, PathError, PointFinderScriptError
+from queries.tool_registry import resolve_tool
 
 REQUIRED_KEYS = ["metadata", "database", "global_settings", "pattern"]
 REQUIRED_GLOBAL_SETTINGS_KEYS = [
@@ -38,6 +41,57 @@ REQUIRED_GLOBAL_SETTINGS_KEYS = [
     "perc_cov",
 ]
 
+CONFIG_EXTENSIONS = (".yaml", ".yml")
+# ? modes of the optional run_snps_if gate: all or at least one of the genes must be found
+SNP_GATE_MODES = ("all", "any")
+# ? engines of the optional snp_engine field, the first is the default
+SNP_ENGINES = ("pointfinder", "native")
+
+
+def get_config_files(configs: list[str]) -> list[str]:
+    """
+    Function that expands the --config arguments into configuration files.
+    A directory is replaced by the YAML files inside it (sorted),
+    files are kept as they are and are validated later on.
+    ----------
+    Input:
+        - configs: the configuration files and/or directories
+    Output:
+        - list with configuration files
+    ----------
+    """
+    config_files: list[str] = []
+    for config in configs:
+        if os.path.isdir(config):
+            config_files.extend(str(file) for file in sorted(Path(config).iterdir()) if file.suffix.lower() in CONFIG_EXTENSIONS)
+        else:
+            config_files.append(config)
+    return config_files
+
+
+def get_config_ids(config_files: list[str]) -> dict[str, str]:
+    """
+    Function that returns a unique id per configuration file, based on
+    the file name (e.g. O1 for config/O1.yaml). The id is used to separate
+    the reports and intermediate files of the configurations.
+    Equal file names in different directories get a number.
+    ----------
+    Input:
+        - config_files: the configuration files
+    Output:
+        - dict with the configuration file per id
+    ----------
+    """
+    config_ids: dict[str, str] = {}
+    for config_file in config_files:
+        config_id = base_id = Path(config_file).stem
+        number = 1
+        while config_id in config_ids:
+            number += 1
+            config_id = f"{base_id}_{number}"
+        config_ids[config_id] = config_file
+    return config_ids
+
 
 class ReadConfigPattern:
     """
@@ -231,9 +285,14 @@ class ReadConfigPattern:
         self.creation_dict["method"] = "blastn" if self.input_file_type == "FASTA" else "kma"
         self.creation_dict["method_path"] = self.get_method_path()
         self.creation_dict["run_output_snps"] = self.get_output_dir()
-        self.creation_dict["pointfinder_script_path"] = self.get_pointfinder_script_path()
+        self.creation_dict["snp_engine"] = self.get_snp_engine()
+        # ? the native engine does not run PointFinder, so the script is optional
+        self.creation_dict["pointfinder_script_path"] = (
+            self.get_pointfinder_script_path() if self.creation_dict["snp_engine"] == "pointfinder" else self.pattern["metadata"].get("pointfinder_script_path")
+        )
         self.creation_dict["SNP_list"] = self.get_snp_list()
         self.creation_dict["target_snps_file"] = self.get_target_snps_file()
+        self.creation_dict["run_snps_if"] = self.get_snp_gate()
 
     def get_method_path(self) -> str:
         """
@@ -245,7 +304,7 @@ class ReadConfigPattern:
             - str: Path to the executable
         ----------
         """
-        path: str | None = shutil.which("blastn" if self.input_file_type == "FASTA" else "kma")
+        path: str | None = resolve_tool("blastn" if self.input_file_type == "FASTA" else "kma")
         if path:
             return path
         raise PathError
@@ -467,3 +526,51 @@ class ReadConfigPattern:
             logging.error("PointFinder genes file not found in configuration file %s", self.config_file)
             raise IncorrectSNPConfiguration(self.config_file) from e
         return self.validate_target_snps_file(target_snps_file)
+
+    def get_snp_gate(self) -> dict[str, Any] | None:
+        """
+        Function that returns the optional run_snps_if rule of the
+        configuration, which makes the SNP search (search mode both)
+        depend on the gene search results, for example:
+            run_snps_if:
+              genes: ["ctxA", "ctxB"]
+              mode: all
+        The mode is 'all' (default) or 'any' of the genes.
+        ----------
+        Output:
+            - dict with the genes and the mode, or None if there is no rule
+        Raises:
+            - YAMLStructureError: If the rule is not valid
+        ----------
+        """
+        gate = self.pattern.get("run_snps_if")
+        if gate is None:
+            return None
+        genes = gate.get("genes") if isinstance(gate, dict) else None
+        mode = str(gate.get("mode", "all")).lower() if isinstance(gate, dict) else None
+        if not genes or not isinstance(genes, list) or mode not in SNP_GATE_MODES:
+            logging.error("run_snps_if requires a list of genes and mode %s, exiting...", " or ".join(SNP_GATE_MODES))
+            raise YAMLStructureError(self.config_file)
+        return {"genes": [str(gene) for gene in genes], "mode": mode}
+
+    def get_snp_engine(self) -> str:
+        """
+        Function that returns the optional snp_engine of the
+        configuration, which selects how the SNPs are called:
+            - pointfinder (default): PointFinder aligns the input
+                against the SNP genes and calls the SNPs
+            - native: the input is aligned against the SNP genes with
+                BLASTn (FASTA) or KMA (FASTQ) and the configured codons
+                are called in-process (see parsing/codon_caller.py)
+        ----------
+        Output:
+            - str: the SNP engine
+        Raises:
+            - YAMLStructureError: If the engine is not valid
+        ----------
+        """
+        engine = str(self.pattern.get("snp_engine", SNP_ENGINES[0])).lower()
+        if engine not in SNP_ENGINES:
+            logging.error("snp_engine must be %s, exiting...", " or ".join(SNP_ENGINES))
+            raise YAMLStructureError(self.config_file)
+        return engine
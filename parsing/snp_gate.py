@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Module with the gate of the SNP search (run_snps_if in the configuration).
+In search mode both, the SNP search (PointFinder) is the slowest part,
+while the SNPs are often only relevant when the species or serogroup
+genes are present. With a gate, the gene search runs first, its
+results are filtered with the identity and coverage thresholds of the
+configuration and the SNP search only runs if the gate genes are found.
+A skipped SNP search is marked with a row in the report.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["SNP_GATE_SKIPPED", "SNPGate"]
+
+import logging
+from typing import Any
+
+from parsing.coverage_filter import CoverageFilter
+from parsing.fasta_parser import FASTAParser
+from parsing.fastq_parser import FASTQParser
+from parsing.identity_filter import PercentageIdentityFilter
+from parsing.parser import Parser
+
+# ? value of the Hits column of the report row of a skipped SNP search
+SNP_GATE_SKIPPED = "SNP search skipped (gate not met)"
+
+
+class SNPGate:
+    """
+    Class that evaluates the run_snps_if rule of a
+    configuration against the results of the gene search.
+    ----------
+    Methods:
+        - __init__: Constructor of the class
+        - get_found_genes: Returns the genes that pass the filters
+        - is_met: Checks if the rule is met
+    ----------
+    """
+
+    def __init__(self, config_options: dict[str, Any], creation_dict: dict[str, Any]) -> None:
+        """
+        Constructor of the SNPGate class.
+        ----------
+        Input:
+            - config_options: the options of the configuration file
+            - creation_dict: the creation_dict of the configuration,
+                with the rule (run_snps_if) and the gene search output
+        ----------
+        """
+        self.config_options = config_options
+        self.creation_dict = creation_dict
+        self.gate: dict[str, Any] = creation_dict["run_snps_if"]
+
+    def get_found_genes(self) -> set[str]:
+        """
+        Function that parses the results of the gene search with
+        the identity and coverage filters of the configuration,
+        in the same way as the gene report.
+        ----------
+        Output:
+            - set with the names of the found genes
+        ----------
+        """
+        file_type: str = self.creation_dict["file_type"]
+        parser = Parser(
+            {**self.config_options, "fasta_out": False},
+            FASTAParser() if file_type == "FASTA" else FASTQParser(),
+            self.creation_dict["output"],
+            file_type=file_type,
+        )
+        parser.add_filter(PercentageIdentityFilter(float(self.config_options["global_settings"]["perc_ident"]), file_type))
+        parser.add_filter(CoverageFilter(float(self.config_options["global_settings"]["perc_cov"]), file_type))
+        parser.parse()
+        if parser.output_report.empty:
+            return set()
+        return set(parser.output_report["Hits"])
+
+    def is_met(self) -> bool:
+        """
+        Function that checks if all (mode all) or
+        at least one (mode any) of the gate genes are found.
+        ----------
+        Output:
+            - True if the SNP search should run
+        ----------
+        """
+        found_genes = self.get_found_genes()
+        matches = [gene in found_genes for gene in self.gate["genes"]]
+        met = all(matches) if self.gate["mode"] == "all" else any(matches)
+        logging.info(
+            "SNP gate (%s of %s) is %s, found genes: %s",
+            self.gate["mode"],
+            ", ".join(self.gate["genes"]),
+            "met" if met else "not met",
+            ", ".join(sorted(found_genes)) or "none",
+        )
+        return met
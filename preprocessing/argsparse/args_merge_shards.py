@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+This module is responsible for building the merge-shards subcommand for the parser.
+The subcommand is used to combine the reports of a sharded batch run
+(--shard i/n) into a single combined report.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["build_merge_shards_command"]
+
+
+from argparse import _SubParsersAction
+from pathlib import Path
+
+
+def build_merge_shards_command(subparsers: _SubParsersAction) -> None:
+    """
+    Function that builds the merge-shards subcommand for the parser.
+    This function is called from the build_parser script
+    ----------
+    Input:
+        - subparsers: subparsers object that is used to add the subcommand
+    ----------
+    """
+    merge_shards = subparsers.add_parser(
+        "merge-shards",
+        help="Merge the combined reports of a sharded batch run",
+    )
+    merge_shards.add_argument(
+        "-r",
+        "--reports",
+        type=str,
+        nargs="+",
+        required=True,
+        metavar="File",
+        help="Combined reports of the shards to merge",
+    )
+    merge_shards.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        required=True,
+        metavar="File",
+        help="Path of the merged combined report",
+    )
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+This module is responsible for building the plan subcommand for the parser.
+The subcommand prints the predicted runtime of a batch of samples,
+based on the metrics of earlier runs, without running it.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["build_plan_command"]
+
+
+from argparse import _SubParsersAction
+
+
+def build_plan_command(subparsers: _SubParsersAction) -> None:
+    """
+    Function that builds the plan subcommand for the parser.
+    This function is called from the build_parser script
+    ----------
+    Input:
+        - subparsers: subparsers object that is used to add the subcommand
+    ----------
+    """
+    plan = subparsers.add_parser(
+        "plan",
+        help="Print the predicted runtime of a batch without running it",
+    )
+    plan.add_argument(
+        "-c",
+        "--config",
+        dest="plan_config",
+        type=str,
+        required=True,
+        metavar="File",
+        help="Path to predefined configuration file",
+    )
+    plan.add_argument(
+        "-i",
+        "--input",
+        dest="plan_input",
+        type=str,
+        nargs="+",
+        required=True,
+        metavar="File",
+        help="Input files of the batch",
+    )
+    plan.add_argument(
+        "-m",
+        "--search_mode",
+        dest="plan_search_mode",
+        type=str,
+        choices=["SNPs", "genes", "both"],
+        default="genes",
+        help="Search mode to use. SNPs, genes or both (default: genes)",
+    )
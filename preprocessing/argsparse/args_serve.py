@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+This module is responsible for building the serve subcommand for the parser.
+The subcommand starts Pacini-typing as a daemon that accepts typing jobs
+on a local Unix socket (see service/daemon.py and service/client.py).
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["build_serve_command"]
+
+
+import tempfile
+from argparse import _SubParsersAction
+from pathlib import Path
+
+
+def build_serve_command(subparsers: _SubParsersAction) -> None:
+    """
+    Function that builds the serve subcommand for the parser.
+    This function is called from the build_parser script
+    ----------
+    Input:
+        - subparsers: subparsers object that is used to add the subcommand
+    ----------
+    """
+    serve = subparsers.add_parser(
+        "serve",
+        help="Run as a daemon that accepts typing jobs on a Unix socket",
+    )
+    serve.add_argument(
+        "-s",
+        "--socket",
+        type=Path,
+        default=Path(tempfile.gettempdir()) / "pacini_typing.sock",
+        metavar="File",
+        help="Path of the Unix socket (default: <tmp>/pacini_typing.sock)",
+    )
+    serve.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        metavar="Workers",
+        help="Number of typing jobs that may run at the same time (default: 1)",
+    )
+    serve.add_argument(
+        "--job-dir",
+        type=Path,
+        default=Path(tempfile.gettempdir()) / "pacini_typing_jobs",
+        metavar="Directory",
+        help="Directory for the temporary files of the jobs (default: <tmp>/pacini_typing_jobs)",
+    )
@@ -23,8 +23,16 @@ from argparse import RawTextHelpFormatter
 from importlib.metadata import version as get_version
 from pathlib import Path
 
+from batch.cost_model import DEFAULT_METRICS_STORE
+from batch.sharding import parse_shard_spec
+from command_utils import parse_tool_timeout
+from parsing.read_config_pattern import get_config_files
 from preprocessing.argsparse.args_makedatabase import build_makedatabase_command
+from preprocessing.argsparse.args_merge_shards import build_merge_shards_command
+from preprocessing.argsparse.args_plan import build_plan_command
 from preprocessing.argsparse.args_query import build_query_command
+from preprocessing.argsparse.args_serve import build_serve_command
+from thread_budget import parse_threads
 
 
 def main(givenargs: list[str]) -> argparse.Namespace:
@@ -74,9 +82,13 @@ def main(givenargs: list[str]) -> argparse.Namespace:
         "-c",
         "--config",
         type=str,
+        nargs="+",
         required=False,
         metavar="File",
-        help="Path to predefined configuration file",
+        help=(
+            "Path to predefined configuration file(s), or a directory with\n"
+            "configuration files. Every sample is typed against all of them"
+        ),
     )
 
     parser.add_argument(
@@ -127,9 +139,13 @@ def main(givenargs: list[str]) -> argparse.Namespace:
         "--threads",
         required=False,
         default=1,
-        type=lambda x: int(float(x)),
+        type=parse_threads,
         metavar="Threads",
-        help="Number of threads to use (rounded to the nearest integer)",
+        help=(
+            "Number of threads to use (rounded to the nearest integer),\n"
+            "or 'auto' to use the CPUs that are available to the process\n"
+            "(CPU affinity and cgroup CPU quota)"
+        ),
     )
 
     parser.add_argument(
@@ -149,6 +165,183 @@ def main(givenargs: list[str]) -> argparse.Namespace:
         help=("Search mode to use. SNPs, genes or both.\nDefault is genes.\n"),
     )
 
+    parser.add_argument(
+        "--snp-thread-ratio",
+        type=float,
+        required=False,
+        default=0.5,
+        metavar="Ratio",
+        help=(
+            "Part of the threads used by the SNP search in search mode both,\n"
+            "the gene search uses the rest (default: 0.5)"
+        ),
+    )
+
+    parser.add_argument(
+        "--shard",
+        type=parse_shard_spec,
+        required=False,
+        default=None,
+        metavar="i/n",
+        help=(
+            "Only process shard i of n of the input samples (e.g. 2/8).\n"
+            "Samples are assigned to shards by hashing the sample name"
+        ),
+    )
+
+    parser.add_argument(
+        "--worker",
+        type=Path,
+        required=False,
+        default=None,
+        metavar="Directory",
+        help=(
+            "Run as worker on a shared work queue directory.\n"
+            "Multiple workers (on multiple nodes) divide the input samples"
+        ),
+    )
+
+    parser.add_argument(
+        "--worker-lease",
+        type=float,
+        required=False,
+        default=900.0,
+        metavar="Seconds",
+        help="Seconds after which a sample of a dead worker is reclaimed (default: 900)",
+    )
+
+    parser.add_argument(
+        "--watch",
+        type=Path,
+        required=False,
+        default=None,
+        metavar="Directory",
+        help=(
+            "Watch a staging directory and type new samples as they arrive.\n"
+            "Replaces --input, reports are appended to a rolling combined report"
+        ),
+    )
+
+    parser.add_argument(
+        "--watch-settle",
+        type=float,
+        required=False,
+        default=10.0,
+        metavar="Seconds",
+        help=(
+            "Seconds that the size of a new file must be stable before it is typed,\n"
+            "unless a <file>.done sentinel is present (default: 10)"
+        ),
+    )
+
+    parser.add_argument(
+        "--stream",
+        type=Path,
+        required=False,
+        default=None,
+        metavar="File/Directory",
+        help=(
+            "Type a growing long-read FASTQ file or a directory with FASTQ chunks\n"
+            "while it is being sequenced (gene search only). Replaces --input"
+        ),
+    )
+
+    parser.add_argument(
+        "--stream-interval",
+        type=float,
+        required=False,
+        default=60.0,
+        metavar="Seconds",
+        help="Seconds between the searches of the newly arrived reads (default: 60)",
+    )
+
+    parser.add_argument(
+        "--stream-min-depth",
+        type=float,
+        required=False,
+        default=10.0,
+        metavar="Depth",
+        help="Accumulated depth that is required to call a gene present (default: 10)",
+    )
+
+    parser.add_argument(
+        "--union-database",
+        action="store_true",
+        default=False,
+        help=(
+            "With multiple configuration files, search the genes of all\n"
+            "configurations at once in a combined database"
+        ),
+    )
+
+    parser.add_argument(
+        "--single-alignment",
+        action="store_true",
+        default=False,
+        help=(
+            "In search mode both, align the input once against a combined\n"
+            "database of the target genes and the SNP genes"
+        ),
+    )
+
+    parser.add_argument(
+        "--kma-shm",
+        action="store_true",
+        default=False,
+        help=(
+            "Load the KMA databases of the config into shared memory once\n"
+            "before processing FASTQ samples, instead of per KMA call"
+        ),
+    )
+
+    parser.add_argument(
+        "--pointfinder-subprocess",
+        action="store_true",
+        default=False,
+        help=(
+            "Run PointFinder as a separate Python process for every sample,\n"
+            "instead of in the Pacini-typing process"
+        ),
+    )
+
+    parser.add_argument(
+        "--metrics-store",
+        type=Path,
+        required=False,
+        default=DEFAULT_METRICS_STORE,
+        metavar="File",
+        help=(
+            "Metrics store with the runtimes of earlier runs, used to predict\n"
+            "the runtime of samples (default: ~/.cache/pacini_typing/metrics.jsonl)"
+        ),
+    )
+
+    parser.add_argument(
+        "--profile-interval",
+        type=float,
+        required=False,
+        default=None,
+        metavar="SECONDS",
+        help=(
+            "Sample the CPU, memory and I/O of all (child) processes\n"
+            "at this interval and write a timeline to the report directory"
+        ),
+    )
+
+    parser.add_argument(
+        "--timeout",
+        type=parse_tool_timeout,
+        action="append",
+        required=False,
+        default=[],
+        metavar="TOOL=SECONDS",
+        help=(
+            "Stop a tool (and its child processes) that runs longer than\n"
+            "this number of seconds, e.g. --timeout kma=3600 --timeout pointfinder=7200.\n"
+            "Without a tool, the timeout applies to all tools (default: no timeout)"
+        ),
+    )
+
     subparsers = parser.add_subparsers(
         title="operations",
         description="For more information on a specific command, type: pacini_typing <command> -h",
@@ -157,20 +350,47 @@ def main(givenargs: list[str]) -> argparse.Namespace:
 
     build_makedatabase_command(subparsers)
     build_query_command(subparsers)
+    build_merge_shards_command(subparsers)
+    build_serve_command(subparsers)
+    build_plan_command(subparsers)
 
     args = parser.parse_args(givenargs)
 
+    if args.config:
+        args.config = get_config_files(args.config)
+        if not args.config:
+            parser.error("--config does not contain any configuration (.yaml) files.")
+
     # Some first level argument checks
     # to ensure that the user has provided the correct arguments
 
     if args.fasta_out and args.search_mode == "SNPs":
         parser.error("--fasta-out cannot be used with --search_mode SNPs. Please use this option only when searching for genes.")
 
+    if not 0 <= args.snp_thread_ratio <= 1:
+        parser.error("--snp-thread-ratio must be between 0 and 1.")
+
+    if args.profile_interval is not None and args.profile_interval <= 0:
+        parser.error("--profile-interval must be a positive number of seconds.")
+
     if args.options:
         if args.config or args.input:
             parser.error("--config or --input cannot be used with subcommands.")
         if args.fasta_out or args.save_intermediates:
             parser.error("--fasta-out and --save-intermediates cannot be used with subcommands.")
+        if args.shard or args.worker or args.watch or args.stream:
+            parser.error("--shard, --worker, --watch and --stream cannot be used with subcommands.")
+    elif args.shard and args.worker:
+        parser.error("--shard and --worker cannot be combined, workers divide the samples themselves.")
+    elif args.watch or args.stream:
+        if not args.config:
+            parser.error("--config must be provided with --watch or --stream.")
+        if args.input or args.shard or args.worker or (args.watch and args.stream):
+            parser.error("--watch and --stream cannot be combined with each other or with --input, --shard or --worker.")
+        if args.stream and args.search_mode != "genes":
+            parser.error("--stream only supports --search_mode genes.")
+        if args.stream and len(args.config) > 1:
+            parser.error("--stream only supports a single configuration file.")
     elif not args.config or not args.input:
         parser.error("Both --config and --input must be provided if no subcommand is specified.")
 
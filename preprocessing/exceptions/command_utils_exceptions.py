@@ -15,7 +15,7 @@ during the execution of shell commands.
 
 __author__ = "Mark van de Streek"
 __date__ = "2024-11-21"
-__all__ = ["SubprocessError"]
+__all__ = ["SubprocessError", "CommandTimeoutError"]
 
 
 class SubprocessError(Exception):
@@ -52,3 +52,39 @@ class SubprocessError(Exception):
                 Copy the command and run it in the terminal
         ---------------------------------------------------
                 """
+
+
+class CommandTimeoutError(SubprocessError):
+    """
+    Raised when a command exceeds its timeout (--timeout).
+    The process group of the command is terminated before
+    the exception is raised, so no child process keeps running.
+    """
+
+    def __init__(self, tool: str, timeout: float) -> None:
+        """
+        Initialize the exception with the tool and its timeout.
+        ----------
+        Input:
+            - tool: name of the tool that timed out
+            - timeout: the timeout in seconds
+        ----------
+        """
+        super().__init__(f"{tool} did not finish within {timeout:g} seconds")
+        self.tool = tool
+        self.timeout = timeout
+
+    def __str__(self) -> str:
+        return f"""
+        ---------------------------------------------------
+        ERROR: Command timed out
+        ---------------------------------------------------
+        {self.tool} did not finish within {self.timeout:g} seconds,
+        the tool and all of its child processes are stopped.
+        ---------------------------------------------------
+        SUGGESTION:
+            - Check if the input and database files are reachable
+                (e.g. a stale NFS mount)
+            - Increase the timeout with --timeout {self.tool}=SECONDS
+        ---------------------------------------------------
+                """
@@ -31,6 +31,9 @@ from preprocessing.exceptions.validation_exceptions import (
     ValidationError,
 )
 
+# ? (path, size, mtime) -> SHA256 hash, so a file is only hashed once per run
+_sha_hash_cache: dict[tuple[str, int, int], str] = {}
+
 
 class ArgsValidator:
     """
@@ -172,8 +175,10 @@ class ArgsValidator:
     def create_sha_hash(file: str) -> str:
         """
         Static method that creates a SHA256 hash for a given file.
-        The file is read in chunks of 4096 bytes and the hash is updated.
+        The file is read in chunks of 1 MiB and the hash is updated.
         The Hash is then returned as a hexadecimal string for comparison.
+        Hashes are cached by path, size and modification time, since the
+        batch deduplication (batch/dedup.py) hashes the same files.
         ----------
         Input:
             - file: string with the file path
@@ -181,13 +186,18 @@ class ArgsValidator:
             - hash_obj.hexdigest(): string with the SHA256 hash
         ----------
         """
+        stat = os.stat(file)
+        key = (os.path.realpath(file), stat.st_size, stat.st_mtime_ns)
+        if key in _sha_hash_cache:
+            return _sha_hash_cache[key]
         logging.debug("Creating SHA256 hash for file: %s", file)
         hash_obj = hashlib.sha256()
         with open(file, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
                 hash_obj.update(chunk)
 
-        return hash_obj.hexdigest()
+        _sha_hash_cache[key] = hash_obj.hexdigest()
+        return _sha_hash_cache[key]
 
     def check_for_same_name(self) -> None:
         """
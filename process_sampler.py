@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Module with a background sampler of the process tree of Pacini-typing
+(--profile-interval). The totals of the resource usage (see
+sample_metrics.py) hide the shape of a run: e.g. PointFinder starts its
+own KMA or BLASTn, and a tool may only use all of its threads in a part
+of its runtime. The sampler reads /proc/<pid>/stat, status and io
+of Pacini-typing and all of its descendants at a fixed interval, and writes:
+    - timeline.csv: CPU, threads, RSS and bytes read/written per process
+    - timeline.trace.json: the same timeline in the Chrome trace format,
+        which can be opened in chrome://tracing or https://ui.perfetto.dev
+The sampler only reads /proc, so it is only available on Linux.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["TIMELINE_COLUMNS", "parse_stat", "get_descendants", "ProcessTreeSampler"]
+
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+PROC = Path("/proc")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+TIMELINE_COLUMNS = ["seconds", "pid", "ppid", "name", "cpu_percent", "threads", "rss_mb", "read_mb", "write_mb"]
+
+
+def parse_stat(stat: str) -> dict[str, Any]:
+    """
+    Function that parses the fields of /proc/<pid>/stat that are used.
+    The name (comm) is between parentheses and may contain spaces,
+    so the other fields are split after the last parenthesis.
+    ----------
+    Input:
+        - stat: the content of the stat file
+    Output:
+        - dict with the name, ppid, CPU time (seconds) and threads
+    ----------
+    """
+    name = stat[stat.index("(") + 1 : stat.rindex(")")]
+    # ? fields[0] is field 3 (state) of proc(5)
+    fields = stat[stat.rindex(")") + 2 :].split()
+    return {
+        "name": name,
+        "ppid": int(fields[1]),
+        "cpu_seconds": (int(fields[11]) + int(fields[12])) / CLOCK_TICKS,
+        "threads": int(fields[17]),
+    }
+
+
+def read_process(pid: int, proc: Path = PROC) -> dict[str, Any] | None:
+    """
+    Function that reads the stat, status and io files of a process.
+    The io file is only readable for processes of the same user,
+    the bytes are then None.
+    ----------
+    Input:
+        - pid: the process id
+        - proc: the proc filesystem
+    Output:
+        - dict with the values of the process, or None if it has exited
+    ----------
+    """
+    try:
+        values = parse_stat((proc / str(pid) / "stat").read_text(encoding="utf-8"))
+        status = (proc / str(pid) / "status").read_text(encoding="utf-8")
+    except (OSError, ValueError, IndexError):
+        return None
+    values["rss_mb"] = next((int(line.split()[1]) / 1024 for line in status.splitlines() if line.startswith("VmRSS:")), 0.0)
+    try:
+        io = dict(line.split(": ") for line in (proc / str(pid) / "io").read_text(encoding="utf-8").splitlines())
+        values["read_mb"] = int(io["read_bytes"]) / 1024 / 1024
+        values["write_mb"] = int(io["write_bytes"]) / 1024 / 1024
+    except (OSError, ValueError, KeyError):
+        values["read_mb"] = values["write_mb"] = None
+    return values
+
+
+def get_descendants(root: int, proc: Path = PROC) -> list[int]:
+    """
+    Function that returns the process and all of its descendants,
+    based on the parent ids of all processes in /proc.
+    ----------
+    Input:
+        - root: the process id of the root of the tree
+        - proc: the proc filesystem
+    Output:
+        - list with the process ids, starting with the root
+    ----------
+    """
+    children: dict[int, list[int]] = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text(encoding="utf-8")
+            children.setdefault(int(stat[stat.rindex(")") + 2 :].split()[1]), []).append(int(entry.name))
+        except (OSError, ValueError, IndexError):
+            continue
+    tree = [root]
+    for pid in tree:
+        tree.extend(children.get(pid, []))
+    return tree
+
+
+class ProcessTreeSampler:
+    """
+    Context manager that samples the process tree of Pacini-typing
+    in a background thread and writes the timeline on exit.
+    ----------
+    Methods:
+        - __init__: Constructor of the class
+        - sample: Takes one sample of the process tree
+        - run: Samples at the interval until stopped
+        - write_trace: Writes the Chrome trace of the timeline
+    ----------
+    """
+
+    def __init__(self, interval: float, output_dir: str | Path, root: int | None = None) -> None:
+        """
+        Constructor of the ProcessTreeSampler class.
+        ----------
+        Input:
+            - interval: seconds between the samples
+            - output_dir: directory of timeline.csv and timeline.trace.json
+            - root: the root process (default: this process)
+        ----------
+        """
+        self.interval = interval
+        self.output_dir = Path(output_dir)
+        self.root = root or os.getpid()
+        self.rows: list[dict[str, Any]] = []
+        self.previous: dict[int, tuple[float, float]] = {}
+        self.start = time.time()
+        self.stop_event = threading.Event()
+        self.thread: threading.Thread | None = None
+
+    def sample(self) -> None:
+        """
+        Function that takes one sample of all processes in the tree.
+        The CPU percentage is the CPU time since the previous sample of
+        the process, so 400 means four fully used cores.
+        """
+        now = time.time()
+        for pid in get_descendants(self.root):
+            if (values := read_process(pid)) is None:
+                continue
+            previous_time, previous_cpu = self.previous.get(pid, (now, values["cpu_seconds"]))
+            self.previous[pid] = (now, values["cpu_seconds"])
+            elapsed = now - previous_time
+            self.rows.append(
+                {
+                    "seconds": round(now - self.start, 3),
+                    "pid": pid,
+                    "ppid": values["ppid"],
+                    "name": values["name"],
+                    "cpu_percent": round(100 * (values["cpu_seconds"] - previous_cpu) / elapsed, 1) if elapsed > 0 else 0.0,
+                    "threads": values["threads"],
+                    "rss_mb": round(values["rss_mb"], 1),
+                    "read_mb": round(values["read_mb"], 3) if values["read_mb"] is not None else None,
+                    "write_mb": round(values["write_mb"], 3) if values["write_mb"] is not None else None,
+                }
+            )
+
+    def run(self) -> None:
+        """
+        Function that samples the process tree until the sampler is stopped.
+        """
+        self.sample()
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+    def write_trace(self, trace_file: Path) -> None:
+        """
+        Function that writes the timeline in the Chrome trace format:
+        a named track per process with counters for the CPU, RSS and I/O.
+        ----------
+        Input:
+            - trace_file: path of the trace file
+        ----------
+        """
+        events: list[dict[str, Any]] = []
+        for pid, name in {row["pid"]: row["name"] for row in self.rows}.items():
+            events.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": f"{name} ({pid})"}})
+        for row in self.rows:
+            timestamp = int(row["seconds"] * 1_000_000)
+            counters = {
+                "CPU %": {"cpu": row["cpu_percent"]},
+                "RSS MB": {"rss": row["rss_mb"]},
+                "I/O MB": {"read": row["read_mb"] or 0, "write": row["write_mb"] or 0},
+            }
+            events.extend({"name": name, "ph": "C", "ts": timestamp, "pid": row["pid"], "args": args} for name, args in counters.items())
+        with open(trace_file, "w", encoding="utf-8") as handle:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, handle)
+
+    def __enter__(self) -> "ProcessTreeSampler":
+        """
+        Starts the sampler thread, if /proc is available.
+        """
+        if not PROC.is_dir():
+            logging.warning("Process tree sampling requires /proc (Linux), no timeline is written")
+            return self
+        logging.info("Sampling the process tree every %s second(s)...", self.interval)
+        self.thread = threading.Thread(target=self.run, name="process-sampler", daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        """
+        Stops the sampler and writes the timeline, also if the run failed.
+        """
+        if self.thread is None:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.output_dir / "timeline.csv", "w", encoding="utf-8", newline="") as handle:
+            writer = csv.DictWriter(handle, fieldnames=TIMELINE_COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.rows)
+        self.write_trace(self.output_dir / "timeline.trace.json")
+        logging.info("Wrote the process timeline (%d samples) to %s", len(self.rows), self.output_dir / "timeline.csv")
@@ -22,8 +22,10 @@ import logging
 import os
 import time
 from abc import ABC, abstractmethod
+from typing import Any
 
 from command_utils import CommandInvoker, ShellCommand
+from queries.tool_registry import get_tool_version
 
 
 class BaseQueryRunner(ABC):
@@ -40,6 +42,7 @@ class BaseQueryRunner(ABC):
             from the tool output
         - log_tool_version: Method that logs the version of the tool used
         - run: Method that runs the query
+        - get_log_prefix: Method that returns the prefix of the tool log files
         - get_runtime: Method that returns the runtime of the query
     ----------
     """
@@ -61,6 +64,10 @@ class BaseQueryRunner(ABC):
         self.stop_time: float = 0.0
         self.query: list[str] = []
         self.version_command: list[str] = []
+        # ? the file that identifies the version in the cache, by default the executable
+        self.version_identity: str | None = None
+        # ? resource usage of the query command, see get_usage in command_utils.py
+        self.usage: dict[str, Any] | None = None
         self.check_output_dir()
 
     def check_output_dir(self) -> bool:
@@ -104,10 +111,13 @@ class BaseQueryRunner(ABC):
         This logging functionality was developed at RIVM's request
 
         *The extraction of the version number is a abstract method
+
+        The version is requested via the tool registry, which caches it
+        per process and on disk (see queries/tool_registry.py), so the
+        version command only runs when the tool has changed.
         """
-        stdout, stderr = CommandInvoker(ShellCommand(cmd=self.version_command, capture=True)).execute()
-        if stdout:
-            logging.info("Version tool: %s", self.extract_version_number(stdout))
+        if version := get_tool_version(self.version_command, self.extract_version_number, self.version_identity):
+            logging.info("Version tool: %s", version)
 
     def run(self) -> None:
         """
@@ -115,12 +125,29 @@ class BaseQueryRunner(ABC):
         function runs the query. The runtime is started
         and stopped to calculate the runtime.
         (calculation is done in the get_runtime method)
+        The resource usage of the command is kept in self.usage.
         """
         logging.debug("Starting the query operation...")
         self.start_time = time.time()
-        CommandInvoker(ShellCommand(cmd=self.query, capture=True)).execute()
+        invoker = CommandInvoker(ShellCommand(cmd=self.query, log_prefix=self.get_log_prefix(self.query[0])))
+        invoker.execute()
+        self.usage = invoker.usage
         self.stop_time = time.time()
 
+    def get_log_prefix(self, tool: str) -> str:
+        """
+        Method that returns the prefix of the log files of a tool run,
+        next to the output of the sample (e.g. output/sample.kma),
+        see the streaming mode of the ShellCommand class.
+        ----------
+        Input:
+            - tool: the (path to the) tool
+        Output:
+            - str: the prefix of the log files
+        ----------
+        """
+        return f"{self.run_options['output']}.{os.path.basename(tool)}"
+
     def get_runtime(self) -> float:
         """
         Simple method that returns the runtime of the query.
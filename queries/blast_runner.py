@@ -38,6 +38,8 @@ class BLASTn(Enum):
     OUTPUT_FORMAT_OPTION: flag for the output format
     OUTPUT_FORMAT: flag for the output format
     FORMATS: list of all the formats that are used
+    ALIGNMENT_FORMATS: formats that are only added for the native codon caller
+    THREADS_OPTION: option for the number of threads
     ----------
     """
 
@@ -47,6 +49,7 @@ class BLASTn(Enum):
     OUTPUT_OPTION = "-out"
     OUTPUT_FORMAT_OPTION = "-outfmt"
     OUTPUT_FORMAT = "6"
+    THREADS_OPTION = "-num_threads"
     FORMATS = [
         "qseqid",  # query or source (gene) sequence id
         "sseqid",  # subject or target (reference genome) sequence id
@@ -65,6 +68,9 @@ class BLASTn(Enum):
         "slen",  # length of the subject sequence
         "gaps",  # number of gaps
     ]
+    ALIGNMENT_FORMATS = [
+        "sseq",  # aligned part of subject sequence (codons of the SNPs)
+    ]
 
     @staticmethod
     def get_query(option: dict[str, Any]) -> list[str]:
@@ -72,6 +78,8 @@ class BLASTn(Enum):
         Simple method that prepares the query for the BLAST run.
         This query is passed to the main class QueryRunner.
         The script-constants are used to set the run option and output format.
+        The aligned part of the subject sequence is only requested
+        when the SNPs are called from the alignments (subject_alignments).
         ----------
         Input:
             - dictionary with the input files,
@@ -81,6 +89,7 @@ class BLASTn(Enum):
         ----------
         """
         logging.debug("Preparing BLAST query...")
+        formats = BLASTn.FORMATS.value + (BLASTn.ALIGNMENT_FORMATS.value if option.get("subject_alignments") else [])
         return [
             BLASTn.RUN_OPTION.value,
             BLASTn.QUERY_OPTION.value,
@@ -90,7 +99,7 @@ class BLASTn(Enum):
             BLASTn.OUTPUT_OPTION.value,
             option["output"] + ".tsv",
             BLASTn.OUTPUT_FORMAT_OPTION.value,
-            f"{BLASTn.OUTPUT_FORMAT.value} {" ".join(BLASTn.FORMATS.value)}",
+            f"{BLASTn.OUTPUT_FORMAT.value} {" ".join(formats)}",
             "-num_threads",
             str(option["threads"]),
         ]
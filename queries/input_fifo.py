@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Module with a named pipe (FIFO) that presents several input files as
+one file. PointFinder runs KMA with a single input file, so paired
+FASTQ files were concatenated into a temporary file first, which
+rewrites the whole read set for every SNP search. A FIFO is filled
+by a feeder thread with R1 and then R2 while KMA reads it, so nothing
+is written to disk. Concatenated gzip files are a valid gzip file
+(one member per file), so compressed inputs are streamed as they are.
+
+A FIFO can only be read once, and a writer can not tell two readers
+apart, so the FIFO is only given to KMA (see SNPQueryRunner): PointFinder
+itself gets a link to R1, which it may open to determine the file type,
+and the wrapper of KMA replaces the link by the FIFO. Platforms or file
+systems without FIFOs use the temporary file instead.
+
+A reader that did not get the whole stream can not be noticed by
+PointFinder: if KMA is given the link instead of the FIFO, it reads
+only R1, and if the feeder fails halfway, KMA sees the end of the file.
+is_complete tells whether exactly one reader got all input files.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["InputFifo", "fifo_supported"]
+
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any
+
+
+def fifo_supported() -> bool:
+    """
+    Function that checks if the platform supports named pipes.
+    ----------
+    Output:
+        - bool: True if os.mkfifo is available
+    ----------
+    """
+    return hasattr(os, "mkfifo")
+
+
+class InputFifo:
+    """
+    Context manager that creates a FIFO with the content of the input
+    files and feeds it to a single reader in a background thread.
+    ----------
+    Methods:
+        - __init__: Constructor of the class
+        - feed: Writes the input files to the reader of the FIFO
+        - __enter__: Creates the FIFO and starts the feeder
+        - __exit__: Closes the FIFO
+        - close: Stops the feeder and removes the FIFO
+        - is_complete: Checks if one reader got the whole stream
+    ----------
+    """
+
+    def __init__(self, input_files: list[str], fifo_path: str | Path) -> None:
+        """
+        Constructor of the InputFifo class.
+        ----------
+        Input:
+            - input_files: the files to concatenate, in order
+            - fifo_path: path of the FIFO
+        ----------
+        """
+        self.input_files = input_files
+        self.fifo_path = Path(fifo_path)
+        self.stop_event = threading.Event()
+        self.thread: threading.Thread | None = None
+        self.readers = 0
+        self.complete = False
+        self.error: OSError | None = None
+
+    def feed(self) -> None:
+        """
+        Function that writes the input files to the FIFO. Opening the FIFO
+        blocks until the reader opens it, a reader that stops early
+        (e.g. KMA after an error) is not an error of the feeder.
+        """
+        try:
+            with open(self.fifo_path, "wb", buffering=0) as fifo:
+                if self.stop_event.is_set():
+                    return
+                self.readers += 1
+                for input_file in self.input_files:
+                    with open(input_file, "rb") as handle:
+                        shutil.copyfileobj(handle, fifo, 1024 * 1024)
+                self.complete = True
+        except BrokenPipeError:
+            logging.debug("The reader of %s stopped before the end of the stream", self.fifo_path)
+        except OSError as e:
+            # ? e.g. an input file that can not be read, the reader gets an end of file
+            logging.error("Could not feed %s: %s", self.fifo_path, e)
+            self.error = e
+
+    def __enter__(self) -> "InputFifo":
+        """
+        Creates the FIFO and starts the feeder thread.
+        ----------
+        Raises:
+            - OSError: if the FIFO can not be created (e.g. on a file system without FIFOs)
+        ----------
+        """
+        os.mkfifo(self.fifo_path, 0o600)
+        self.thread = threading.Thread(target=self.feed, name=f"fifo-{self.fifo_path.name}", daemon=True)
+        self.thread.start()
+        logging.debug("Streaming %s through FIFO %s", self.input_files, self.fifo_path)
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stops the feeder and removes the FIFO. A feeder that still waits
+        for a reader (e.g. PointFinder failed before KMA started)
+        is released by opening the FIFO for reading.
+        Closing the FIFO a second time does nothing.
+        """
+        self.stop_event.set()
+        if self.thread is not None:
+            while self.thread.is_alive():
+                try:
+                    os.close(os.open(self.fifo_path, os.O_RDONLY | os.O_NONBLOCK))
+                except OSError:
+                    pass
+                self.thread.join(0.1)
+        self.fifo_path.unlink(missing_ok=True)
+
+    def is_complete(self) -> bool:
+        """
+        Function that checks if the stream was read as a whole,
+        only valid after close.
+        ----------
+        Output:
+            - bool: True if exactly one reader got all input files
+        ----------
+        """
+        return self.readers == 1 and self.complete and self.error is None
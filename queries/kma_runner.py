@@ -31,11 +31,19 @@ class KMA(Enum):
     ----------
     RUN_OPTION: string that is used in the subprocess.run() method
     PAIRED_OPTION: option for paired-end reads
+    SINGLE_OPTION: option for a single read file
+    LONG_READ_OPTION: option for long (nanopore) reads
+    SHARED_MEMORY_OPTION: option to use a database in shared memory
+    THREADS_OPTION: option for the number of threads
     ----------
     """
 
     RUN_OPTION = "kma"
     PAIRED_OPTION = "-ipe"
+    SINGLE_OPTION = "-i"
+    LONG_READ_OPTION = "-bcNano"
+    SHARED_MEMORY_OPTION = ["-shm", "1"]
+    THREADS_OPTION = "-t"
 
     @staticmethod
     def get_query(option: dict[str, Any]) -> list[str]:
@@ -51,7 +59,7 @@ class KMA(Enum):
         ----------
         """
         logging.debug("Preparing KMA query...")
-        return [
+        query = [
             KMA.RUN_OPTION.value,
             KMA.PAIRED_OPTION.value,
             option["input_file_list"][0],
@@ -63,6 +71,40 @@ class KMA(Enum):
             "-t",
             str(option["threads"]),
         ]
+        if option.get("kma_shm"):
+            # ? the database was loaded into shared memory before the batch (--kma-shm)
+            query.extend(KMA.SHARED_MEMORY_OPTION.value)
+        return query
+
+    @staticmethod
+    def get_long_read_query(option: dict[str, Any]) -> list[str]:
+        """
+        Method that prepares a KMA query for a single file with
+        long reads (nanopore), used by the --stream mode.
+        ----------
+        Input:
+            - dictionary with the input file,
+                database, and output file
+        Output:
+            - list with the query to run KMA
+        ----------
+        """
+        logging.debug("Preparing KMA long-read query...")
+        query = [
+            KMA.RUN_OPTION.value,
+            KMA.SINGLE_OPTION.value,
+            option["input_file_list"][0],
+            "-t_db",
+            option["database_path"] + option["database_name"],
+            "-o",
+            option["output"],
+            "-t",
+            str(option["threads"]),
+            KMA.LONG_READ_OPTION.value,
+        ]
+        if option.get("kma_shm"):
+            query.extend(KMA.SHARED_MEMORY_OPTION.value)
+        return query
 
     @staticmethod
     def get_version_command() -> list[str]:
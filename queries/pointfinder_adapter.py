@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Adapter that runs the downloaded PointFinder.py script inside the
+Pacini-typing process, instead of starting `python PointFinder.py`
+for every sample. The script is compiled once per process (and again
+when the file changes), so the interpreter start, the imports
+(Biopython, cgecore) and the compilation are only paid once in batch
+and daemon mode.
+
+Every run is isolated from the other runs and from Pacini-typing:
+    - the script runs as __main__ in a new namespace (no globals are shared)
+    - sys.argv, sys.path, sys.stdout/sys.stderr and the working
+        directory are set for the run and restored afterwards
+    - the output is written to <prefix>.stdout.log and <prefix>.stderr.log,
+        like the streaming mode of the ShellCommand
+
+These are process-wide settings, so only one PointFinder run can be
+in-process at a time, and the output of other threads (print, sys.stderr)
+would end up in the log of PointFinder. The run is therefore only
+in-process if no other command (KMA, BLASTn, another PointFinder) is
+running: a run next to the gene search (search mode both) or next to
+other jobs (daemon mode, multiple configurations), a run with a timeout
+(--timeout, which can only stop a process group) and a script that can
+not be loaded in this interpreter (e.g. a missing dependency) use the
+subprocess instead.
+
+Commands that start in other threads during the in-process run are not
+prevented. Their output is written to the PointFinder logs and their
+children are counted in the usage of PointFinder (getrusage(RUSAGE_CHILDREN)),
+so the usage of such a run is marked with overlapping_commands.
+
+A SystemExit of the script is its exit status, unless the process
+received a termination signal (SIGTERM, see set_termination_signal),
+which stops Pacini-typing instead of failing the sample.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["InProcessUnavailable", "PointFinderAdapter"]
+
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from types import CodeType
+from typing import Any
+
+from command_utils import TAIL_BYTES, Command, get_running_commands, get_termination_signal, get_tool_timeout, get_usage
+from preprocessing.exceptions.command_utils_exceptions import SubprocessError
+
+# ? CPU time of the calling thread, on platforms without RUSAGE_THREAD of the process
+RUSAGE_THREAD = getattr(resource, "RUSAGE_THREAD", resource.RUSAGE_SELF)
+_lock = threading.Lock()
+# ? compiled scripts per path, with the modification time and size of the compiled file
+_code_cache: dict[str, tuple[int, int, CodeType]] = {}
+
+
+class InProcessUnavailable(Exception):
+    """
+    Raised when PointFinder can not run in this process,
+    the query then runs as a subprocess.
+    """
+
+
+def load_script(script_path: str) -> CodeType:
+    """
+    Function that returns the compiled script, compiled once
+    per process and again when the script has changed.
+    ----------
+    Input:
+        - script_path: path to the PointFinder script
+    Output:
+        - the code object of the script
+    Raises:
+        - InProcessUnavailable: if the script can not be read or compiled
+    ----------
+    """
+    try:
+        stat = os.stat(script_path)
+        cached = _code_cache.get(script_path)
+        if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+            source = Path(script_path).read_bytes()
+            cached = (stat.st_mtime_ns, stat.st_size, compile(source, script_path, "exec"))
+            _code_cache[script_path] = cached
+        return cached[2]
+    except (OSError, SyntaxError, ValueError) as e:
+        raise InProcessUnavailable(f"could not load {script_path}: {e}") from e
+
+
+def read_tail(log_file: Path) -> str:
+    """
+    Function that returns the last part (TAIL_BYTES) of a log file.
+    ----------
+    Input:
+        - log_file: path of the log file
+    Output:
+        - str: the decoded tail
+    ----------
+    """
+    with open(log_file, "rb") as handle:
+        handle.seek(max(log_file.stat().st_size - TAIL_BYTES, 0))
+        return handle.read().decode("utf-8", errors="replace")
+
+
+class PointFinderAdapter(Command):
+    """
+    Concrete implementation of the Command interface that runs the
+    PointFinder script in-process. The query is the same list as for the
+    subprocess (python PointFinder.py --inputfiles ...), so the adapter
+    can be used instead of a ShellCommand.
+    ----------
+    Methods:
+        - __init__: Constructor of the class
+        - execute: Runs the script in-process
+        - run_script: Runs the compiled script with the isolated state
+    ----------
+    """
+
+    def __init__(self, query: list[str], log_prefix: str) -> None:
+        """
+        Constructor of the PointFinderAdapter class.
+        ----------
+        Input:
+            - query: the PointFinder query (python, script, arguments)
+            - log_prefix: prefix of the log files
+        Raises:
+            - InProcessUnavailable: if a timeout applies to PointFinder
+        ----------
+        """
+        if get_tool_timeout(query) is not None:
+            raise InProcessUnavailable("a timeout is set for PointFinder, which requires a subprocess")
+        self.query = query
+        self.script_path = os.path.abspath(query[1])
+        self.log_prefix = log_prefix
+        self.usage: dict[str, Any] | None = None
+
+    def run_script(self, code: CodeType, stdout: Any, stderr: Any) -> int:
+        """
+        Function that runs the compiled script as __main__ with its own
+        argv, sys.path entry, output and working directory.
+        The state of the process is restored, also if the script fails.
+        ----------
+        Input:
+            - code: the compiled script
+            - stdout: file for the standard output
+            - stderr: file for the standard error
+        Output:
+            - int: the exit code of the script
+        ----------
+        """
+        saved = (sys.argv, list(sys.path), sys.stdout, sys.stderr, os.getcwd())
+        sys.argv = [self.script_path, *self.query[2:]]
+        sys.path.insert(0, os.path.dirname(self.script_path))
+        sys.stdout, sys.stderr = stdout, stderr
+        try:
+            exec(code, {"__name__": "__main__", "__file__": self.script_path, "__builtins__": __builtins__})  # pylint: disable=exec-used
+            return 0
+        except SystemExit as e:
+            if get_termination_signal() is not None:
+                # ? the process is stopped (SIGTERM), not the exit of PointFinder
+                raise
+            if e.code is None or isinstance(e.code, int):
+                return e.code or 0
+            print(e.code, file=stderr)
+            return 1
+        except ImportError:
+            # ? a dependency of PointFinder is not available in this interpreter
+            raise
+        except Exception:  # pylint: disable=broad-exception-caught
+            traceback.print_exc(file=stderr)
+            return 1
+        finally:
+            sys.argv, sys.path[:], sys.stdout, sys.stderr = saved[0], saved[1], saved[2], saved[3]
+            os.chdir(saved[4])
+
+    def execute(self) -> bool:
+        """
+        Runs PointFinder in-process. The resource usage is the CPU time of
+        this thread and of the child processes that PointFinder starts
+        (KMA or BLASTn). The adapter is executed by a CommandInvoker,
+        which counts it as a running command itself.
+        ----------
+        Output:
+            - bool indicating success
+        Raises:
+            - InProcessUnavailable: if the adapter is busy, another command
+                is running or the script can not be loaded, nothing has run yet
+            - SubprocessError: if PointFinder fails
+            - SystemExit: if the process received a termination signal
+        ----------
+        """
+        code = load_script(self.script_path)
+        if not _lock.acquire(blocking=False):
+            raise InProcessUnavailable("PointFinder is already running in this process")
+        try:
+            running, started = get_running_commands()
+            if running > 1:
+                raise InProcessUnavailable(f"{running - 1} other command(s) are running in this process")
+            logging.info("running PointFinder in-process: '%s'", " ".join(self.query[1:]))
+            logs = [Path(f"{self.log_prefix}.{name}.log") for name in ("stdout", "stderr")]
+            logs[0].parent.mkdir(parents=True, exist_ok=True)
+            start = time.time()
+            before_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+            before_thread = resource.getrusage(RUSAGE_THREAD)
+            returncode = -1
+            try:
+                with open(logs[0], "w", encoding="utf-8") as stdout, open(logs[1], "w", encoding="utf-8") as stderr:
+                    returncode = self.run_script(code, stdout, stderr)
+            except ImportError as e:
+                raise InProcessUnavailable(f"PointFinder could not import {e.name}") from e
+            finally:
+                after_thread = resource.getrusage(RUSAGE_THREAD)
+                self.usage = get_usage(self.query, time.time() - start, returncode, resource.getrusage(resource.RUSAGE_CHILDREN), before_children)
+                self.usage["tool"] = "PointFinder (in-process)"
+                self.usage["user_seconds"] = round(self.usage["user_seconds"] + after_thread.ru_utime - before_thread.ru_utime, 3)
+                self.usage["system_seconds"] = round(self.usage["system_seconds"] + after_thread.ru_stime - before_thread.ru_stime, 3)
+                overlapping = get_running_commands()[1] - started
+                if overlapping:
+                    # ? the usage (and the logs) also contain these commands
+                    self.usage["overlapping_commands"] = overlapping
+                    logging.debug("%d command(s) started during the in-process PointFinder run", overlapping)
+        finally:
+            _lock.release()
+        if returncode != 0:
+            tail = read_tail(logs[1])
+            logging.error("PointFinder failed with exit code %d:\n%s\n(full output in %s)", returncode, tail, logs[1])
+            raise SubprocessError(tail)
+        return True
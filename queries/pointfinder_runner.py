@@ -20,6 +20,10 @@ __date__ = "2025-04-30"
 __all__ = ["PointFinder"]
 
 from enum import Enum
+from typing import Any
+
+from queries.blast_runner import BLASTn
+from queries.kma_runner import KMA
 
 
 class PointFinder(Enum):
@@ -72,6 +76,28 @@ class PointFinder(Enum):
             option["method_path"],
         ]
 
+    @staticmethod
+    def get_threads_arguments(option: dict[str, Any]) -> list[str]:
+        """
+        Getter method that returns the thread option of the aligner
+        that PointFinder runs (--method). PointFinder has no thread
+        option itself and runs KMA and BLASTn single-threaded, so
+        these arguments are added with a wrapper of the aligner
+        (see queries/tool_wrapper.py).
+        ----------
+        Input:
+            - dictionary with the method and threads
+        Output:
+            - list with the thread arguments, empty for a single thread
+        ----------
+        """
+        threads = int(option.get("threads", 1))
+        if threads <= 1:
+            return []
+        if option["method"] == "kma":
+            return [KMA.THREADS_OPTION.value, str(threads)]
+        return [BLASTn.THREADS_OPTION.value, str(threads)]
+
     @staticmethod
     def get_version_command() -> list[str]:
         """
@@ -12,8 +12,10 @@ either genes or SNPS.
 
 The run_gene_query and run_snp_query functions are both calling the
 run_query function, only with a different class. The run_query function
-then initializes the class and executes the run method. Finally, the
-runtime is logged.
+then initializes the class and executes the run method. The native SNP
+engine runs the gene query runner against the SNP genes. Finally, the
+runtime is logged and recorded in the metrics store (see batch/cost_model.py),
+and the resource usage of the command is recorded for the sample (see sample_metrics.py).
 
 *Main reason for placing them separate was the circular import issue if placing
 them in main PaciniTyping class.
@@ -21,27 +23,32 @@ them in main PaciniTyping class.
 
 __author__ = "Mark van de Streek"
 __date__ = "2025-05-07"
-__all__ = ["run_query", "run_gene_query", "run_snp_query"]
+__all__ = ["run_query", "run_gene_query", "run_snp_query", "run_native_snp_query"]
 
 import logging
+import os
 from typing import Any, Type
 
+import sample_metrics
+from batch.cost_model import record_stage
 from queries.gene_query_runner import GeneQueryRunner
 from queries.snp_query_runnner import SNPQueryRunner
 
 
-def run_query(query_runner_class: Type[Any], query_runner_builder: dict[str, Any]) -> None:
+def run_query(query_runner_class: Type[Any], query_runner_builder: dict[str, Any], stage: str) -> None:
     """
     Generic function to run a query using a specified QueryRunner class.
     The incoming class could either be the GeneQueryRunner or SNPQueryRunner.
     Both classes are following the same interface, so they could be combined
     in this function.
     The incoming class is initialized and the run method is called.
-    After the run method is called, the runtime is logged.
+    After the run method is called, the runtime is logged
+    and recorded in the metrics store.
     ----------
     Input:
         - query_runner_class: The QueryRunner class to instantiate and run.
         - query_runner_builder: Dictionary with all necessary arguments.
+        - stage: genes or SNPs, the stage in the metrics store
     ----------
     """
     logging.info("Starting the query running related options...")
@@ -51,6 +58,11 @@ def run_query(query_runner_class: Type[Any], query_runner_builder: dict[str, Any
         "Command raised no errors, runtime: %s seconds",
         runner.get_runtime(),
     )
+    # ? PointFinder is started with python, the method tells which search tool it ran
+    tool = f"PointFinder ({query_runner_builder.get('method')})" if query_runner_class is SNPQueryRunner else os.path.basename(runner.query[0])
+    record_stage(stage, query_runner_builder, runner.get_runtime(), tool)
+    if runner.usage:
+        sample_metrics.record(query_runner_builder["output"], stage, {**runner.usage, "tool": tool})
 
 
 def run_gene_query(query_runner_builder: dict[str, Any]) -> None:
@@ -61,7 +73,7 @@ def run_gene_query(query_runner_builder: dict[str, Any]) -> None:
         - query_runner_builder: Dictionary with all necessary information.
     ----------
     """
-    run_query(GeneQueryRunner, query_runner_builder)
+    run_query(GeneQueryRunner, query_runner_builder, "genes")
 
 
 def run_snp_query(query_runner_builder: dict[str, Any]) -> None:
@@ -72,4 +84,17 @@ def run_snp_query(query_runner_builder: dict[str, Any]) -> None:
         - query_runner_builder: Dictionary with all necessary information.
     ----------
     """
-    run_query(SNPQueryRunner, query_runner_builder)
+    run_query(SNPQueryRunner, query_runner_builder, "SNPs")
+
+
+def run_native_snp_query(query_runner_builder: dict[str, Any]) -> None:
+    """
+    Runs the alignment of the native SNP engine: a BLASTn or KMA
+    search against the SNP genes with the GeneQueryRunner,
+    recorded as SNP search.
+    ----------
+    Input:
+        - query_runner_builder: Dictionary with all necessary information.
+    ----------
+    """
+    run_query(GeneQueryRunner, query_runner_builder, "SNPs")
@@ -17,6 +17,7 @@ __author__ = "Mark van de Streek"
 __date__ = "2025-05-12"
 __all__ = ["SNPQueryRunner"]
 
+import contextlib
 import json
 import logging
 import os
@@ -24,10 +25,15 @@ import shutil
 import tempfile
 import time
 from pathlib import Path
+from typing import Any
 
 from command_utils import CommandInvoker, ShellCommand
 from queries.base_query_runner import BaseQueryRunner
+from queries.input_fifo import InputFifo, fifo_supported
+from queries.kma_runner import KMA
+from queries.pointfinder_adapter import InProcessUnavailable, PointFinderAdapter
 from queries.pointfinder_runner import PointFinder
+from queries.tool_wrapper import write_tool_wrapper
 
 
 class SNPQueryRunner(BaseQueryRunner):
@@ -66,6 +72,8 @@ class SNPQueryRunner(BaseQueryRunner):
         self.check_pointfinder_existence(self.run_options["pointfinder_script_path"])
         self.query = PointFinder.get_query(option=self.run_options)
         self.version_command = PointFinder.get_version_command()
+        # ? the version is requested online, it is cached for the local script
+        self.version_identity = self.run_options["pointfinder_script_path"]
         self.log_tool_version()
 
     def extract_version_number(self, stdout: str) -> str | None:
@@ -131,24 +139,88 @@ class SNPQueryRunner(BaseQueryRunner):
             stop += 1
         return query[:start] + input_files + query[stop:]
 
+    @staticmethod
+    def _replace_option_value(query: list[str], option: str, value: str) -> list[str]:
+        """Replace the value that is passed to a single-value option."""
+        if option not in query:
+            return query
+        index = query.index(option) + 1
+        return query[:index] + [value] + query[index + 1 :]
+
     @staticmethod
     def _merge_input_files(input_files: list[str], output_file: str) -> str:
-        """Concatenate input files into a single temporary file for PointFinder/KMA compatibility."""
+        """Concatenate input files into a single temporary file, used when FIFOs are not supported."""
         with open(output_file, "wb") as out_handle:
             for input_file in input_files:
                 with open(input_file, "rb") as in_handle:
                     shutil.copyfileobj(in_handle, out_handle)
         return output_file
 
+    def _stream_or_merge_input_files(self, input_files: list[str], merged_file: str, stack: contextlib.ExitStack) -> InputFifo | None:
+        """
+        Function that presents the paired input files as one file for PointFinder.
+        By default, a FIFO is fed with R1 and R2 while PointFinder's KMA reads it
+        (see queries/input_fifo.py), so the reads are not copied. PointFinder itself
+        gets a link to R1 as the merged file (it may open it to determine the file type),
+        which the wrapper of KMA replaces by the FIFO. Only if the platform or file system
+        does not support FIFOs, the files are merged into a temporary file.
+        ----------
+        Input:
+            - input_files: the paired input files
+            - merged_file: path of the merged file that PointFinder gets
+            - stack: the ExitStack that stops the feeder of the FIFO after the run
+        Output:
+            - the FIFO that the wrapper of KMA reads instead of the merged file,
+                or None if the files were merged
+        ----------
+        """
+        if fifo_supported():
+            fifo_file = str(Path(merged_file).with_name(f"paired_{Path(merged_file).name}"))
+            try:
+                fifo = stack.enter_context(InputFifo(input_files, fifo_file))
+                os.symlink(os.path.abspath(input_files[0]), merged_file)
+                logging.debug("Streaming paired FASTQ inputs %s through FIFO: %s", input_files, fifo_file)
+                return fifo
+            except OSError as e:
+                logging.debug("Could not create a FIFO for %s (%s), merging into a temporary file", merged_file, e)
+        self._merge_input_files(input_files=input_files, output_file=merged_file)
+        logging.debug("Merged paired FASTQ inputs %s into temporary file: %s", input_files, merged_file)
+        return None
+
+    def run_pointfinder(self, prepared_query: list[str]) -> dict[str, Any] | None:
+        """
+        Function that runs PointFinder in-process (see queries/pointfinder_adapter.py),
+        or as a subprocess if the adapter is unavailable or --pointfinder-subprocess is set.
+        ----------
+        Input:
+            - prepared_query: the PointFinder query
+        Output:
+            - the resource usage of the run
+        ----------
+        """
+        log_prefix = self.get_log_prefix("pointfinder")
+        if not self.run_options.get("pointfinder_subprocess"):
+            try:
+                invoker = CommandInvoker(PointFinderAdapter(prepared_query, log_prefix))
+                invoker.execute()
+                return invoker.usage
+            except InProcessUnavailable as e:
+                logging.debug("Running PointFinder as a subprocess, %s", e)
+        invoker = CommandInvoker(ShellCommand(cmd=prepared_query, log_prefix=log_prefix))
+        invoker.execute()
+        return invoker.usage
+
     def run(self) -> None:
         """
         Override ABC's run() to create temporary symlinks/copies for
         input files before invoking PointFinder. This circumvents issues
         with filenames containing spaces in PointFinder.py, which is an
-        external script/dependency.
+        external script/dependency. If KMA did not read the whole FIFO
+        of paired inputs, PointFinder runs again with a merged file.
         """
         tmp_dir = None
         symlink_map: dict[str, str] = {}
+        stack = contextlib.ExitStack()
         try:
             # ? make tempdir in run output if possible
             out_dir = self.run_options.get("run_output_snps") or tempfile.gettempdir()
@@ -168,20 +240,48 @@ class SNPQueryRunner(BaseQueryRunner):
 
             # ? PointFinder runs KMA with the assumption that there is only 1 input file. Block below merges paired FASTQ into one temporary file to fulfill this assumption.
             input_files = [symlink_map.get(file, file) for file in self.run_options.get("input_file_list", [])]
+            fifo: InputFifo | None = None
+            merged_file = ""
             if self.run_options.get("method") == "kma" and len(input_files) == 2:
                 merged_suffix = ".fastq.gz" if all(file.endswith(".gz") for file in input_files) else ".fastq"
                 # ? Keep the merged basename aligned with the sample prefix that ParsingManager uses to build the expected PointFinder output filename.
                 sample_prefix = Path(input_files[0]).name.split(".")[0].split("_")[0]
                 merged_file = str(Path(tmp_dir) / f"{sample_prefix}{merged_suffix}")
-                self._merge_input_files(input_files=input_files, output_file=merged_file)
+                fifo = self._stream_or_merge_input_files(input_files, merged_file, stack)
                 prepared_query = self._replace_inputfiles_args(prepared_query, [merged_file])
-                logging.debug("Merged paired FASTQ inputs %s into temporary file: %s", input_files, merged_file)
+            replacements = {merged_file: str(fifo.fifo_path)} if fifo is not None else {}
+
+            # ? PointFinder's own KMA/BLASTn call gets the threads, -shm if the KMA database is in
+            #   shared memory (--kma-shm) and the FIFO of the paired reads via a wrapper of the aligner
+            extra_args = PointFinder.get_threads_arguments(self.run_options)
+            if self.run_options.get("method") == "kma" and self.run_options.get("kma_shm"):
+                extra_args.extend(KMA.SHARED_MEMORY_OPTION.value)
+            if extra_args or replacements:
+                wrapper = write_tool_wrapper(self.run_options["method_path"], extra_args, tmp_dir, replacements)
+                prepared_query = self._replace_option_value(prepared_query, "--method_path", wrapper)
+            logging.info("PointFinder runs %s with %s thread(s)", self.run_options.get("method"), self.run_options.get("threads", 1))
 
             logging.debug("Starting the SNP query via PointFinder")
             self.start_time = time.time()
-            CommandInvoker(ShellCommand(cmd=prepared_query, capture=True)).execute()
+            self.usage = self.run_pointfinder(prepared_query)
+            if fifo is not None:
+                fifo.close()
+                if not fifo.is_complete():
+                    # ? KMA did not read the FIFO (e.g. it got another spelling of the path) or only a part
+                    #   of it, so the SNPs would be called from a part of the reads: run again without FIFO
+                    logging.warning(
+                        "KMA did not read the whole stream of %s (readers: %d, error: %s), running PointFinder again with a merged input file",
+                        fifo.fifo_path,
+                        fifo.readers,
+                        fifo.error,
+                    )
+                    os.remove(merged_file)
+                    self._merge_input_files(input_files=input_files, output_file=merged_file)
+                    write_tool_wrapper(self.run_options["method_path"], extra_args, tmp_dir)
+                    self.usage = self.run_pointfinder(prepared_query)
             self.stop_time = time.time()
-        finally:  # ? cleanup any created symlinks/copies and the tempdir
+        finally:  # ? cleanup the FIFO, any created symlinks/copies and the tempdir
+            stack.close()
             if tmp_dir and os.path.isdir(tmp_dir):
                 try:
                     shutil.rmtree(tmp_dir)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Registry of the external tools (KMA, BLASTn, PointFinder).
+Every query logs the version of its tool, which costs a subprocess
+(`kma -v`, `blastn -version`, or a request for PointFinder), and on
+NFS-mounted conda environments every subprocess can take hundreds of
+milliseconds. The registry resolves every executable once per process
+and caches the versions on disk, keyed by the path, inode and
+modification time of the tool, so a version is only requested again
+when the tool is replaced (e.g. by a conda update).
+
+The resolved tools are recorded in the metadata of the run (tools).
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["DEFAULT_VERSION_CACHE", "resolve_tool", "get_tool_version"]
+
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Callable
+
+import run_metadata
+from command_utils import CommandInvoker, ShellCommand
+
+DEFAULT_VERSION_CACHE = Path.home() / ".cache" / "pacini_typing" / "tool_versions.json"
+
+_lock = threading.Lock()
+_paths: dict[str, str | None] = {}
+_versions: dict[str, str | None] = {}
+
+
+def resolve_tool(tool: str) -> str | None:
+    """
+    Function that returns the full path of an executable,
+    resolved once per process (shutil.which).
+    ----------
+    Input:
+        - tool: name or path of the executable
+    Output:
+        - str: the full path, or None if the tool is not found
+    ----------
+    """
+    with _lock:
+        if tool not in _paths:
+            _paths[tool] = shutil.which(tool)
+        return _paths[tool]
+
+
+def get_cache_key(identity_file: str, version_command: list[str]) -> str | None:
+    """
+    Function that returns the key of a tool in the version cache:
+    the path, inode and modification time of the tool (or script)
+    and the version command.
+    ----------
+    Input:
+        - identity_file: the executable or script that identifies the version
+        - version_command: the command that prints the version
+    Output:
+        - str: the cache key, or None if the file does not exist
+    ----------
+    """
+    path = identity_file if os.sep in identity_file else resolve_tool(identity_file)
+    if path is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{os.path.realpath(path)}|{stat.st_ino}|{stat.st_mtime_ns}|{' '.join(version_command)}"
+
+
+def read_version_cache(cache_file: Path) -> dict[str, str | None]:
+    """
+    Function that reads the version cache,
+    a missing or broken cache is treated as empty.
+    ----------
+    Input:
+        - cache_file: path of the cache
+    Output:
+        - dict with the version per cache key
+    ----------
+    """
+    try:
+        with open(cache_file, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_version(cache_file: Path, key: str, version: str | None) -> None:
+    """
+    Function that adds a version to the version cache. The cache is read
+    again before writing and replaced atomically, so concurrent runs
+    do not lose each other's versions. A cache that can not be written
+    (e.g. a read-only home directory) is skipped.
+    ----------
+    Input:
+        - cache_file: path of the cache
+        - key: the cache key of the tool
+        - version: the version of the tool
+    ----------
+    """
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        versions = {**read_version_cache(cache_file), key: version}
+        temporary = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump(versions, handle, indent=2)
+        os.replace(temporary, cache_file)
+    except OSError as error:
+        logging.debug("Could not write the tool version cache %s: %s", cache_file, error)
+
+
+def get_tool_version(
+    version_command: list[str],
+    extract_version: Callable[[str], str | None],
+    identity_file: str | None = None,
+    cache_file: Path | None = None,
+) -> str | None:
+    """
+    Function that returns the version of a tool. The version command
+    only runs if the version is not in the cache of the process or on disk.
+    ----------
+    Input:
+        - version_command: the command that prints the version
+        - extract_version: extracts the version from the output of the command
+        - identity_file: the executable or script that identifies the version,
+            by default the executable of the version command
+        - cache_file: path of the version cache (default: DEFAULT_VERSION_CACHE)
+    Output:
+        - str: the version, or None if it could not be determined
+    ----------
+    """
+    identity_file = identity_file or version_command[0]
+    cache_file = cache_file or DEFAULT_VERSION_CACHE
+    key = get_cache_key(identity_file, version_command) or " ".join(version_command)
+    with _lock:
+        cached = key in _versions
+        version = _versions.get(key)
+    if not cached:
+        disk_cache = read_version_cache(cache_file)
+        if key in disk_cache:
+            version = disk_cache[key]
+        else:
+            logging.debug("Version of %s is not cached, running %s...", identity_file, version_command)
+            stdout, _ = CommandInvoker(ShellCommand(cmd=version_command, capture=True)).execute()
+            version = extract_version(stdout) if stdout else None
+            write_version(cache_file, key, version)
+        with _lock:
+            _versions[key] = version
+    # ? also for a cached version, every run (job of the daemon) records its own tools
+    run_metadata.record("tools", {os.path.basename(identity_file): {"path": key.split("|")[0], "version": version}})
+    return version
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Module that writes small wrapper scripts around external tools.
+PointFinder runs KMA or BLASTn itself, with a fixed set of options,
+using the executable that is passed with --method_path.
+By passing a wrapper script instead, additional options
+can be added to these calls, and arguments can be replaced,
+without changing PointFinder.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["write_tool_wrapper"]
+
+import logging
+import os
+import shlex
+from pathlib import Path
+
+
+def write_tool_wrapper(
+    tool_path: str,
+    extra_args: list[str],
+    directory: str | Path,
+    replacements: dict[str, str] | None = None,
+) -> str:
+    """
+    Function that writes an executable wrapper script that calls
+    the tool with all given arguments, followed by the extra arguments.
+    Arguments that are equal to a key of the replacements are
+    replaced by the value (e.g. an input file by a FIFO).
+    The wrapper has the same file name as the tool and is placed
+    in a separate bin directory, so callers that look at
+    the name of the executable are not affected.
+    ----------
+    Input:
+        - tool_path: path to the executable of the tool
+        - extra_args: arguments that are added to every call
+        - directory: directory in which the wrapper is written
+        - replacements: arguments that are replaced, old -> new
+    Output:
+        - str: path to the wrapper script
+    ----------
+    """
+    bin_dir = Path(directory) / "bin"
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    wrapper = bin_dir / Path(tool_path).name
+    with open(wrapper, "w", encoding="utf-8") as handle:
+        handle.write("#!/bin/sh\n")
+        if replacements:
+            # ? rebuild the arguments, 'for' iterates over the original arguments
+            handle.write("for arg do\n    shift\n    case \"$arg\" in\n")
+            for old, new in replacements.items():
+                handle.write(f"        {shlex.quote(old)}) set -- \"$@\" {shlex.quote(new)} ;;\n")
+            handle.write("        *) set -- \"$@\" \"$arg\" ;;\n    esac\ndone\n")
+        handle.write(f'exec {shlex.quote(tool_path)} "$@" {shlex.join(extra_args)}\n')
+    os.chmod(wrapper, 0o755)
+    logging.debug("Wrapped %s with extra arguments: %s, replaced arguments: %s", tool_path, shlex.join(extra_args), replacements or {})
+    return str(wrapper)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Module with the union database of multiple configurations (--union-database).
+Instead of a KMA or BLASTn search per configuration, the target genes
+of all configurations are combined in a single database and every
+sample is searched once. The template names are prefixed with the
+config id (e.g. O1__ctxA:1:CP001235), and the results are split
+(demultiplexed) back into the output files that the searches of the
+separate configurations would have written, with the original names.
+Every configuration then parses its own results with its own thresholds.
+
+A sequence that occurs in multiple configurations is stored once,
+otherwise KMA would divide the reads between the identical templates.
+The results of such a template are written to all configurations.
+
+The union database is stored next to the database of the first
+configuration and named after the hash of its contents,
+so it is only rebuilt when a target genes file changes.
+
+The same database is used to combine the target genes and the SNP
+genes of a single configuration (--single-alignment, see
+HandleSearchModes.handle_single_alignment_search_modes).
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["SEPARATOR", "UnionDatabase"]
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Callable
+
+SEPARATOR = "__"
+# ? output files of the searches that are read by the parsers
+KMA_EXTENSIONS = (".res", ".aln", ".fsa")
+BLAST_EXTENSION = ".tsv"
+
+
+def read_fasta(fasta_file: str | Path) -> list[tuple[str, str]]:
+    """
+    Function that reads the records of a FASTA file.
+    ----------
+    Input:
+        - fasta_file: path to the FASTA file
+    Output:
+        - list with (header, sequence) per record, without the '>'
+    ----------
+    """
+    records: list[tuple[str, list[str]]] = []
+    with open(fasta_file, "r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.rstrip("\n\r")
+            if line.startswith(">"):
+                records.append((line[1:], []))
+            elif line and records:
+                records[-1][1].append(line.strip())
+    return [(header, "".join(sequence)) for header, sequence in records]
+
+
+class UnionDatabase:
+    """
+    Class that writes the union FASTA file of multiple configurations
+    and demultiplexes the results of a search against it.
+    ----------
+    Methods:
+        - __init__: Constructor, combines the target genes
+        - write: Writes the union FASTA file and the template mapping
+        - demultiplex: Splits the search results per configuration
+    ----------
+    """
+
+    def __init__(self, target_genes: dict[str, str], database_dir: str | Path, name: str = "union") -> None:
+        """
+        Constructor of the UnionDatabase class.
+        ----------
+        Input:
+            - target_genes: target genes FASTA file per config id
+            - database_dir: directory in which the union databases are stored
+            - name: prefix of the database name
+        ----------
+        """
+        self.records: list[tuple[str, str]] = []
+        # ? first token of a union template -> (config id, original header) of every configuration
+        self.templates: dict[str, list[tuple[str, str]]] = {}
+        owners: dict[str, list[str]] = {}
+        for config_id, fasta_file in target_genes.items():
+            for header, sequence in read_fasta(fasta_file):
+                # ? a sequence is shared with an earlier configuration, unless this configuration already uses it
+                union_name = next(
+                    (name for name in owners.get(sequence, []) if config_id not in {owner for owner, _ in self.templates[name]}),
+                    None,
+                )
+                if union_name is None:
+                    union_name = f"{config_id}{SEPARATOR}{header.split()[0]}"
+                    self.records.append((f"{config_id}{SEPARATOR}{header}", sequence))
+                    self.templates[union_name] = []
+                    owners.setdefault(sequence, []).append(union_name)
+                self.templates[union_name].append((config_id, header))
+        content = "".join(f">{header}\n{sequence}\n" for header, sequence in self.records)
+        self.database_name = f"{name}_{hashlib.sha256(content.encode()).hexdigest()[:12]}"
+        self.database_path = str(Path(database_dir) / self.database_name) + "/"
+        self.fasta_file = os.path.join(self.database_path, f"{self.database_name}.fasta")
+        self.content = content
+
+    def write(self) -> None:
+        """
+        Function that writes the union FASTA file and the template
+        mapping, if they do not exist yet.
+        """
+        if os.path.exists(self.fasta_file):
+            return
+        logging.info("Writing union database %s with %d templates...", self.database_name, len(self.records))
+        os.makedirs(self.database_path, exist_ok=True)
+        with open(f"{self.fasta_file}.tmp", "w", encoding="utf-8") as handle:
+            handle.write(self.content)
+        with open(os.path.join(self.database_path, "templates.json"), "w", encoding="utf-8") as handle:
+            json.dump(self.templates, handle, indent=2)
+        os.replace(f"{self.fasta_file}.tmp", self.fasta_file)
+
+    def _get_targets(self, template: str) -> list[tuple[str, str]]:
+        """
+        Function that returns the configurations of a union template.
+        ----------
+        Input:
+            - template: the (full) template name of the union database
+        Output:
+            - list with (config id, original header) per configuration
+        ----------
+        """
+        return self.templates.get(template.split()[0], [])
+
+    def _split_lines(
+        self,
+        source: str,
+        targets: dict[str, str],
+        get_template: Callable[[str], str | None],
+        rename: Callable[[str, str], str],
+        header_lines: int = 0,
+    ) -> None:
+        """
+        Function that splits the lines of an output file per configuration.
+        A line with a template starts a new block, the lines after it
+        (e.g. the alignment lines) belong to the same template.
+        ----------
+        Input:
+            - source: output file of the union search
+            - targets: output file per config id
+            - get_template: returns the template of a line or None
+            - rename: replaces the union template of a line by the original header
+            - header_lines: number of header lines that all outputs get
+        ----------
+        """
+        handles = {config_id: open(target, "w", encoding="utf-8") for config_id, target in targets.items()}
+        try:
+            current: list[tuple[str, str]] = []
+            with open(source, "r", encoding="utf-8") as handle:
+                for number, line in enumerate(handle):
+                    if number < header_lines:
+                        for output in handles.values():
+                            output.write(line)
+                        continue
+                    if (template := get_template(line)) is not None:
+                        current = self._get_targets(template)
+                        for config_id, header in current:
+                            handles[config_id].write(rename(line, header))
+                    else:
+                        for config_id, _ in current:
+                            handles[config_id].write(line)
+        finally:
+            for output in handles.values():
+                output.close()
+
+    def demultiplex(self, union_output: str, outputs: dict[str, str], file_type: str) -> None:
+        """
+        Function that splits the results of the search against the
+        union database into the output files of the configurations,
+        with the original template names.
+        ----------
+        Input:
+            - union_output: output prefix of the union search
+            - outputs: output prefix per config id
+            - file_type: FASTA (BLASTn results) or FASTQ (KMA results)
+        ----------
+        """
+        logging.info("Splitting the union search results over %d configurations...", len(outputs))
+        for output in outputs.values():
+            os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        if file_type == "FASTA":
+            self._split_lines(
+                union_output + BLAST_EXTENSION,
+                {config_id: output + BLAST_EXTENSION for config_id, output in outputs.items()},
+                lambda line: line.split("\t")[1] if line.strip() else None,
+                lambda line, header: "\t".join([line.split("\t")[0], header.split()[0], *line.split("\t")[2:]]),
+            )
+            return
+        # ? KMA: .res is a table with a header, .aln and .fsa contain blocks per template
+        self._split_lines(
+            union_output + ".res",
+            {config_id: output + ".res" for config_id, output in outputs.items()},
+            lambda line: line.split("\t")[0] if line.strip() else None,
+            lambda line, header: "\t".join([header, *line.split("\t")[1:]]),
+            header_lines=1,
+        )
+        for extension, marker in ((".aln", "# "), (".fsa", ">")):
+            if os.path.exists(union_output + extension):
+                self._split_lines(
+                    union_output + extension,
+                    {config_id: output + extension for config_id, output in outputs.items()},
+                    lambda line, marker=marker: line[len(marker) :].rstrip("\n") if line.startswith(marker) else None,
+                    lambda line, header, marker=marker: f"{marker}{header}\n",
+                )
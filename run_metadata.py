@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Module that collects the metadata of a run of Pacini-typing,
+like the command, the version and the effective settings that
+were chosen by the application itself (e.g. --threads auto).
+Other modules record their values during the run and the
+metadata is written as run_metadata.json to the report directory.
+The metadata belongs to the context of a run, every job of the daemon
+starts its own run (see start_run), so jobs that run at the same time
+do not mix their start time, command, threads and tools.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["start_run", "record", "get_run_metadata", "write_run_metadata"]
+
+import contextvars
+import json
+import logging
+import sys
+import threading
+import time
+from importlib.metadata import PackageNotFoundError
+from importlib.metadata import version as get_version
+from pathlib import Path
+from typing import Any
+
+_lock = threading.Lock()
+# ? metadata of the current run, by default the run of the process itself
+_metadata: contextvars.ContextVar[dict[str, Any]] = contextvars.ContextVar(
+    "run_metadata",
+    default={"started": time.strftime("%Y-%m-%dT%H:%M:%S"), "command": sys.argv},
+)
+
+
+def start_run(command: list[str]) -> None:
+    """
+    Function that starts the metadata of a new run in the current
+    context (thread), used for the jobs of the daemon.
+    ----------
+    Input:
+        - command: the arguments of the run
+    ----------
+    """
+    _metadata.set({"started": time.strftime("%Y-%m-%dT%H:%M:%S"), "command": command})
+
+
+def record(key: str, value: Any) -> None:
+    """
+    Function that records a value in the metadata of the run.
+    Dictionaries are merged with an already recorded dictionary.
+    ----------
+    Input:
+        - key: name of the value
+        - value: the value (must be JSON serializable)
+    ----------
+    """
+    metadata = _metadata.get()
+    with _lock:
+        if isinstance(value, dict) and isinstance(metadata.get(key), dict):
+            metadata[key].update(value)
+        else:
+            metadata[key] = value
+
+
+def get_run_metadata() -> dict[str, Any]:
+    """
+    Function that returns a copy of the metadata of the run.
+    ----------
+    Output:
+        - dict with the metadata
+    ----------
+    """
+    metadata = _metadata.get()
+    with _lock:
+        return json.loads(json.dumps(metadata, default=str))
+
+
+def write_run_metadata(directory: str | Path) -> Path:
+    """
+    Function that writes the metadata of the run
+    to run_metadata.json in the given directory.
+    ----------
+    Input:
+        - directory: the report directory
+    Output:
+        - Path: path to the metadata file
+    ----------
+    """
+    try:
+        pacini_version = get_version("pacini_typing")
+    except PackageNotFoundError:
+        pacini_version = "unknown"
+    metadata = get_run_metadata()
+    metadata.update(version=pacini_version, finished=time.strftime("%Y-%m-%dT%H:%M:%S"))
+    metadata_file = Path(directory) / "run_metadata.json"
+    metadata_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(metadata_file, "w", encoding="utf-8") as handle:
+        json.dump(metadata, handle, indent=2, default=str)
+    logging.debug("Wrote run metadata to %s", metadata_file)
+    return metadata_file
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Module that collects the resource usage of the searches of a sample
+(see get_usage in command_utils.py) and writes it to
+<sample>_metrics.json next to the report. This shows per tool
+whether a slow sample was CPU-bound (user time close to the wall
+time times the threads), I/O-bound (block I/O, voluntary context
+switches) or limited by memory (peak RSS).
+
+The usage is collected per output prefix of the searches, which is
+unique per sample and configuration, so samples that are typed at
+the same time (daemon mode, multiple configurations) are kept apart.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["record", "pop_records", "write_sample_metrics"]
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any
+
+_lock = threading.Lock()
+_records: dict[str, list[dict[str, Any]]] = {}
+
+
+def record(output: str, stage: str, usage: dict[str, Any]) -> None:
+    """
+    Function that records the resource usage of a search.
+    ----------
+    Input:
+        - output: the output prefix of the search
+        - stage: genes or SNPs
+        - usage: the resource usage of the command
+    ----------
+    """
+    with _lock:
+        _records.setdefault(output, []).append({"stage": stage, **usage})
+
+
+def pop_records(output: str) -> list[dict[str, Any]]:
+    """
+    Function that returns and removes the records of an output prefix.
+    ----------
+    Input:
+        - output: the output prefix of the searches
+    Output:
+        - list with the resource usage per search
+    ----------
+    """
+    with _lock:
+        return _records.pop(output, [])
+
+
+def write_sample_metrics(metrics_file: str | Path, sample_name: str, records: list[dict[str, Any]]) -> None:
+    """
+    Function that writes the resource usage of the searches of a sample.
+    Nothing is written if there are no records (e.g. no search ran).
+    ----------
+    Input:
+        - metrics_file: path of the metrics file
+        - sample_name: the name of the sample
+        - records: the resource usage per search
+    ----------
+    """
+    if not records:
+        return
+    Path(metrics_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(metrics_file, "w", encoding="utf-8") as handle:
+        json.dump({"sample": sample_name, "commands": records}, handle, indent=2)
+    logging.debug("Wrote resource usage of %d command(s) to %s", len(records), metrics_file)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Thin client that submits a typing job to a running
+Pacini-typing daemon (pacini_typing serve).
+
+This module deliberately only uses the standard library,
+so starting the client is fast. All heavy work is done by the daemon.
+Paths are converted to absolute paths, since the daemon
+may run in a different working directory.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["submit", "main"]
+
+import argparse
+import csv
+import json
+import os
+import socket
+import sys
+import tempfile
+from typing import Any
+
+
+def submit(socket_path: str, request: dict[str, Any]) -> dict[str, Any]:
+    """
+    Function that sends a single request to the daemon
+    and waits for the response.
+    ----------
+    Input:
+        - socket_path: path of the Unix socket of the daemon
+        - request: the typing job (see service/daemon.py)
+    Output:
+        - dict with the response of the daemon
+    ----------
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with connection.makefile("r", encoding="utf-8") as handle:
+            response: dict[str, Any] = json.loads(handle.readline())
+    return response
+
+
+def main(provided_args: list[str] | None = None) -> int:
+    """
+    Main entry point of the pacini_typing_submit command.
+    The report path is printed, or the rows of the
+    report as CSV if --rows is selected.
+    ----------
+    Input:
+        - provided_args: list with arguments for testing purposes or None
+    Output:
+        - int: exit code, 1 if the job failed
+    ----------
+    """
+    parser = argparse.ArgumentParser(
+        prog="pacini_typing_submit",
+        description="Submit a typing job to a running Pacini-typing daemon",
+    )
+    parser.add_argument("-c", "--config", required=True, metavar="File", help="Path to predefined configuration file")
+    parser.add_argument("-i", "--input", required=True, nargs="+", metavar="File", help="Path to input file(s)")
+    parser.add_argument("-o", "--output-report", default=".", metavar="Directory", help="Path to output directory")
+    parser.add_argument("-m", "--search_mode", choices=["SNPs", "genes", "both"], default="genes", help="Search mode to use")
+    parser.add_argument("-t", "--threads", type=int, default=1, metavar="Threads", help="Number of threads to use")
+    parser.add_argument("-f", "--fasta-out", action="store_true", help="Write found sequences to a FASTA output file")
+    parser.add_argument("--rows", action="store_true", help="Print the rows of the report instead of its path")
+    parser.add_argument(
+        "-s",
+        "--socket",
+        default=os.path.join(tempfile.gettempdir(), "pacini_typing.sock"),
+        metavar="File",
+        help="Path of the Unix socket of the daemon",
+    )
+    args = parser.parse_args(provided_args if provided_args is not None else sys.argv[1:])
+
+    response = submit(
+        args.socket,
+        {
+            "config": os.path.abspath(args.config),
+            "input": [os.path.abspath(file) for file in args.input],
+            "output_report": os.path.abspath(args.output_report),
+            "search_mode": args.search_mode,
+            "threads": args.threads,
+            "fasta_out": args.fasta_out,
+            "return_rows": args.rows,
+        },
+    )
+    if response["status"] != "ok":
+        print(f"Typing job failed: {response['error']}", file=sys.stderr)
+        return 1
+    if args.rows:
+        rows = response.get("rows", [])
+        if rows:
+            writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        print(response["report"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
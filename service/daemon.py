@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Module that implements the persistent daemon mode of Pacini-typing (serve).
+
+Every normal invocation of Pacini-typing pays for starting Python,
+importing pandas/yaml, reading and validating the configuration file
+and checking the versions of the tools. For small assemblies, this takes
+longer than the actual search. The daemon keeps this state warm:
+    - all modules are imported once
+    - configuration files are read and validated once, and cached
+        (a cached config is invalidated when the file changes)
+    - tool versions are only requested once (see BaseQueryRunner)
+    - a pool of worker threads is kept alive
+
+Typing jobs are accepted on a local Unix socket. The protocol is
+a single JSON line per request and a single JSON line as response:
+
+    request:  {"config": "/abs/O1.yaml", "input": ["/abs/sample.fasta"],
+               "search_mode": "genes", "output_report": "/abs/reports",
+               "threads": 1, "fasta_out": false, "return_rows": true}
+    response: {"status": "ok", "sample": "sample",
+               "report": "/abs/reports/sample_report.csv", "rows": [...],
+               "seconds": 1.23}
+
+Requests are sent with the thin client in service/client.py
+(pacini_typing_submit), which does not import any heavy modules.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["TypingService", "TypingServer", "serve"]
+
+import copy
+import csv
+import errno
+import json
+import logging
+import os
+import shutil
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import run_metadata
+from command_utils import get_tool_timeouts, submit_in_context
+from parsing.read_config_pattern import ReadConfigPattern
+from thread_budget import divide_threads, get_usable_cpus
+
+
+class ConfigPatternCache:
+    """
+    Thread-safe cache of validated configuration files.
+    Every job receives a deep copy of the cached ReadConfigPattern,
+    since the pattern is extended with sample specific information.
+    ----------
+    Methods:
+        - get: Returns a copy of a cached pattern or creates it
+    ----------
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor of the ConfigPatternCache class.
+        """
+        self.patterns: dict[tuple[Any, ...], ReadConfigPattern] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple[Any, ...], create: Any) -> ReadConfigPattern:
+        """
+        Function that returns a copy of a cached pattern.
+        The modification time of the config file is part of the key,
+        so an edited configuration file is read again.
+        ----------
+        Input:
+            - key: tuple that identifies the pattern, starting with
+                the path of the configuration file
+            - create: function that creates the pattern on a cache miss
+        Output:
+            - ReadConfigPattern: a private copy of the pattern
+        ----------
+        """
+        full_key = (*key, os.path.getmtime(key[0]))
+        with self.lock:
+            if full_key not in self.patterns:
+                logging.info("Reading and caching configuration %s...", key[0])
+                self.patterns[full_key] = create()
+            return copy.deepcopy(self.patterns[full_key])
+
+
+class TypingService:
+    """
+    Class that holds the warm state of the daemon and runs the typing jobs.
+    Every job runs through the normal PaciniTyping flow, so the results
+    are identical to a normal run. Every job gets its own temporary directory,
+    so jobs that run at the same time do not remove each other's intermediates,
+    and its own run metadata and tool timeouts.
+    ----------
+    Methods:
+        - __init__: Constructor, keeps the warm state
+        - build_arguments: Converts a request to command line arguments
+        - run_job: Runs a single typing job
+    ----------
+    """
+
+    def __init__(self, tmp_root: str | Path, workers: int = 1) -> None:
+        """
+        Constructor of the TypingService class.
+        ----------
+        Input:
+            - tmp_root: directory in which the job directories are created
+            - workers: number of jobs that may run at the same time,
+                used to divide the CPUs for jobs with threads 'auto'
+        ----------
+        """
+        self.tmp_root = Path(tmp_root)
+        self.tmp_root.mkdir(parents=True, exist_ok=True)
+        self.config_cache = ConfigPatternCache()
+        self.workers = workers
+        self.usable_cpus: int | None = None
+        # ? the --timeout of the daemon, passed to every job (see build_arguments)
+        self.tool_timeouts = get_tool_timeouts()
+
+    def build_arguments(self, request: dict[str, Any], tmp_dir: str) -> list[str]:
+        """
+        Function that converts an incoming request into the
+        command line arguments of a normal Pacini-typing run.
+        The timeouts of the daemon are passed as --timeout of the job.
+        ----------
+        Input:
+            - request: the incoming request
+            - tmp_dir: the temporary directory of the job
+        Output:
+            - list with command line arguments
+        ----------
+        """
+        arguments = [
+            "--config",
+            request["config"],
+            "--input",
+            *request["input"],
+            "--search_mode",
+            request.get("search_mode", "genes"),
+            "--output-report",
+            request.get("output_report", "."),
+            "--tmp-dir",
+            tmp_dir,
+            "--threads",
+            str(request.get("threads", 1)),
+        ]
+        if request.get("fasta_out"):
+            arguments.append("--fasta-out")
+        for tool, timeout in self.tool_timeouts.items():
+            arguments.extend(["--timeout", f"{tool}={timeout}"])
+        return arguments
+
+    def run_job(self, request: dict[str, Any]) -> dict[str, Any]:
+        """
+        Function that runs a single typing job.
+        The modules are imported here, and not at the top of the
+        module, since pacini_typing imports this module for the serve option.
+        ----------
+        Input:
+            - request: the incoming request
+        Output:
+            - dict with the response
+        ----------
+        """
+        # pylint: disable=import-outside-toplevel
+        import preprocessing.argsparse.build_parser
+        from pacini_typing import PaciniTyping
+
+        start = time.time()
+        if str(request.get("threads", 1)).lower() == "auto":
+            # ? every worker gets an equal part of the usable CPUs, instead of all CPUs per job
+            if self.usable_cpus is None:
+                self.usable_cpus = get_usable_cpus()[0]
+            request = {**request, "threads": divide_threads(self.usable_cpus, self.workers)}
+        tmp_dir = tempfile.mkdtemp(prefix="job_", dir=self.tmp_root)
+        arguments = self.build_arguments(request, tmp_dir)
+        # ? the job runs in its own context (see TypingRequestHandler), so it gets its own metadata
+        run_metadata.start_run(arguments)
+        args = preprocessing.argsparse.build_parser.main(arguments)
+        pacini_typing = PaciniTyping(args, pattern_cache=self.config_cache)
+        try:
+            pacini_typing.split_flow_and_execute()
+        finally:
+            # ? intermediates are already removed or archived by the run itself
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        report = Path(request.get("output_report", ".")) / f"{pacini_typing.sample_name}_report.csv"
+        response: dict[str, Any] = {
+            "status": "ok",
+            "sample": pacini_typing.sample_name,
+            "report": str(report.resolve()),
+            "seconds": round(time.time() - start, 2),
+        }
+        if request.get("return_rows") and report.is_file():
+            with open(report, "r", encoding="utf-8", newline="") as handle:
+                response["rows"] = list(csv.DictReader(handle))
+        return response
+
+
+class TypingRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handler for a single connection on the Unix socket.
+    The request is read as a JSON line, executed in the worker pool
+    of the server and the response is written back as a JSON line.
+    ----------
+    Methods:
+        - handle: Handles a single request
+    ----------
+    """
+
+    server: "TypingServer"
+
+    def handle(self) -> None:
+        """
+        Function that handles a single request.
+        All errors, including SystemExit from the validation steps,
+        are converted into an error response, so a bad job never
+        stops the daemon.
+        """
+        try:
+            request = json.loads(self.rfile.readline())
+            response = submit_in_context(self.server.pool, self.server.service.run_job, request).result()
+        except BaseException as e:  # pylint: disable=broad-exception-caught
+            logging.error("Typing job failed: %s", e)
+            response = {"status": "error", "error": str(e) or e.__class__.__name__}
+        self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+
+
+def is_listening(socket_path: str) -> bool:
+    """
+    Little helper function that checks if a process accepts
+    connections on a Unix socket.
+    ----------
+    Input:
+        - socket_path: path of the Unix socket
+    Output:
+        - bool: True if a connection could be made
+    ----------
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(1.0)
+        try:
+            client.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+
+class TypingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket server of the daemon. Connections are accepted in
+    separate threads, the jobs themselves run in a bounded worker pool.
+    ----------
+    Methods:
+        - __init__: Constructor, binds the socket and starts the pool
+        - server_close: Closes the socket and the pool
+    ----------
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str | Path, service: Any, workers: int = 1) -> None:
+        """
+        Constructor of the TypingServer class.
+        A stale socket file of a previous daemon is removed,
+        a socket on which a daemon still answers is left alone.
+        ----------
+        Input:
+            - socket_path: path of the Unix socket
+            - service: object with a run_job(request) method
+            - workers: number of jobs that may run at the same time
+        Raises:
+            - OSError: if another daemon is listening on the socket
+        ----------
+        """
+        self.socket_path = str(socket_path)
+        if os.path.exists(self.socket_path):
+            if is_listening(self.socket_path):
+                raise OSError(errno.EADDRINUSE, f"Another Pacini-typing daemon is listening on {self.socket_path}")
+            logging.info("Removing stale socket %s", self.socket_path)
+            os.remove(self.socket_path)
+        self.service = service
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pacini-job")
+        super().__init__(self.socket_path, TypingRequestHandler)
+
+    def server_close(self) -> None:
+        """
+        Function that closes the server, waits for the running
+        jobs and removes the socket file.
+        """
+        super().server_close()
+        self.pool.shutdown(wait=True)
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+def serve(socket_path: str | Path, workers: int, tmp_root: str | Path) -> None:
+    """
+    Function that starts the daemon and serves until it is interrupted.
+    ----------
+    Input:
+        - socket_path: path of the Unix socket
+        - workers: number of jobs that may run at the same time
+        - tmp_root: directory for the temporary job directories
+    ----------
+    """
+    server = TypingServer(socket_path, TypingService(tmp_root, workers), workers)
+    logging.info("Pacini-typing daemon listening on %s with %d worker(s)", socket_path, workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Stopping Pacini-typing daemon...")
+    finally:
+        server.server_close()
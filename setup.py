@@ -33,11 +33,16 @@ setup(
         "handle_search_modes",
         "make_snp_database",
         "codon_table_enum",
+        "thread_budget",
+        "run_metadata",
+        "sample_metrics",
+        "process_sampler",
     ],
     entry_points={
         "console_scripts": [
             "pacini_typing = pacini_typing:main",
             "Pacini-typing = pacini_typing:main",
+            "pacini_typing_submit = service.client:main",
         ],
     },
 )
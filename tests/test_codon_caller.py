@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Test module for the native codon caller and the native SNP engine.
+The alignments are small KMA and BLASTn outputs of a gene
+with the codon S3 (TCC), of which F and Y are configured.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = [
+    "test_get_codons",
+    "test_kma_alignment_calls",
+    "test_blast_reverse_strand_calls",
+    "test_native_snp_engine",
+    "test_get_snp_engine",
+]
+
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from unittest import mock
+
+import pytest
+
+import handle_search_modes
+from handle_search_modes import HandleSearchModes
+from parsing.codon_caller import CodonCaller, reverse_complement
+from parsing.read_config_pattern import ReadConfigPattern
+from parsing.snp_parser import SNPParser
+from preprocessing.exceptions.parsing_exceptions import YAMLStructureError
+
+GENE = "ATGGCTTCCAAAGGT"
+SNP_LIST = [
+    {"SNP": "gyrA", "ref": "TCC", "alt": "F,Y", "pos": 3},
+    {"SNP": "gyrA", "ref": "AAA", "alt": "R", "pos": 4},
+    {"SNP": "parC", "ref": "ATG", "alt": "L", "pos": 1},
+]
+CONFIG = {"metadata": {"filename": "test.yaml", "type": "test"}}
+
+
+@pytest.mark.parametrize(
+    "gene_row, query_row, position, expected",
+    [
+        (GENE, "ATGGCTTTCAAAGGT", 3, ("TCC", "TTC")),
+        ("ATG--GCTTCC", "ATGAAGCTTAC", 3, ("TCC", "TAC")),
+        ("ATGGCTT-CC", "ATGGCTTACC", 3, None),
+        (GENE, "ATGGCTT-CAAAGGT", 3, None),
+        (GENE, "ATGGCT---------", 3, None),
+    ],
+)
+def test_get_codons(gene_row: str, query_row: str, position: int, expected: tuple[str, str] | None) -> None:
+    """
+    Test the mapping of alignment columns to the codons of the gene:
+    an insertion before the codon shifts the columns, an insertion or
+    deletion in the codon and an uncovered codon are not called.
+    """
+    assert CodonCaller.get_codons(1, gene_row, query_row, position) == expected
+    assert CodonCaller.get_codons(4, gene_row[3:], query_row[3:], position) == expected
+    assert CodonCaller.get_codons(9, gene_row, query_row, position) is None
+
+
+def test_kma_alignment_calls(tmp_path: Path) -> None:
+    """
+    Test the calls from a KMA alignment: the substitution of an
+    alternative is called, a synonymous and an unconfigured change are not,
+    and the results are reported by the SNPParser like PointFinder's.
+    """
+    (tmp_path / "sample_snps.aln").write_text(
+        "# gyrA\n"
+        f"template: \t{GENE[:9]}\n          \t||||||||_\nquery:    \t{GENE[:6]}TTC\n\n"
+        f"template: \t{GENE[9:]}\n          \t|||_||\nquery:    \tAAGGGT\n\n",
+        encoding="utf-8",
+    )
+    results_file = tmp_path / "snps" / "sample_kma_results.tsv"
+
+    calls = CodonCaller(SNP_LIST, "FASTQ").write_results(str(tmp_path / "sample_snps"), str(results_file))
+    parser = SNPParser(CONFIG, "sample", "FASTQ", str(results_file))
+    parser.parse()
+
+    assert calls == 1
+    assert parser.output_report.iloc[0][["Hits", "Reference nucleotide", "Alternative nucleotide", "Position", "Amino acid change"]].tolist() == [
+        "p.S3F",
+        "TCC",
+        "TTC",
+        "3",
+        "S3F",
+    ]
+
+
+def test_blast_reverse_strand_calls(tmp_path: Path) -> None:
+    """
+    Test the calls from BLASTn hits: a hit on the reverse strand of the
+    gene is reverse complemented, and without hits an empty report is written.
+    """
+    query = f"{GENE[:6]}TAC{GENE[9:]}"
+    row = ["contig_1", "gyrA", "93.3", "15", "1", "0", "1", "15", "15", "1", "1e-5", "20", "100", reverse_complement(query), "15", "0", reverse_complement(GENE)]
+    (tmp_path / "sample_snps.tsv").write_text("\t".join(row) + "\n", encoding="utf-8")
+    results_file = tmp_path / "sample_blastn_results.tsv"
+
+    assert CodonCaller(SNP_LIST, "FASTA").write_results(str(tmp_path / "sample_snps"), str(results_file)) == 1
+    assert "gyrA p.S3Y\tTCC -> TAC\tS -> Y" in results_file.read_text(encoding="utf-8")
+    assert CodonCaller(SNP_LIST, "FASTA").write_results(str(tmp_path / "missing"), str(results_file)) == 0
+    parser = SNPParser(CONFIG, "sample", "FASTA", str(results_file))
+    parser.parse()
+    assert parser.data_frame.empty
+
+
+def test_native_snp_engine(tmp_path: Path) -> None:
+    """
+    Test that the native engine searches the SNP genes once, instead of
+    running PointFinder, and writes the calls where the SNPParser reads them.
+    The BLASTn search is replaced by a function that writes its output.
+    """
+    queries: list[dict[str, Any]] = []
+
+    def search(builder: dict[str, Any]) -> None:
+        queries.append(builder)
+        row = ["contig_1", "gyrA", "93.3", "15", "1", "0", "1", "15", "1", "15", "1e-5", "20", "100", f"{GENE[:6]}TTC{GENE[9:]}", "15", "0", GENE]
+        Path(f"{builder['output']}.tsv").write_text("\t".join(row) + "\n", encoding="utf-8")
+
+    pattern: Any = SimpleNamespace(
+        pattern={},
+        creation_dict={
+            "file_type": "FASTA",
+            "snp_engine": "native",
+            "output": str(tmp_path / "gene" / "sample"),
+            "run_output_snps": str(tmp_path / "snp"),
+            "SNP_list": SNP_LIST,
+        },
+    )
+    (tmp_path / "snp").mkdir()
+    database = {"database_path": "databases/SNP/gyrA/", "database_name": "gyrA"}
+    with mock.patch.object(handle_search_modes, "run_native_snp_query", search), mock.patch.object(
+        HandleSearchModes, "validate_or_create_SNP_database"
+    ), mock.patch.object(HandleSearchModes, "validate_or_create_snp_gene_database", return_value=database), mock.patch.object(
+        handle_search_modes, "run_snp_query"
+    ) as pointfinder:
+        HandleSearchModes(pattern, {"config": {"search_mode": "SNPs"}}).handle()
+
+    assert [(query["database_name"], query["output"], query["subject_alignments"]) for query in queries] == [
+        ("gyrA", str(tmp_path / "snp" / "sample_snps"), True)
+    ]
+    assert "gyrA p.S3F" in (tmp_path / "snp" / "sample_blastn_results.tsv").read_text(encoding="utf-8")
+    pointfinder.assert_not_called()
+
+
+def test_get_snp_engine(tmp_path: Path) -> None:
+    """
+    Test the reading and validation of the snp_engine of the configuration.
+    """
+    config = Path("config/O1.yaml").read_text(encoding="utf-8")
+    native = tmp_path / "native.yaml"
+    native.write_text(config + "\nsnp_engine: Native\n", encoding="utf-8")
+    assert ReadConfigPattern("config/O1.yaml", "fasta", "genes").get_snp_engine() == "pointfinder"
+    assert ReadConfigPattern(str(native), "fasta", "genes").get_snp_engine() == "native"
+
+    wrong = tmp_path / "wrong.yaml"
+    wrong.write_text(config + "\nsnp_engine: blast\n", encoding="utf-8")
+    with pytest.raises(YAMLStructureError):
+        ReadConfigPattern(str(wrong), "fasta", "genes").get_snp_engine()
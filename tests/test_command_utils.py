@@ -22,15 +22,59 @@ __all__ = [
     "test_execute_with_stdout",
     "test_execute_failing_command_allow_fail_false",
     "test_execute_failing_command_allow_fail_true",
+    "test_execute_streaming_to_log_files",
+    "test_execute_streaming_failure_keeps_tail",
+    "test_output_log_rotation",
+    "test_execute_records_resource_usage",
+    "test_write_sample_metrics",
+    "test_pipeline_chains_commands",
+    "test_pipeline_python_stage",
+    "test_pipeline_reports_first_failure",
+    "test_pipeline_missing_command_cleans_up",
+    "test_pipeline_missing_command_after_python_stage",
+    "test_pipeline_timeout_stops_stages",
+    "test_async_command_like_shell_command",
+    "test_async_commands_limited_per_resource_class",
+    "test_async_command_failure",
+    "test_timeout_stops_process_group",
+    "test_wait_error_is_raised",
+    "test_async_timeout_stops_process_group",
+    "test_tool_timeouts",
+    "test_tool_timeouts_per_context",
+    "test_stop_process_groups_of_other_threads",
 ]
 
+import argparse
+import contextvars
+import json
 import os
-from typing import Generator, TextIO, Tuple
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Generator, Iterable, Iterator, TextIO, Tuple
+from unittest import mock
 
 import pytest
 
-from command_utils import CommandInvoker, ShellCommand
-from preprocessing.exceptions.command_utils_exceptions import SubprocessError
+import command_utils
+import sample_metrics
+from command_utils import (
+    AsyncShellCommand,
+    CommandInvoker,
+    PipelineCommand,
+    ShellCommand,
+    execute_concurrently,
+    get_tool_timeout,
+    parse_tool_timeout,
+    reset_process_groups,
+    set_command_limits,
+    set_tool_timeouts,
+    stop_process_groups,
+    submit_in_context,
+)
+from preprocessing.exceptions.command_utils_exceptions import CommandTimeoutError, SubprocessError
 
 
 @pytest.fixture
@@ -115,3 +159,415 @@ def test_execute_failing_command_allow_fail_true() -> None:
     """
     result = CommandInvoker(ShellCommand(cmd=["false"], allow_fail=True)).execute()
     assert result is False
+
+
+def test_execute_streaming_to_log_files(tmp_path: Path) -> None:
+    """
+    Test that the output of a streaming command is written to the log files.
+    """
+    result = CommandInvoker(ShellCommand(cmd="echo out; echo err >&2", log_prefix=tmp_path / "sample.tool")).execute()
+
+    assert result is True
+    assert (tmp_path / "sample.tool.stdout.log").read_text(encoding="utf-8") == "out\n"
+    assert (tmp_path / "sample.tool.stderr.log").read_text(encoding="utf-8") == "err\n"
+
+
+def test_execute_streaming_failure_keeps_tail(tmp_path: Path) -> None:
+    """
+    Test that only the tail of stderr is used in the error of a failing command.
+    """
+    with mock.patch.object(command_utils, "TAIL_BYTES", 10):
+        with pytest.raises(SubprocessError) as error:
+            CommandInvoker(ShellCommand(cmd="seq 1 1000 >&2; exit 3", log_prefix=tmp_path / "fail")).execute()
+        assert CommandInvoker(ShellCommand(cmd="exit 3", log_prefix=tmp_path / "allowed", allow_fail=True)).execute() is False
+
+    assert error.value.message == "\n998\n999\n1000\n"[-10:]
+    assert (tmp_path / "fail.stderr.log").read_text(encoding="utf-8").splitlines() == [str(number) for number in range(1, 1001)]
+
+
+def test_output_log_rotation(tmp_path: Path) -> None:
+    """
+    Test that a log file is rotated when it exceeds the maximum size.
+    """
+    with mock.patch.object(command_utils, "LOG_MAX_BYTES", 100), mock.patch.object(command_utils, "LOG_BACKUPS", 2):
+        CommandInvoker(ShellCommand(cmd="for i in 1 2 3 4; do head -c 80 /dev/zero; sleep 0.05; done", log_prefix=tmp_path / "big")).execute()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["big.stderr.log", "big.stdout.log", "big.stdout.log.1", "big.stdout.log.2"]
+    assert all(path.stat().st_size <= 100 for path in tmp_path.iterdir())
+
+
+def test_execute_records_resource_usage(tmp_path: Path) -> None:
+    """
+    Test that the resource usage of a command is kept by the invoker,
+    both with and without streaming.
+    """
+    streaming = CommandInvoker(ShellCommand(cmd=["python3", "-c", "sum(range(3_000_000))"], log_prefix=tmp_path / "busy"))
+    streaming.execute()
+    captured = CommandInvoker(ShellCommand(cmd=["false"], allow_fail=True))
+    captured.execute()
+
+    assert streaming.usage is not None and captured.usage is not None
+    assert streaming.usage["tool"] == "python3"
+    assert streaming.usage["returncode"] == 0
+    assert streaming.usage["user_seconds"] + streaming.usage["system_seconds"] > 0
+    assert streaming.usage["max_rss_mb"] > 0
+    assert captured.usage["returncode"] == 1
+    assert set(captured.usage) == set(streaming.usage)
+
+
+def test_write_sample_metrics(tmp_path: Path) -> None:
+    """
+    Test that the usage is collected per output prefix and written per sample.
+    """
+    sample_metrics.record("output/A", "genes", {"tool": "kma", "wall_seconds": 1.5})
+    sample_metrics.record("output/B", "genes", {"tool": "kma", "wall_seconds": 2.0})
+    sample_metrics.record("output/A", "SNPs", {"tool": "PointFinder (kma)", "wall_seconds": 9.0})
+
+    sample_metrics.write_sample_metrics(tmp_path / "A_metrics.json", "A", sample_metrics.pop_records("output/A"))
+    sample_metrics.write_sample_metrics(tmp_path / "C_metrics.json", "C", sample_metrics.pop_records("output/C"))
+
+    assert json.loads((tmp_path / "A_metrics.json").read_text(encoding="utf-8")) == {
+        "sample": "A",
+        "commands": [
+            {"stage": "genes", "tool": "kma", "wall_seconds": 1.5},
+            {"stage": "SNPs", "tool": "PointFinder (kma)", "wall_seconds": 9.0},
+        ],
+    }
+    assert not (tmp_path / "C_metrics.json").exists()
+    assert sample_metrics.pop_records("output/B") == [{"stage": "genes", "tool": "kma", "wall_seconds": 2.0}]
+
+
+def test_pipeline_chains_commands(tmp_path: Path) -> None:
+    """
+    Test that the stages of a pipeline are connected with pipes,
+    and that the output can be captured or written to a file.
+    """
+    invoker = CommandInvoker(PipelineCommand([["seq", "1", "5"], ["sort", "-r"], ["head", "-n", "2"]], capture=True))
+    stdout, _ = invoker.execute()
+    with open(tmp_path / "out.txt", "w", encoding="utf-8") as handle:
+        result = CommandInvoker(PipelineCommand([["printf", "b\\na\\n"], ["sort"]], stdout_file=handle)).execute()
+
+    assert stdout == "5\n4\n"
+    assert result is True
+    assert (tmp_path / "out.txt").read_text(encoding="utf-8") == "a\nb\n"
+    assert invoker.usage is not None
+    assert invoker.usage["tool"] == "seq | sort | head"
+    assert invoker.usage["returncode"] == 0
+
+
+def test_pipeline_python_stage() -> None:
+    """
+    Test that a Python function can be used as first, middle or last stage.
+    """
+
+    def numbers(_: Iterator[bytes] | None) -> Iterable[bytes]:
+        yield from (f"{number}\n".encode() for number in range(1, 101))
+
+    def even(chunks: Iterator[bytes] | None) -> Iterable[bytes]:
+        lines = b"".join(chunks or []).splitlines()
+        yield from (line + b"\n" for line in lines if int(line) % 2 == 0)
+
+    def count(chunks: Iterator[bytes] | None) -> Iterable[bytes]:
+        yield str(b"".join(chunks or []).count(b"\n")).encode()
+
+    middle, _ = CommandInvoker(PipelineCommand([numbers, even, ["tail", "-n", "1"]], capture=True)).execute()
+    last, _ = CommandInvoker(PipelineCommand([["seq", "1", "10"], count], capture=True)).execute()
+
+    assert middle == "100\n"
+    assert last == "10"
+
+
+def test_pipeline_reports_first_failure() -> None:
+    """
+    Test that the first failing stage is reported with its exit code and
+    stderr, and that the other stages are stopped instead of blocking.
+    """
+
+    def broken(chunks: Iterator[bytes] | None) -> Iterable[bytes]:
+        raise ValueError("no FASTA header")
+
+    with pytest.raises(SubprocessError) as error:
+        CommandInvoker(PipelineCommand([["yes"], ["sh", "-c", "head -n 1 >/dev/null; echo bad input >&2; exit 4"], ["cat"]])).execute()
+    with pytest.raises(SubprocessError) as python_error:
+        CommandInvoker(PipelineCommand([["yes"], broken, ["cat"]])).execute()
+    invoker = CommandInvoker(PipelineCommand([["true"], ["false"]], allow_fail=True))
+
+    assert "stage 1 (sh) failed with exit code 4: bad input" in error.value.message
+    assert "stage 1 (broken)" in python_error.value.message and "no FASTA header" in python_error.value.message
+    assert invoker.execute() is False
+    assert invoker.usage is not None and invoker.usage["returncode"] == 1
+
+
+def test_pipeline_missing_command_cleans_up() -> None:
+    """
+    Test that the started stages are stopped and reaped
+    when a later stage can not be started.
+    """
+    command = PipelineCommand([["sleep", "30"], ["this-tool-does-not-exist"]])
+
+    with pytest.raises(FileNotFoundError):
+        command.execute()
+
+    assert command.processes[0].returncode == -signal.SIGTERM
+    with pytest.raises(ChildProcessError):
+        os.waitpid(command.processes[0].pid, os.WNOHANG)
+
+
+def test_pipeline_timeout_stops_stages() -> None:
+    """
+    Test that a pipeline gets the lowest timeout of its tools and that
+    all stages are stopped when it is exceeded, also a stage that ignores SIGTERM.
+    """
+    set_tool_timeouts({"sleep": 0.3, "cat": 60})
+    try:
+        assert PipelineCommand([["sleep", "30"], ["cat"]]).timeout == 0.3
+    finally:
+        set_tool_timeouts({})
+    command = PipelineCommand([["sh", "-c", "trap '' TERM; sleep 30"], ["cat"]], timeout=0.3)
+
+    started = time.time()
+    with mock.patch.object(command_utils, "TERMINATE_GRACE_SECONDS", 0.5), pytest.raises(CommandTimeoutError):
+        command.execute()
+
+    assert time.time() - started < 5
+    assert command.returncodes[0] == -signal.SIGKILL
+    assert command.usage is not None
+    for process in command.processes.values():
+        with pytest.raises(ChildProcessError):
+            os.waitpid(process.pid, os.WNOHANG)
+
+
+def test_pipeline_missing_command_after_python_stage() -> None:
+    """
+    Test that a Python stage that writes more than fits in a pipe
+    does not block the pipeline, when the next stage can not be started.
+    """
+
+    def endless(_: Iterator[bytes] | None) -> Iterable[bytes]:
+        while True:
+            yield b"ACGT" * 16384
+
+    errors: list[BaseException] = []
+
+    def execute() -> None:
+        try:
+            PipelineCommand([endless, ["this-tool-does-not-exist"]]).execute()
+        except BaseException as error:  # pylint: disable=broad-exception-caught
+            errors.append(error)
+
+    thread = threading.Thread(target=execute, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert len(errors) == 1 and isinstance(errors[0], FileNotFoundError)
+
+
+@pytest.fixture
+def command_limits() -> Generator[None, None, None]:
+    """
+    Fixture that restores the limits of the resource classes after a test.
+    """
+    with mock.patch.dict(command_utils._command_limits, clear=False):
+        yield
+
+
+def test_async_command_like_shell_command() -> None:
+    """
+    Test that an AsyncShellCommand gives the same results as a ShellCommand.
+    """
+    invoker = CommandInvoker(AsyncShellCommand(["echo", "Hello"], capture=True, resource_class="light"))
+
+    assert invoker.execute() == ("Hello\n", "")
+    assert CommandInvoker(AsyncShellCommand("echo err >&2; exit 0", capture=True)).execute() == ("", "err\n")
+    assert CommandInvoker(AsyncShellCommand(["true"])).execute() is True
+    assert invoker.usage is not None and invoker.usage["tool"] == "echo"
+
+
+def test_async_commands_limited_per_resource_class(tmp_path: Path, command_limits: None) -> None:
+    """
+    Test that commands of a resource class wait for a free slot,
+    while commands of another class run at the same time.
+    """
+    log = tmp_path / "order.log"
+
+    def command(name: str, resource_class: str) -> AsyncShellCommand:
+        return AsyncShellCommand(f"echo start {name} >> {log}; sleep 0.2; echo end {name} >> {log}", resource_class=resource_class)
+
+    set_command_limits(cpu=1, light=2)
+    results = execute_concurrently([command("A", "cpu"), command("B", "cpu"), command("v1", "light"), command("v2", "light")])
+    lines = log.read_text(encoding="utf-8").splitlines()
+
+    assert results == [True] * 4
+    assert [line.split()[0] for line in lines if line.split()[1] in ("A", "B")] == ["start", "end", "start", "end"]
+    assert max(lines.index("start v1"), lines.index("start v2")) < min(lines.index("end v1"), lines.index("end v2"))
+    with pytest.raises(ValueError):
+        set_command_limits(cpu=0)
+    with pytest.raises(ValueError):
+        AsyncShellCommand(["true"], resource_class="gpu").execute()
+
+
+def test_async_command_failure() -> None:
+    """
+    Test that a failing command raises after the other commands are finished,
+    or returns False with allow_fail.
+    """
+    with pytest.raises(SubprocessError) as error:
+        execute_concurrently([AsyncShellCommand("echo broken >&2; exit 2", capture=True), AsyncShellCommand(["true"])])
+
+    assert error.value.message == "broken\n"
+    assert execute_concurrently([AsyncShellCommand(["false"], allow_fail=True)]) == [False]
+
+
+def is_running(pid: int) -> bool:
+    """
+    Little helper that checks if a process is still running (zombies are not).
+    """
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return False
+    return stat[stat.rindex(")") + 2] not in "ZX"
+
+
+def wait_until_stopped(pid: int) -> bool:
+    """
+    Little helper that waits (at most 5 seconds) until a process has stopped.
+    """
+    deadline = time.time() + 5
+    while is_running(pid) and time.time() < deadline:
+        time.sleep(0.05)
+    return not is_running(pid)
+
+
+@pytest.mark.skipif(not Path("/proc").is_dir(), reason="requires /proc")
+@pytest.mark.parametrize("streaming", [False, True])
+def test_timeout_stops_process_group(tmp_path: Path, streaming: bool) -> None:
+    """
+    Test that a command that exceeds its timeout is stopped together with its
+    child processes, also a child that ignores SIGTERM.
+    """
+    pid_file = tmp_path / "child.pid"
+    command = ShellCommand(
+        cmd=f"sh -c 'trap \"\" TERM; sleep 30' & echo $! > {pid_file}; wait",
+        timeout=0.5,
+        log_prefix=tmp_path / "wedged" if streaming else None,
+    )
+
+    with mock.patch.object(command_utils, "TERMINATE_GRACE_SECONDS", 0.5), pytest.raises(CommandTimeoutError) as error:
+        CommandInvoker(command).execute()
+
+    assert error.value.tool == "sh"
+    assert error.value.timeout == 0.5
+    assert wait_until_stopped(int(pid_file.read_text(encoding="utf-8")))
+    assert command.usage is not None
+
+
+def test_wait_error_is_raised(tmp_path: Path) -> None:
+    """
+    Test that an error of os.wait4 (e.g. the process was already reaped)
+    is raised, instead of stopping and waiting for the process forever.
+    """
+    command = ShellCommand(["sleep", "1"], log_prefix=tmp_path / "sleep", timeout=60)
+    errors: list[BaseException] = []
+
+    def execute() -> None:
+        try:
+            command.execute()
+        except BaseException as error:  # pylint: disable=broad-exception-caught
+            errors.append(error)
+
+    with mock.patch("os.wait4", side_effect=ChildProcessError("no child processes")):
+        thread = threading.Thread(target=execute, daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert len(errors) == 1 and isinstance(errors[0], ChildProcessError)
+
+
+@pytest.mark.skipif(not Path("/proc").is_dir(), reason="requires /proc")
+def test_async_timeout_stops_process_group(tmp_path: Path) -> None:
+    """
+    Test that an AsyncShellCommand that exceeds its timeout stops its process group.
+    """
+    pid_file = tmp_path / "child.pid"
+
+    with mock.patch.object(command_utils, "TERMINATE_GRACE_SECONDS", 0.5), pytest.raises(CommandTimeoutError):
+        execute_concurrently([AsyncShellCommand(f"sleep 30 & echo $! > {pid_file}; wait", timeout=0.3)])
+
+    assert wait_until_stopped(int(pid_file.read_text(encoding="utf-8")))
+
+
+def test_tool_timeouts() -> None:
+    """
+    Test the parsing of --timeout and the timeout per tool, also for scripts.
+    """
+    assert parse_tool_timeout("KMA=3600") == ("kma", 3600.0)
+    assert parse_tool_timeout("600") == ("default", 600.0)
+    for value in ("kma=soon", "kma=0", "-5"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_tool_timeout(value)
+
+    set_tool_timeouts({"kma": 3600, "pointfinder": 7200, "default": 60})
+    try:
+        assert get_tool_timeout(["/opt/bin/kma", "-i", "reads.fq"]) == 3600
+        assert get_tool_timeout(["python", "/opt/PointFinder.py", "-i", "sample.fasta"]) == 7200
+        assert get_tool_timeout("blastn -query sample.fasta") == 60
+        assert ShellCommand(cmd=["kma", "-v"]).timeout == 3600
+        assert ShellCommand(cmd=["kma", "-v"], timeout=5).timeout == 5
+    finally:
+        set_tool_timeouts({})
+    assert get_tool_timeout(["kma"]) is None
+
+
+def test_tool_timeouts_per_context() -> None:
+    """
+    Test that runs (daemon jobs) that run at the same time keep their own
+    timeouts, and that their worker threads get them with submit_in_context.
+    """
+    barrier = threading.Barrier(2)
+
+    def run(timeout: float) -> tuple[float | None, float | None]:
+        set_tool_timeouts({"kma": timeout})
+        barrier.wait()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            in_worker = submit_in_context(executor, get_tool_timeout, ["kma"]).result()
+        return get_tool_timeout(["kma"]), in_worker
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(contextvars.copy_context().run, run, 10)
+        second = executor.submit(contextvars.copy_context().run, run, 20)
+        assert first.result() == (10, 10)
+        assert second.result() == (20, 20)
+    assert get_tool_timeout(["kma"]) is None
+
+
+@pytest.mark.skipif(not Path("/proc").is_dir(), reason="requires /proc")
+def test_stop_process_groups_of_other_threads(tmp_path: Path) -> None:
+    """
+    Test that stop_process_groups (the signal handlers) stops the commands
+    that are waited for in worker threads, also a child that ignores SIGTERM.
+    """
+    pid_file = tmp_path / "child.pid"
+    results: list[bool] = []
+    command = ShellCommand(
+        cmd=f"sh -c 'trap \"\" TERM; sleep 30' & echo $! > {pid_file}; wait",
+        allow_fail=True,
+    )
+    worker = threading.Thread(target=lambda: results.append(CommandInvoker(command).execute()))
+    worker.start()
+    try:
+        deadline = time.time() + 5
+        while not pid_file.exists() and time.time() < deadline:
+            time.sleep(0.05)
+        started = time.time()
+        stop_process_groups(grace=0.5)
+        worker.join(timeout=5)
+        assert not worker.is_alive()
+        assert time.time() - started < 5
+        assert results == [False]
+        assert wait_until_stopped(int(pid_file.read_text(encoding="utf-8")))
+        assert not command_utils._process_groups  # pylint: disable=protected-access
+    finally:
+        reset_process_groups()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Test module for the cost_model module (runtime prediction and batch ETA).
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = [
+    "test_metrics_are_recorded",
+    "test_linear_model",
+    "test_rate_model_with_few_records",
+    "test_both_mode_uses_slowest_search",
+    "test_order_samples",
+    "test_batch_progress",
+    "test_get_config_databases",
+]
+
+import json
+from pathlib import Path
+
+import pytest
+
+from batch.cost_model import BatchProgress, CostModel, get_config_databases, load_records, order_samples, record_stage
+
+
+def _record(input_mb: float, threads: int, seconds: float, stage: str = "genes", file_type: str = "FASTQ") -> dict:
+    """
+    Helper function that creates a record of the metrics store.
+    """
+    return {"stage": stage, "file_type": file_type, "input_mb": input_mb, "threads": threads, "database_mb": 5.0, "seconds": seconds}
+
+
+def test_metrics_are_recorded(tmp_path: Path) -> None:
+    """
+    Test that a search is appended to the store and that
+    unreadable lines of the store are skipped.
+    """
+    store = tmp_path / "metrics.jsonl"
+    sample = tmp_path / "sample.fasta"
+    sample.write_bytes(b"A" * 1024 * 1024)
+    options = {
+        "metrics_store": store,
+        "file_type": "FASTA",
+        "input_file_list": [str(sample)],
+        "database_path": str(tmp_path),
+        "database_name": "db",
+        "threads": 2,
+    }
+    record_stage("genes", options, 1.5, "blastn")
+    with open(store, "a", encoding="utf-8") as handle:
+        handle.write('{"interrupted": \n')
+    records = load_records(store)
+    assert len(records) == 1
+    assert records[0]["input_mb"] == 1.0
+    assert records[0]["database"] == str(tmp_path / "db")
+    assert {"stage": "genes", "tool": "blastn", "threads": 2, "seconds": 1.5}.items() <= records[0].items()
+
+
+def test_linear_model() -> None:
+    """
+    Test that the linear model predicts a linear relation exactly.
+    """
+    records = [_record(mb, threads, 2.0 + 0.5 * mb / threads) for mb, threads in [(10, 1), (40, 2), (100, 4), (60, 1)]]
+    model = CostModel(records)
+    assert model.predict_stage("genes", "FASTQ", 80, 5.0, 2) == pytest.approx(22.0)
+    assert model.predict_stage("SNPs", "FASTQ", 80, 5.0, 2) is None
+
+
+def test_rate_model_with_few_records() -> None:
+    """
+    Test the seconds per MB for a stage with too few records.
+    """
+    model = CostModel([_record(10, 2, 5.0)])
+    assert model.predict_stage("genes", "FASTQ", 40, 5.0, 2) == pytest.approx(20.0)
+
+
+def test_both_mode_uses_slowest_search() -> None:
+    """
+    Test that the concurrent searches of search mode both
+    take as long as the slowest search.
+    """
+    model = CostModel([_record(10, 1, 10.0), _record(10, 1, 30.0, stage="SNPs")])
+    assert model.predict_sample("both", "FASTQ", 10, {}, 1) == pytest.approx(30.0)
+    assert model.predict_sample("both", "FASTA", 10, {}, 1) is None
+
+
+def test_order_samples(tmp_path: Path) -> None:
+    """
+    Test that the samples are ordered longest job first,
+    and by input size if a prediction is missing.
+    """
+    for name, size in [("small.fasta", 1), ("large.fasta", 3), ("medium.fq", 2)]:
+        (tmp_path / name).write_bytes(b"A" * size * 1024 * 1024)
+    groups = [[str(tmp_path / name)] for name in ("small.fasta", "large.fasta", "medium.fq")]
+
+    model = CostModel([_record(1, 1, 1.0, file_type="FASTA"), _record(1, 1, 100.0, file_type="FASTQ")])
+    ordered = order_samples(groups, model, "genes", {}, 1)
+    assert [Path(group[0]).name for group, _, _ in ordered] == ["medium.fq", "large.fasta", "small.fasta"]
+
+    ordered = order_samples(groups, CostModel([]), "genes", {}, 1)
+    assert [Path(group[0]).name for group, _, _ in ordered] == ["large.fasta", "medium.fq", "small.fasta"]
+
+
+def test_batch_progress() -> None:
+    """
+    Test that the ETA is corrected with the actual runtime so far.
+    """
+    progress = BatchProgress([10.0, 10.0, 20.0], [10.0, 10.0, 20.0])
+    assert progress.get_eta() == pytest.approx(40.0)
+    progress.finish_sample(20.0)
+    assert progress.get_eta() == pytest.approx(60.0)
+    assert progress.get_progress_line() == "Progress: 1/3 samples (33%), 0.5 MB/s, ETA 0:01:00"
+
+    progress = BatchProgress([10.0, 30.0], [None, None])
+    assert progress.get_eta() is None
+    progress.finish_sample(5.0)
+    assert progress.get_eta() == pytest.approx(15.0)
+
+
+def test_get_config_databases(tmp_path: Path) -> None:
+    """
+    Test that the databases are read from the configuration
+    and that an unreadable configuration is not an error.
+    """
+    config = tmp_path / "config.yaml"
+    config.write_text(json.dumps({"database": {"name": "YP", "path": "db/YP", "path_snps": "snps", "species": "yersinia"}}), encoding="utf-8")
+    assert get_config_databases(config) == {"genes": "db/YP/YP", "SNPs": "snps/yersinia"}
+    assert not get_config_databases(tmp_path / "missing.yaml")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Test module for the daemon mode (serve) and the thin client.
+A stub service is used, so the socket protocol is
+tested without running the typing tools.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = [
+    "test_submit_returns_response",
+    "test_failing_job_does_not_stop_daemon",
+    "test_client_prints_report",
+    "test_config_cache_is_invalidated",
+    "test_jobs_get_timeouts_of_daemon",
+    "test_socket_of_live_daemon_is_kept",
+]
+
+import contextvars
+import os
+import socket
+import threading
+from pathlib import Path
+from typing import Any, Iterator
+
+import pytest
+
+from service.client import main as client_main
+from service.client import submit
+from command_utils import set_tool_timeouts
+from service.daemon import ConfigPatternCache, TypingServer, TypingService
+
+
+class StubService:
+    """
+    Stub of the TypingService that echoes the request
+    and fails for samples named 'broken'.
+    """
+
+    def run_job(self, request: dict[str, Any]) -> dict[str, Any]:
+        """
+        Function that returns a fake response for the request.
+        """
+        sample = Path(request["input"][0]).stem
+        if sample == "broken":
+            raise SystemExit(1)
+        return {"status": "ok", "sample": sample, "report": f"/reports/{sample}_report.csv"}
+
+
+@pytest.fixture(name="socket_path")
+def fixture_socket_path(tmp_path: Path) -> Iterator[str]:
+    """
+    Fixture that starts a daemon with the stub service
+    in a background thread and stops it afterwards.
+    """
+    socket_path = str(tmp_path / "pacini.sock")
+    server = TypingServer(socket_path, StubService(), workers=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield socket_path
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_submit_returns_response(socket_path: str) -> None:
+    """
+    Test that a submitted job returns the response of the service.
+    """
+    response = submit(socket_path, {"config": "O1.yaml", "input": ["/data/VIB_1.fasta"]})
+    assert response == {"status": "ok", "sample": "VIB_1", "report": "/reports/VIB_1_report.csv"}
+
+
+def test_failing_job_does_not_stop_daemon(socket_path: str) -> None:
+    """
+    Test that a failing job (even with SystemExit) results in an
+    error response and that the daemon keeps serving.
+    """
+    assert submit(socket_path, {"config": "O1.yaml", "input": ["broken.fasta"]})["status"] == "error"
+    assert submit(socket_path, {"config": "O1.yaml", "input": ["VIB_2.fasta"]})["status"] == "ok"
+
+
+def test_client_prints_report(socket_path: str, capsys: pytest.CaptureFixture[str]) -> None:
+    """
+    Test that the thin client prints the report path.
+    """
+    assert client_main(["--socket", socket_path, "-c", "O1.yaml", "-i", "VIB_3.fasta"]) == 0
+    assert capsys.readouterr().out.strip() == "/reports/VIB_3_report.csv"
+    assert client_main(["--socket", socket_path, "-c", "O1.yaml", "-i", "broken.fasta"]) == 1
+
+
+def test_config_cache_is_invalidated(tmp_path: Path) -> None:
+    """
+    Test that the config cache returns copies and
+    reads the configuration again when it changes.
+    """
+    config = tmp_path / "config.yaml"
+    config.write_text("first", encoding="utf-8")
+    cache = ConfigPatternCache()
+    calls: list[str] = []
+
+    def create() -> Any:
+        calls.append(config.read_text(encoding="utf-8"))
+        return {"content": calls[-1]}
+
+    first = cache.get((str(config),), create)
+    first["content"] = "modified copy"
+    assert cache.get((str(config),), create) == {"content": "first"}
+    assert calls == ["first"]
+
+    config.write_text("second", encoding="utf-8")
+    os.utime(config, (os.path.getmtime(config) + 10,) * 2)
+    assert cache.get((str(config),), create) == {"content": "second"}
+    assert calls == ["first", "second"]
+
+
+def test_jobs_get_timeouts_of_daemon(tmp_path: Path) -> None:
+    """
+    Test that every job gets the --timeout of the daemon as its own
+    arguments, instead of sharing (and resetting) a global table.
+    """
+
+    def start_daemon() -> TypingService:
+        set_tool_timeouts({"kma": 3600, "default": 60})
+        return TypingService(tmp_path / "jobs")
+
+    service = contextvars.copy_context().run(start_daemon)
+    arguments = service.build_arguments({"config": "O1.yaml", "input": ["VIB_1.fasta"]}, str(tmp_path / "job_1"))
+
+    assert arguments[-4:] == ["--timeout", "kma=3600", "--timeout", "default=60"]
+
+
+def test_socket_of_live_daemon_is_kept(socket_path: str, tmp_path: Path) -> None:
+    """
+    Test that a second daemon does not remove the socket of a daemon
+    that still answers, while a stale socket file is replaced.
+    """
+    with pytest.raises(OSError, match="Another Pacini-typing daemon"):
+        TypingServer(socket_path, StubService())
+    assert submit(socket_path, {"config": "O1.yaml", "input": ["VIB_4.fasta"]})["status"] == "ok"
+
+    stale_path = str(tmp_path / "stale.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+        stale.bind(stale_path)
+    server = TypingServer(stale_path, StubService())
+    try:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        assert submit(stale_path, {"config": "O1.yaml", "input": ["VIB_5.fasta"]})["status"] == "ok"
+    finally:
+        server.shutdown()
+        server.server_close()
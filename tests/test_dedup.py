@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Test module for the deduplication of identical inputs in a batch.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = [
+    "test_find_duplicate_inputs",
+    "test_paired_order_matters",
+    "test_write_duplicate_report",
+]
+
+from pathlib import Path
+
+from batch.dedup import find_duplicate_inputs, get_input_fingerprint, write_duplicate_report
+
+
+def test_find_duplicate_inputs(tmp_path: Path) -> None:
+    """
+    Test that a copy of an earlier sample is mapped to that sample.
+    """
+    for name, content in (("A.fasta", ">a\nACGT\n"), ("B.fasta", ">b\nGGGG\n"), ("A_copy.fasta", ">a\nACGT\n")):
+        (tmp_path / name).write_text(content, encoding="utf-8")
+    groups = [[str(tmp_path / name)] for name in ("A.fasta", "B.fasta", "A_copy.fasta")]
+
+    assert find_duplicate_inputs(groups, ["A", "B", "A_copy"]) == {2: 0}
+    assert find_duplicate_inputs([*groups, [str(tmp_path / "missing.fasta")]], ["A", "B", "A_copy", "missing"]) == {2: 0}
+
+
+def test_paired_order_matters(tmp_path: Path) -> None:
+    """
+    Test that the order of paired files is part of the fingerprint.
+    """
+    (tmp_path / "R1.fq").write_text("@r1\nACGT\n+\n!!!!\n", encoding="utf-8")
+    (tmp_path / "R2.fq").write_text("@r2\nGGGG\n+\n!!!!\n", encoding="utf-8")
+    forward = [str(tmp_path / "R1.fq"), str(tmp_path / "R2.fq")]
+    assert get_input_fingerprint(forward) == get_input_fingerprint(list(forward))
+    assert get_input_fingerprint(forward) != get_input_fingerprint(forward[::-1])
+
+
+def test_write_duplicate_report(tmp_path: Path) -> None:
+    """
+    Test that the report of a duplicate has its own sample name.
+    """
+    (tmp_path / "A_report.csv").write_text("ID,Input,Hits\n1,A,ctxA\n2,A,rfbV\n", encoding="utf-8")
+    write_duplicate_report(tmp_path / "A_report.csv", "A_copy", tmp_path / "A_copy_report.csv")
+    assert (tmp_path / "A_copy_report.csv").read_text(encoding="utf-8") == "ID,Input,Hits\n1,A_copy,ctxA\n2,A_copy,rfbV\n"
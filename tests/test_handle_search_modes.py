@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Test module for the HandleSearchModes class.
+The searches themselves are replaced by small functions,
+so only the concurrency of the 'both' search mode and the
+routing of the results of a single alignment are tested.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = [
+    "test_split_threads",
+    "test_both_searches_run_concurrently",
+    "test_both_searches_raise_after_join",
+    "test_single_alignment_routes_results",
+]
+
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from unittest import mock
+
+import pytest
+
+from handle_search_modes import HandleSearchModes
+
+
+def create_handler(threads: int, ratio: float = 0.5) -> HandleSearchModes:
+    """
+    Function that creates a HandleSearchModes object for the 'both' mode.
+    ----------
+    Input:
+        - threads: number of threads of the run
+        - ratio: part of the threads for the SNP search
+    Output:
+        - HandleSearchModes object
+    ----------
+    """
+    pattern: Any = SimpleNamespace(creation_dict={"file_type": "FASTQ", "threads": threads})
+    return HandleSearchModes(pattern, {"config": {"search_mode": "both", "snp_thread_ratio": ratio}})
+
+
+@pytest.mark.parametrize(
+    "threads, ratio, expected",
+    [(8, 0.5, (4, 4)), (8, 0.25, (6, 2)), (1, 0.5, (1, 1)), (4, 0.0, (3, 1)), (4, 1.0, (1, 4))],
+)
+def test_split_threads(threads: int, ratio: float, expected: tuple[int, int]) -> None:
+    """
+    Test the division of the threads between the gene and SNP search.
+    """
+    assert create_handler(threads, ratio).split_threads() == expected
+
+
+def test_both_searches_run_concurrently() -> None:
+    """
+    Test that both searches run at the same time,
+    each with its own number of threads.
+    """
+    barrier = threading.Barrier(2, timeout=5)
+    used_threads: dict[str, int] = {}
+
+    def search(self: HandleSearchModes, name: str) -> None:
+        used_threads[name] = self.pattern.creation_dict["threads"]
+        barrier.wait()
+
+    with mock.patch.object(HandleSearchModes, "handle_gene_search_mode", lambda self: search(self, "genes")), mock.patch.object(
+        HandleSearchModes, "handle_snp_search_mode", lambda self: search(self, "SNPs")
+    ):
+        handler = create_handler(8, 0.25)
+        handler.handle()
+
+    assert used_threads == {"genes": 6, "SNPs": 2}
+    assert handler.pattern.creation_dict["threads"] == 8
+
+
+def test_both_searches_raise_after_join() -> None:
+    """
+    Test that an error of the gene search is raised,
+    but only after the SNP search is finished.
+    """
+    finished: list[str] = []
+
+    def failing_search(self: HandleSearchModes) -> None:
+        raise RuntimeError("gene search failed")
+
+    def slow_search(self: HandleSearchModes) -> None:
+        time.sleep(0.2)
+        finished.append("SNPs")
+
+    with mock.patch.object(HandleSearchModes, "handle_gene_search_mode", failing_search), mock.patch.object(
+        HandleSearchModes, "handle_snp_search_mode", slow_search
+    ):
+        with pytest.raises(RuntimeError, match="gene search failed"):
+            create_handler(2).handle()
+    assert finished == ["SNPs"]
+
+
+def test_single_alignment_routes_results(tmp_path: Path) -> None:
+    """
+    Test that search mode both with a single alignment searches once
+    against the combined database, writes the results of the target
+    genes to the gene output and calls the SNPs from the SNP genes.
+    The KMA search is replaced by a function that writes its output.
+    """
+    (tmp_path / "genes.fasta").write_text(">ctxA\nAAAACCCCGGGG\n", encoding="utf-8")
+    (tmp_path / "snps").mkdir()
+    (tmp_path / "snps" / "genes.fasta").write_text(">gyrA\nATGTCC\n", encoding="utf-8")
+    searches: list[str] = []
+
+    def search(self: HandleSearchModes) -> None:
+        output = self.pattern.creation_dict["output"]
+        searches.append(self.pattern.creation_dict["database_name"])
+        assert self.pattern.creation_dict["subject_alignments"]
+        Path(output).parent.mkdir(parents=True)
+        Path(f"{output}.res").write_text("#Template\tScore\ngenes__ctxA\t10\nsnps__gyrA\t5\n", encoding="utf-8")
+        Path(f"{output}.aln").write_text(
+            "# genes__ctxA\ntemplate: AAAACCCCGGGG\nquery:    AAAACCCCGGGG\n\n# snps__gyrA\ntemplate: ATGTCC\nquery:    ATGTTC\n\n",
+            encoding="utf-8",
+        )
+
+    pattern: Any = SimpleNamespace(
+        pattern={},
+        creation_dict={
+            "file_type": "FASTQ",
+            "threads": 2,
+            "single_alignment": True,
+            "database_path": str(tmp_path / "databases" / "genes") + "/",
+            "input_fasta_file": str(tmp_path / "genes.fasta"),
+            "path_snps": str(tmp_path),
+            "species": "snps",
+            "output": str(tmp_path / "gene" / "sample"),
+            "run_output_snps": str(tmp_path / "snp"),
+            "SNP_list": [{"SNP": "gyrA", "ref": "TCC", "alt": "F", "pos": 2}],
+        },
+    )
+    with mock.patch.object(HandleSearchModes, "handle_gene_search_mode", search), mock.patch.object(
+        HandleSearchModes, "validate_or_create_SNP_database"
+    ), mock.patch.object(HandleSearchModes, "handle_snp_search_mode") as snp_search:
+        HandleSearchModes(pattern, {"config": {"search_mode": "both"}}).handle()
+
+    assert len(searches) == 1 and searches[0].startswith("combined_")
+    assert (tmp_path / "gene" / "sample.res").read_text(encoding="utf-8") == "#Template\tScore\nctxA\t10\n"
+    assert "gyrA p.S2F\tTCC -> TTC" in (tmp_path / "snp" / "sample_kma_results.tsv").read_text(encoding="utf-8")
+    assert not (tmp_path / "gene" / "combined").exists()
+    snp_search.assert_not_called()
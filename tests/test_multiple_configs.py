@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Test module for typing a sample against multiple configuration files.
+The searches themselves are replaced, only the division of the
+configurations and the combining of the reports are tested.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = ["test_config_runs_are_separated", "test_reports_are_combined"]
+
+from pathlib import Path
+
+import pytest
+
+import preprocessing.argsparse.build_parser
+from pacini_typing import PaciniTyping
+
+
+def _get_pacini_typing(tmp_path: Path, *extra_args: str) -> PaciniTyping:
+    """
+    Helper function that creates a PaciniTyping object for a
+    prepared sample and two configuration files.
+    """
+    args = preprocessing.argsparse.build_parser.main(
+        ["-c", "config/O1.yaml", "config/O139.yaml", "-i", "sample.fasta", "-o", str(tmp_path), "-t", "4", *extra_args]
+    )
+    pacini_typing = PaciniTyping(args)
+    pacini_typing.parse_all_args()
+    pacini_typing.sample_name = "sample"
+    pacini_typing.file_type = "FASTA"
+    return pacini_typing
+
+
+def test_config_runs_are_separated(tmp_path: Path) -> None:
+    """
+    Test that every configuration gets its own report and
+    temporary directory and an equal part of the threads.
+    Without --tmp-dir, the intermediate files stay in the report directory.
+    """
+    runs = _get_pacini_typing(tmp_path).get_config_runs()
+    assert list(runs) == ["O1", "O139"]
+    assert runs["O139"].option["config"]["config_path"] == "config/O139.yaml"
+    assert runs["O139"].option["config"]["output_report"] == tmp_path / "O139"
+    assert runs["O1"].option["config"]["tmp_dir"] == Path(".")
+    assert runs["O1"].initialize_config_pattern().creation_dict["output"] == str(tmp_path / "O1" / "gene" / "sample")
+    assert all(run.threads == 2 for run in runs.values())
+
+    runs = _get_pacini_typing(tmp_path, "--tmp-dir", str(tmp_path / "tmp")).get_config_runs()
+    assert runs["O1"].option["config"]["tmp_dir"] == tmp_path / "tmp" / "O1"
+
+
+def test_reports_are_combined(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test that the reports of the configurations are combined into
+    the report of the sample, with the configuration of every row.
+    """
+
+    def fake_handle_config_option(self: PaciniTyping) -> None:
+        report_dir = Path(self.option["config"]["output_report"])
+        report_dir.mkdir(parents=True)
+        gene = "rfbV" if self.option["config"]["config_path"].endswith("O1.yaml") else "wbfZ"
+        (report_dir / f"{self.sample_name}_report.csv").write_text(f"ID,Input,Hits\n1,sample,{gene}\n", encoding="utf-8")
+
+    pacini_typing = _get_pacini_typing(tmp_path)
+    runs = pacini_typing.get_config_runs()
+    monkeypatch.setattr(PaciniTyping, "get_config_runs", lambda self: runs)
+    for run in runs.values():
+        monkeypatch.setattr(run, "handle_config_option", fake_handle_config_option.__get__(run))
+    pacini_typing.handle_config_option()
+
+    assert (tmp_path / "sample_report.csv").read_text(encoding="utf-8").splitlines() == [
+        "ID,Config,Input,Hits",
+        "1,O1,sample,rfbV",
+        "2,O139,sample,wbfZ",
+    ]
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Test module for the in-process PointFinder adapter.
+A small script replaces PointFinder.py, which writes its arguments
+to the output directory and changes the state of the process.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = [
+    "test_script_runs_isolated",
+    "test_failing_script_raises_with_tail",
+    "test_unavailable_falls_back",
+    "test_termination_signal_is_not_an_exit_status",
+]
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from command_utils import CommandInvoker, running_command, set_termination_signal, set_tool_timeouts
+from preprocessing.exceptions.command_utils_exceptions import SubprocessError
+from queries import pointfinder_adapter
+from queries.pointfinder_adapter import InProcessUnavailable, PointFinderAdapter
+
+FAKE_POINTFINDER = """
+import argparse
+import os
+import sys
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--inputfiles", nargs="+")
+parser.add_argument("--out_path")
+args = parser.parse_args()
+
+RUNS = globals().get("RUNS", 0) + 1
+os.chdir(args.out_path)
+with open("results.txt", "a") as handle:
+    handle.write(f"{' '.join(args.inputfiles)} {RUNS}\\n")
+print("PointFinder done")
+"""
+
+
+@pytest.fixture
+def script(tmp_path: Path) -> Path:
+    """
+    Fixture with the fake PointFinder script.
+    """
+    script_path = tmp_path / "PointFinder.py"
+    script_path.write_text(FAKE_POINTFINDER, encoding="utf-8")
+    return script_path
+
+
+def get_query(script_path: Path, output: Path, *inputs: str) -> list[str]:
+    """
+    Little helper that returns a PointFinder query.
+    """
+    return ["python", str(script_path), "--inputfiles", *inputs, "--out_path", str(output)]
+
+
+def test_script_runs_isolated(tmp_path: Path, script: Path) -> None:
+    """
+    Test that every run gets its own arguments and globals, and
+    that argv, the working directory and stdout are restored.
+    """
+    argv, cwd, stdout = list(sys.argv), os.getcwd(), sys.stdout
+
+    for sample in ("A.fasta", "B with spaces.fasta"):
+        command = PointFinderAdapter(get_query(script, tmp_path, sample), str(tmp_path / "sample.pointfinder"))
+        assert command.execute() is True
+
+    assert (tmp_path / "results.txt").read_text(encoding="utf-8") == "A.fasta 1\nB with spaces.fasta 1\n"
+    assert (tmp_path / "sample.pointfinder.stdout.log").read_text(encoding="utf-8") == "PointFinder done\n"
+    assert (sys.argv, os.getcwd(), sys.stdout) == (argv, cwd, stdout)
+    assert command.usage is not None and command.usage["tool"] == "PointFinder (in-process)"
+
+
+def test_failing_script_raises_with_tail(tmp_path: Path, script: Path) -> None:
+    """
+    Test that an exit code or exception of the script is raised as a
+    SubprocessError with the end of stderr, and that a changed script is compiled again.
+    """
+    cwd = os.getcwd()
+    with pytest.raises(SubprocessError) as error:
+        PointFinderAdapter(get_query(script, tmp_path), str(tmp_path / "usage")).execute()
+    script.write_text("import os\nos.chdir('/')\nraise ValueError('unknown species')\n", encoding="utf-8")
+    with pytest.raises(SubprocessError) as exception:
+        PointFinderAdapter(get_query(script, tmp_path, "A.fasta"), str(tmp_path / "broken")).execute()
+
+    assert "the following arguments are required" in error.value.message or "expected at least one argument" in error.value.message
+    assert "ValueError: unknown species" in exception.value.message
+    assert os.getcwd() == cwd
+
+
+def test_unavailable_falls_back(tmp_path: Path, script: Path) -> None:
+    """
+    Test the cases in which the query has to run as a subprocess:
+    a missing dependency, a busy adapter, another running command
+    (e.g. the gene search of search mode both) and a timeout for PointFinder.
+    """
+    missing = tmp_path / "missing_dependency.py"
+    missing.write_text("import a_module_that_does_not_exist\n", encoding="utf-8")
+
+    with pytest.raises(InProcessUnavailable):
+        PointFinderAdapter(get_query(missing, tmp_path, "A.fasta"), str(tmp_path / "missing")).execute()
+    with pointfinder_adapter._lock, pytest.raises(InProcessUnavailable):
+        PointFinderAdapter(get_query(script, tmp_path, "A.fasta"), str(tmp_path / "busy")).execute()
+    with running_command(), pytest.raises(InProcessUnavailable):
+        CommandInvoker(PointFinderAdapter(get_query(script, tmp_path, "A.fasta"), str(tmp_path / "concurrent"))).execute()
+    set_tool_timeouts({"pointfinder": 60})
+    try:
+        with pytest.raises(InProcessUnavailable):
+            PointFinderAdapter(get_query(script, tmp_path, "A.fasta"), str(tmp_path / "timeout"))
+    finally:
+        set_tool_timeouts({})
+    assert not (tmp_path / "results.txt").exists()
+
+
+def test_termination_signal_is_not_an_exit_status(tmp_path: Path) -> None:
+    """
+    Test that the SystemExit of a SIGTERM during the run stops the
+    process, instead of being the exit status of PointFinder.
+    """
+    script = tmp_path / "terminated.py"
+    script.write_text("raise SystemExit(143)\n", encoding="utf-8")
+    with pytest.raises(SubprocessError):
+        PointFinderAdapter(get_query(script, tmp_path), str(tmp_path / "exit")).execute()
+
+    set_termination_signal(15)
+    try:
+        with pytest.raises(SystemExit) as exit_info:
+            PointFinderAdapter(get_query(script, tmp_path), str(tmp_path / "terminated")).execute()
+    finally:
+        set_termination_signal(None)
+    assert exit_info.value.code == 143
+    assert not pointfinder_adapter._lock.locked()
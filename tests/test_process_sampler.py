@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Test module for the process tree sampler (--profile-interval).
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = [
+    "test_parse_stat",
+    "test_get_descendants",
+    "test_sampler_writes_timeline",
+]
+
+import csv
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from process_sampler import CLOCK_TICKS, ProcessTreeSampler, get_descendants, parse_stat
+
+pytestmark = pytest.mark.skipif(not Path("/proc/self/stat").exists(), reason="requires /proc")
+
+
+def test_parse_stat() -> None:
+    """
+    Test that a name with spaces and parentheses is parsed correctly.
+    """
+    stat = f"4242 (kma (shm) x) S 4200 4242 4200 0 -1 4194304 100 0 0 0 {CLOCK_TICKS * 3} {CLOCK_TICKS} 0 0 20 0 8 0 12345 0 0"
+    assert parse_stat(stat) == {"name": "kma (shm) x", "ppid": 4200, "cpu_seconds": 4.0, "threads": 8}
+
+
+def test_get_descendants() -> None:
+    """
+    Test that the children of the process are part of the tree.
+    """
+    child = subprocess.Popen(["sleep", "5"])
+    try:
+        tree = get_descendants(os.getpid())
+        assert child.pid in tree[1:]
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_sampler_writes_timeline(tmp_path: Path) -> None:
+    """
+    Test that a busy child process shows up in the CSV and the trace.
+    """
+    with ProcessTreeSampler(0.05, tmp_path) as sampler:
+        subprocess.run([sys.executable, "-c", "import time\nend = time.time() + 0.5\nwhile time.time() < end: pass"], check=True)
+
+    with open(tmp_path / "timeline.csv", encoding="utf-8") as handle:
+        rows = list(csv.DictReader(handle))
+    children = [row for row in rows if int(row["pid"]) != sampler.root]
+    assert children and max(float(row["cpu_percent"]) for row in children) > 10
+    trace = json.loads((tmp_path / "timeline.trace.json").read_text(encoding="utf-8"))
+    assert {event["ph"] for event in trace["traceEvents"]} == {"M", "C"}
@@ -22,9 +22,12 @@ __all__ = [
     "test_validate_config_keys_structure_error",
     "test_validate_pattern_keys_structure_error",
     "test_construct_params_dict",
+    "test_get_config_files",
+    "test_get_config_ids",
 ]
 
 import json
+from pathlib import Path
 
 import pytest
 
@@ -119,3 +122,27 @@ def test_construct_params_dict() -> None:
     config.input_file_type = "custom_file_type"
     config.construct_params_dict()
     assert config.input_file_type == config.creation_dict["file_type"]
+
+
+def test_get_config_files(tmp_path: Path) -> None:
+    """
+    Test that a directory is replaced by the YAML files inside it.
+    """
+    for name in ("O139.yaml", "O1.yml", "genes.fasta"):
+        (tmp_path / name).touch()
+    assert read_config_pattern.get_config_files([str(tmp_path), "config/Yersinia.yaml"]) == [
+        str(tmp_path / "O1.yml"),
+        str(tmp_path / "O139.yaml"),
+        "config/Yersinia.yaml",
+    ]
+
+
+def test_get_config_ids() -> None:
+    """
+    Test that every configuration file gets a unique id.
+    """
+    assert read_config_pattern.get_config_ids(["config/O1.yaml", "other/O1.yaml", "config/O139.yaml"]) == {
+        "O1": "config/O1.yaml",
+        "O1_2": "other/O1.yaml",
+        "O139": "config/O139.yaml",
+    }
@@ -19,20 +19,41 @@ __all__ = [
     "test_get_query_verbose_false",
     "test_blast_prepare_query",
     "test_blast_get_query_different",
+    "test_blast_query_subject_alignments",
     "test_get_runtime",
+    "test_kma_query_shared_memory",
+    "test_tool_wrapper_adds_arguments",
+    "test_kma_shared_memory_is_destroyed_on_failure",
+    "test_kma_shared_memory_keeps_sigterm_handler",
+    "test_pointfinder_threads_arguments",
+    "test_pointfinder_aligner_gets_threads",
+    "test_input_fifo_streams_paired_files",
+    "test_input_fifo_falls_back_to_merged_file",
+    "test_unread_input_fifo_runs_again",
 ]
 
+import contextlib
+import gzip
 import os
+import signal
+import stat
+import subprocess
 import time
+from pathlib import Path
 from typing import Any, Dict
 from unittest import mock
 
 import pytest
 
+from command_utils import get_termination_signal, set_termination_signal
+from make_gene_database import KMASharedMemory
 from queries.blast_runner import BLASTn
 from queries.gene_query_runner import GeneQueryRunner
+from queries.input_fifo import InputFifo
 from queries.kma_runner import KMA
+from queries.pointfinder_runner import PointFinder
 from queries.snp_query_runnner import SNPQueryRunner
+from queries.tool_wrapper import write_tool_wrapper
 
 skip_in_ci = pytest.mark.skipif(
     os.getenv("CI") == "true",
@@ -152,6 +173,117 @@ def test_get_query_verbose_false(setup_query_input: Dict[str, Any]) -> None:
     ]
 
 
+def test_kma_query_shared_memory(setup_query_input: Dict[str, Any]) -> None:
+    """
+    Function that tests that the KMA query uses the database
+    in shared memory if it was loaded before the batch (--kma-shm)
+    ----------
+    Input:
+        - setup_query_input: Dictionary of test configuration options
+    ----------
+    """
+    sub_option = setup_query_input.copy()
+    sub_option["kma_shm"] = True
+    assert KMA.get_query(sub_option)[-2:] == ["-shm", "1"]
+    sub_option["kma_shm"] = False
+    assert "-shm" not in KMA.get_query(sub_option)
+
+
+def test_tool_wrapper_adds_arguments(tmp_path: Any) -> None:
+    """
+    Function that tests that the wrapper script passes all arguments
+    to the tool, followed by the extra arguments
+    ----------
+    Input:
+        - tmp_path: temporary directory of pytest
+    ----------
+    """
+    wrapper = write_tool_wrapper("/bin/echo", ["-shm", "1"], tmp_path)
+    assert os.path.basename(wrapper) == "echo"
+    result = subprocess.run([wrapper, "-t_db", "my db"], capture_output=True, text=True, check=True)
+    assert result.stdout == "-t_db my db -shm 1\n"
+
+
+def test_pointfinder_threads_arguments() -> None:
+    """
+    Function that tests the thread option of the aligner of PointFinder
+    """
+    assert PointFinder.get_threads_arguments({"method": "kma", "threads": 8}) == ["-t", "8"]
+    assert PointFinder.get_threads_arguments({"method": "blastn", "threads": "4"}) == ["-num_threads", "4"]
+    assert PointFinder.get_threads_arguments({"method": "kma", "threads": 1}) == []
+
+
+def test_pointfinder_aligner_gets_threads(tmp_path: Any) -> None:
+    """
+    Function that tests that PointFinder gets a wrapper of its aligner
+    that adds the threads (and -shm with --kma-shm) to every call
+    ----------
+    Input:
+        - tmp_path: temporary directory of pytest
+    ----------
+    """
+    runner = SNPQueryRunner.__new__(SNPQueryRunner)
+    runner.run_options = {
+        "method": "kma",
+        "method_path": "/bin/echo",
+        "threads": 6,
+        "kma_shm": True,
+        "run_output_snps": str(tmp_path),
+        "input_file_list": [],
+        "output": str(tmp_path / "sample"),
+    }
+    runner.query = ["python", "PointFinder.py", "--method_path", "/bin/echo"]
+    wrapper_output: list[str] = []
+
+    def run_pointfinder(query: list[str]) -> None:
+        wrapper = query[query.index("--method_path") + 1]
+        wrapper_output.append(subprocess.run([wrapper, "-i", "reads.fq"], capture_output=True, text=True, check=True).stdout)
+
+    with mock.patch.object(runner, "run_pointfinder", side_effect=run_pointfinder):
+        runner.run()
+
+    assert wrapper_output == ["-i reads.fq -t 6 -shm 1\n"]
+
+
+def test_kma_shared_memory_keeps_sigterm_handler() -> None:
+    """
+    Function that tests that a SIGTERM during a batch with shared memory
+    is recorded as termination signal and reaches the previous handler
+    (the handler of main), and that the segments are removed
+    """
+    previous = mock.Mock(side_effect=SystemExit(143))
+    original = signal.signal(signal.SIGTERM, previous)
+    try:
+        with mock.patch("make_gene_database.GeneDatabaseBuilder.load_kma_shared_memory"), mock.patch(
+            "make_gene_database.GeneDatabaseBuilder.destroy_kma_shared_memory"
+        ) as destroy, pytest.raises(SystemExit) as exit_info:
+            with KMASharedMemory(["./refdir/mydb"]):
+                os.kill(os.getpid(), signal.SIGTERM)
+        assert get_termination_signal() == signal.SIGTERM
+        assert signal.getsignal(signal.SIGTERM) is previous
+    finally:
+        signal.signal(signal.SIGTERM, original)
+        set_termination_signal(None)
+    assert exit_info.value.code == 143
+    assert previous.call_count == 1
+    assert destroy.call_count == 1
+
+
+def test_kma_shared_memory_is_destroyed_on_failure() -> None:
+    """
+    Function that tests that all loaded databases are removed
+    from shared memory, also if a sample fails in between
+    """
+    with mock.patch("make_gene_database.GeneDatabaseBuilder.load_kma_shared_memory") as load, mock.patch(
+        "make_gene_database.GeneDatabaseBuilder.destroy_kma_shared_memory"
+    ) as destroy:
+        with pytest.raises(RuntimeError):
+            with KMASharedMemory(["./refdir/mydb", "./snps/species/species", "./refdir/mydb"]):
+                raise RuntimeError("sample failed")
+    assert [call.args[0] for call in load.call_args_list] == ["./refdir/mydb", "./snps/species/species"]
+    assert [call.args[0] for call in destroy.call_args_list] == ["./snps/species/species", "./refdir/mydb"]
+
+
 def test_blast_prepare_query(setup_query_input: Dict[str, Any]) -> None:
     """
     Function that tests the prepare_query() function(s) of the enums
@@ -202,6 +334,21 @@ def test_blast_get_query_different(setup_query_input: Dict[str, Any]) -> None:
     ]
 
 
+def test_blast_query_subject_alignments(setup_query_input: Dict[str, Any]) -> None:
+    """
+    Function that tests that the aligned subject sequence (sseq) is only
+    requested for the native codon caller, so the .tsv of other searches
+    keeps its columns.
+    ----------
+    Input:
+        - setup_query_input: Dictionary of test configuration options
+    ----------
+    """
+    assert "sseq" not in BLASTn.get_query(setup_query_input)[8].split()
+    query = BLASTn.get_query({**setup_query_input, "subject_alignments": True})
+    assert query[8] == f"6 {" ".join(BLASTn.FORMATS.value)} sseq"
+
+
 def test_pointfinder_replace_inputfiles_args() -> None:
     """Replace --inputfiles values while preserving other query flags."""
     query = [
@@ -240,6 +387,93 @@ def test_pointfinder_merge_input_files(tmp_path: Any) -> None:
     assert merged.read_text(encoding="utf-8") == "@a\nAC\n+\n!!\n@b\nGT\n+\n!!\n"
 
 
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="requires FIFOs")
+def test_input_fifo_streams_paired_files(tmp_path: Any) -> None:
+    """
+    PointFinder gets a link to R1 as the merged file, and the wrapper of the
+    aligner (cat here) reads R1 followed by R2 from the FIFO instead, also
+    for gzip files that are larger than the buffer of a pipe. The FIFO is
+    removed after the run, also without a reader.
+    """
+    reads = [os.urandom(200_000), os.urandom(200_000)]
+    r1 = tmp_path / "r1.fastq.gz"
+    r2 = tmp_path / "r2.fastq.gz"
+    r1.write_bytes(gzip.compress(reads[0]))
+    r2.write_bytes(gzip.compress(reads[1]))
+    merged = str(tmp_path / "sample.fastq.gz")
+    runner = SNPQueryRunner.__new__(SNPQueryRunner)
+
+    with contextlib.ExitStack() as stack:
+        streamed_fifo = runner._stream_or_merge_input_files([str(r1), str(r2)], merged, stack)
+        assert streamed_fifo is not None
+        fifo_file = str(streamed_fifo.fifo_path)
+        replacements = {merged: fifo_file}
+        assert stat.S_ISFIFO(os.stat(fifo_file).st_mode)
+        # ? like PointFinder, which reads the start of the file to determine its type
+        with open(merged, "rb") as handle:
+            assert handle.read(2) == b"\x1f\x8b"
+        wrapper = write_tool_wrapper("/bin/cat", [], tmp_path, replacements)
+        streamed = subprocess.run([wrapper, merged], capture_output=True, check=True).stdout
+    with InputFifo([str(r1)], tmp_path / "unread.fastq.gz") as fifo:
+        pass
+
+    assert gzip.decompress(streamed) == reads[0] + reads[1]
+    assert streamed_fifo.is_complete()
+    assert fifo.readers == 0 and not fifo.is_complete()
+    assert not os.path.exists(fifo_file)
+    assert not (tmp_path / "unread.fastq.gz").exists()
+
+
+def test_input_fifo_falls_back_to_merged_file(tmp_path: Any) -> None:
+    """
+    Without FIFO support, the paired files are merged into a temporary file.
+    """
+    r1 = tmp_path / "r1.fastq"
+    r2 = tmp_path / "r2.fastq"
+    r1.write_text("@a\nAC\n+\n!!\n", encoding="utf-8")
+    r2.write_text("@b\nGT\n+\n!!\n", encoding="utf-8")
+    runner = SNPQueryRunner.__new__(SNPQueryRunner)
+
+    with contextlib.ExitStack() as stack, mock.patch("os.mkfifo", side_effect=OSError("not supported")):
+        assert runner._stream_or_merge_input_files([str(r1), str(r2)], str(tmp_path / "merged.fastq"), stack) is None
+
+    assert (tmp_path / "merged.fastq").read_text(encoding="utf-8") == "@a\nAC\n+\n!!\n@b\nGT\n+\n!!\n"
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="requires FIFOs")
+def test_unread_input_fifo_runs_again(tmp_path: Any) -> None:
+    """
+    If the aligner gets another spelling of the merged file than the wrapper
+    replaces, it reads only the link to R1 and the FIFO is not read.
+    PointFinder then runs again with the merged file, so the SNPs are
+    not called from a part of the reads.
+    """
+    r1 = tmp_path / "sample_R1.fastq"
+    r2 = tmp_path / "sample_R2.fastq"
+    r1.write_text("@a\nAC\n+\n!!\n", encoding="utf-8")
+    r2.write_text("@b\nGT\n+\n!!\n", encoding="utf-8")
+    runner = SNPQueryRunner.__new__(SNPQueryRunner)
+    runner.run_options = {
+        "method": "kma",
+        "method_path": "/bin/cat",
+        "run_output_snps": str(tmp_path),
+        "input_file_list": [str(r1), str(r2)],
+        "output": str(tmp_path / "sample"),
+    }
+    runner.query = ["python", "PointFinder.py", "--inputfiles", str(r1), str(r2), "--method_path", "/bin/cat"]
+    aligner_input: list[str] = []
+
+    def run_pointfinder(query: list[str]) -> None:
+        wrapper = query[query.index("--method_path") + 1]
+        merged = Path(query[query.index("--inputfiles") + 1])
+        aligner_input.append(subprocess.run([wrapper, f"{merged.parent}/./{merged.name}"], capture_output=True, text=True, check=True).stdout)
+
+    with mock.patch.object(runner, "run_pointfinder", side_effect=run_pointfinder):
+        runner.run()
+
+    assert aligner_input == ["@a\nAC\n+\n!!\n", "@a\nAC\n+\n!!\n@b\nGT\n+\n!!\n"]
+
+
 @skip_in_ci
 @mock.patch("os.path.exists", return_value=False)
 @mock.patch("os.makedirs")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Test module for the sharding module.
+The shard assignment must be deterministic and complete,
+and the merging of shard reports must renumber the IDs.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = [
+    "test_parse_shard_spec",
+    "test_parse_shard_spec_invalid",
+    "test_assign_shard_is_stable",
+    "test_merge_shard_reports",
+]
+
+import argparse
+from pathlib import Path
+
+import pytest
+
+from batch.sharding import assign_shard, merge_shard_reports, parse_shard_spec
+
+
+def test_parse_shard_spec() -> None:
+    """
+    Test the parsing of a valid shard specification.
+    """
+    assert parse_shard_spec("2/8") == (2, 8)
+    assert parse_shard_spec("1/1") == (1, 1)
+
+
+@pytest.mark.parametrize("value", ["0/4", "5/4", "a/4", "3", "1/0"])
+def test_parse_shard_spec_invalid(value: str) -> None:
+    """
+    Test that invalid shard specifications are rejected.
+    ----------
+    Input:
+        - value: the invalid shard specification
+    ----------
+    """
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_shard_spec(value)
+
+
+def test_assign_shard_is_stable() -> None:
+    """
+    Test that every sample ends up in exactly one shard
+    and that the assignment does not change between calls.
+    """
+    samples = [f"VIB_{number:04d}" for number in range(200)]
+    first = [assign_shard(sample, 4) for sample in samples]
+    second = [assign_shard(sample, 4) for sample in samples]
+    assert first == second
+    assert set(first) == {1, 2, 3, 4}
+
+
+def test_merge_shard_reports(tmp_path: Path) -> None:
+    """
+    Test the merging of two shard reports with different columns.
+    The IDs are renumbered and missing columns are left empty.
+    ----------
+    Input:
+        - tmp_path: temporary directory of pytest
+    ----------
+    """
+    shard_1 = tmp_path / "combined_report_shard_1_of_2.csv"
+    shard_2 = tmp_path / "combined_report_shard_2_of_2.csv"
+    shard_1.write_text("ID,Input,Hits\n1,A,ctxA\n2,A,ctxB\n", encoding="utf-8")
+    shard_2.write_text("ID,Input,Hits,Position\n1,B,rfbV,\n2,B,gyrA,83\n", encoding="utf-8")
+
+    rows = merge_shard_reports([shard_1, shard_2], tmp_path / "combined_report.csv")
+
+    assert rows == 4
+    assert (tmp_path / "combined_report.csv").read_text(encoding="utf-8").splitlines() == [
+        "ID,Input,Hits,Position",
+        "1,A,ctxA,",
+        "2,A,ctxB,",
+        "3,B,rfbV,",
+        "4,B,gyrA,83",
+    ]
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Test module for the SNP gate (run_snps_if in the configuration).
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = [
+    "test_gate_uses_filtered_genes",
+    "test_gated_search_runs_snps_after_genes",
+    "test_get_snp_gate",
+]
+
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from unittest import mock
+
+import pytest
+
+from handle_search_modes import HandleSearchModes
+from parsing.read_config_pattern import ReadConfigPattern
+from parsing.snp_gate import SNPGate
+from preprocessing.exceptions.parsing_exceptions import YAMLStructureError
+
+RES_HEADER = "#Template\tScore\tExpected\tTemplate_length\tTemplate_Identity\tTemplate_Coverage\tQuery_Identity\tQuery_Coverage\tDepth\tq_value\tp_value\n"
+CONFIG_OPTIONS = {
+    "metadata": {"filename": "O1.yaml", "type": "V. cholerae O1 related genes"},
+    "global_settings": {"perc_ident": 95.0, "perc_cov": 80.0},
+}
+
+
+@pytest.mark.parametrize("mode, expected", [("all", False), ("any", True)])
+def test_gate_uses_filtered_genes(tmp_path: Path, mode: str, expected: bool) -> None:
+    """
+    Test that only the genes that pass the identity and
+    coverage thresholds of the configuration open the gate.
+    """
+    (tmp_path / "sample.res").write_text(
+        RES_HEADER
+        + "ctxA:1:CP001235\t10\t0\t777\t100.00\t100.00\t100.00\t100.00\t6.00\t10\t1e-5\n"
+        + "ctxB:1:CP001235\t10\t0\t375\t100.00\t50.00\t100.00\t100.00\t6.00\t10\t1e-5\n",
+        encoding="utf-8",
+    )
+    creation_dict = {"file_type": "FASTQ", "output": str(tmp_path / "sample"), "run_snps_if": {"genes": ["ctxA", "ctxB"], "mode": mode}}
+    gate = SNPGate(CONFIG_OPTIONS, creation_dict)
+
+    assert gate.get_found_genes() == {"ctxA"}
+    assert gate.is_met() is expected
+
+
+@pytest.mark.parametrize("met, expected", [(True, ["genes", "SNPs"]), (False, ["genes"])])
+def test_gated_search_runs_snps_after_genes(met: bool, expected: list[str]) -> None:
+    """
+    Test that the searches of the both mode run one after the other with
+    a gate, and that a skipped SNP search is marked for the report.
+    """
+    searches: list[str] = []
+    pattern: Any = SimpleNamespace(pattern=CONFIG_OPTIONS, creation_dict={"file_type": "FASTQ", "threads": 4, "run_snps_if": {"genes": ["ctxA"], "mode": "all"}})
+    with mock.patch.object(HandleSearchModes, "handle_gene_search_mode", lambda self: searches.append("genes")), mock.patch.object(
+        HandleSearchModes, "handle_snp_search_mode", lambda self: searches.append("SNPs")
+    ), mock.patch.object(SNPGate, "is_met", return_value=met):
+        HandleSearchModes(pattern, {"config": {"search_mode": "both"}}).handle()
+
+    assert searches == expected
+    assert pattern.creation_dict.get("snp_search_skipped", False) is not met
+
+
+def test_get_snp_gate(tmp_path: Path) -> None:
+    """
+    Test the reading and validation of the run_snps_if rule.
+    """
+    config = Path("config/O1.yaml").read_text(encoding="utf-8")
+    gated = tmp_path / "gated.yaml"
+    gated.write_text(config + "\nrun_snps_if:\n  genes: [ctxA, ctxB]\n  mode: ANY\n", encoding="utf-8")
+    assert ReadConfigPattern("config/O1.yaml", "fasta", "genes").get_snp_gate() is None
+    assert ReadConfigPattern(str(gated), "fasta", "genes").get_snp_gate() == {"genes": ["ctxA", "ctxB"], "mode": "any"}
+
+    wrong = tmp_path / "wrong.yaml"
+    wrong.write_text(config + "\nrun_snps_if:\n  genes: ctxA\n", encoding="utf-8")
+    with pytest.raises(YAMLStructureError):
+        ReadConfigPattern(str(wrong), "fasta", "genes").get_snp_gate()
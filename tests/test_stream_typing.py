@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Test module for the stream_typing module (--stream mode).
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = [
+    "test_tail_only_returns_complete_records",
+    "test_tail_reads_compressed_chunks",
+    "test_evidence_is_accumulated",
+    "test_kma_long_read_query",
+]
+
+import gzip
+from pathlib import Path
+
+from batch.stream_typing import FastqTail, GeneEvidence
+from queries.kma_runner import KMA
+
+RES_HEADER = "#Template\tScore\tExpected\tTemplate_length\tTemplate_Identity\tTemplate_Coverage\tQuery_Identity\tQuery_Coverage\tDepth\tq_value\tp_value\n"
+
+
+def test_tail_only_returns_complete_records(tmp_path: Path) -> None:
+    """
+    Test that a record that is still being written is
+    only returned in the next increment.
+    """
+    fastq = tmp_path / "run.fastq"
+    fastq.write_text("@r1\nACGT\n+\n!!!!\n@r2\nAC", encoding="utf-8")
+    tail = FastqTail(fastq)
+
+    assert tail.write_increment(tmp_path / "increment_0.fastq") == 1
+    assert (tmp_path / "increment_0.fastq").read_text(encoding="utf-8") == "@r1\nACGT\n+\n!!!!\n"
+
+    with open(fastq, "a", encoding="utf-8") as handle:
+        handle.write("GT\n+\n!!!!\n")
+    assert tail.write_increment(tmp_path / "increment_1.fastq") == 1
+    assert (tmp_path / "increment_1.fastq").read_text(encoding="utf-8") == "@r2\nACGT\n+\n!!!!\n"
+    assert tail.write_increment(tmp_path / "increment_2.fastq") == 0
+    assert tail.reads == 2
+    assert not tail.is_finished()
+    Path(f"{fastq}.done").touch()
+    assert tail.is_finished()
+
+
+def test_tail_reads_compressed_chunks(tmp_path: Path) -> None:
+    """
+    Test that compressed chunks are read once, as a whole.
+    """
+    chunks = tmp_path / "chunks"
+    chunks.mkdir()
+    with gzip.open(chunks / "chunk_0.fastq.gz", "wt", encoding="utf-8") as handle:
+        handle.write("@r1\nACGT\n+\n!!!!\n@r2\nACGT\n+\n!!!!\n")
+    tail = FastqTail(chunks, settle_seconds=3600)
+
+    assert tail.write_increment(tmp_path / "increment_0.fastq") == 0
+    assert tail.write_increment(tmp_path / "increment_1.fastq", final=True) == 2
+    assert tail.write_increment(tmp_path / "increment_2.fastq", final=True) == 0
+
+
+def test_evidence_is_accumulated(tmp_path: Path) -> None:
+    """
+    Test that the depth of the increments is summed and that a gene
+    is only called present once it reaches the minimal depth.
+    """
+    evidence = GeneEvidence(["ctxA", "rfbV"], perc_ident=99.0, perc_cov=100.0, min_depth=10)
+    first = tmp_path / "increment_0.res"
+    first.write_text(RES_HEADER + "ctxA          \t10\t0\t777\t100.00\t100.00\t100.00\t100.00\t6.00\t10\t1e-5\n", encoding="utf-8")
+    evidence.add_results(first)
+    assert evidence.get_calls() == {"ctxA": "uncertain", "rfbV": "absent"}
+
+    evidence.add_results(first)
+    assert evidence.get_calls() == {"ctxA": "present", "rfbV": "absent"}
+
+    evidence.write_report(tmp_path / "report.csv", reads=20, elapsed=61.2)
+    assert (tmp_path / "report.csv").read_text(encoding="utf-8").splitlines() == [
+        "Gene,Call,Depth,Identity,Coverage,Reads,Elapsed",
+        "ctxA,present,12.0,100.0,100.0,20,61",
+        "rfbV,absent,0.0,0.0,0.0,20,61",
+    ]
+
+
+def test_kma_long_read_query() -> None:
+    """
+    Test the KMA query for long reads.
+    """
+    option = {
+        "input_file_list": ["increment_0.fastq"],
+        "database_path": "./refdir/",
+        "database_name": "mydb",
+        "output": "out/increment_0",
+        "threads": 4,
+    }
+    assert KMA.get_long_read_query(option) == [
+        "kma",
+        "-i",
+        "increment_0.fastq",
+        "-t_db",
+        "./refdir/mydb",
+        "-o",
+        "out/increment_0",
+        "-t",
+        "4",
+        "-bcNano",
+    ]
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Test module for the thread_budget module (--threads auto)
+and the run_metadata module.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = [
+    "test_parse_threads",
+    "test_parse_threads_invalid",
+    "test_cgroup_v2_limit",
+    "test_cgroup_v2_without_limit",
+    "test_cgroup_v1_limit",
+    "test_divide_threads",
+    "test_write_run_metadata",
+    "test_run_metadata_per_job",
+]
+
+import argparse
+import contextvars
+import json
+from pathlib import Path
+
+import pytest
+
+import run_metadata
+from thread_budget import divide_threads, get_cgroup_cpu_limit, parse_threads
+
+
+def test_parse_threads() -> None:
+    """
+    Test that numbers are rounded and that 'auto' is accepted.
+    """
+    assert parse_threads("4") == 4
+    assert parse_threads("2.0") == 2
+    assert parse_threads("AUTO") == "auto"
+
+
+@pytest.mark.parametrize("value", ["many", "0", "-2"])
+def test_parse_threads_invalid(value: str) -> None:
+    """
+    Test that an invalid number of threads is refused.
+    """
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_threads(value)
+
+
+def test_cgroup_v2_limit(tmp_path: Path) -> None:
+    """
+    Test that the lowest quota of a nested cgroup v2 hierarchy is used.
+    """
+    (tmp_path / "kubepods" / "pod1").mkdir(parents=True)
+    (tmp_path / "kubepods" / "cpu.max").write_text("400000 100000\n", encoding="utf-8")
+    (tmp_path / "kubepods" / "pod1" / "cpu.max").write_text("150000 100000\n", encoding="utf-8")
+    proc_cgroup = tmp_path / "cgroup"
+    proc_cgroup.write_text("0::/kubepods/pod1\n", encoding="utf-8")
+    assert get_cgroup_cpu_limit(tmp_path, proc_cgroup) == 1.5
+
+
+def test_cgroup_v2_without_limit(tmp_path: Path) -> None:
+    """
+    Test that 'max' means that there is no limit.
+    """
+    (tmp_path / "cpu.max").write_text("max 100000\n", encoding="utf-8")
+    proc_cgroup = tmp_path / "cgroup"
+    proc_cgroup.write_text("0::/\n", encoding="utf-8")
+    assert get_cgroup_cpu_limit(tmp_path, proc_cgroup) is None
+    assert get_cgroup_cpu_limit(tmp_path, tmp_path / "missing") is None
+
+
+def test_cgroup_v1_limit(tmp_path: Path) -> None:
+    """
+    Test the CPU quota of the cpu controller of cgroup v1.
+    """
+    controller = tmp_path / "cpu,cpuacct" / "slurm" / "job_1"
+    controller.mkdir(parents=True)
+    (controller / "cpu.cfs_quota_us").write_text("300000\n", encoding="utf-8")
+    (controller / "cpu.cfs_period_us").write_text("100000\n", encoding="utf-8")
+    proc_cgroup = tmp_path / "cgroup"
+    proc_cgroup.write_text("5:memory:/slurm/job_1\n4:cpu,cpuacct:/slurm/job_1\n", encoding="utf-8")
+    assert get_cgroup_cpu_limit(tmp_path, proc_cgroup) == 3.0
+
+
+def test_divide_threads() -> None:
+    """
+    Test that every part gets at least one thread.
+    """
+    assert divide_threads(8, 2) == 4
+    assert divide_threads(3, 4) == 1
+    assert divide_threads(6, 0) == 6
+
+
+def test_write_run_metadata(tmp_path: Path) -> None:
+    """
+    Test that recorded dictionaries are merged and written.
+    """
+    run_metadata.record("threads", {"requested": "auto", "effective": 4})
+    run_metadata.record("threads", {"gene_search": 2})
+    metadata = json.loads(run_metadata.write_run_metadata(tmp_path).read_text(encoding="utf-8"))
+    assert {"requested": "auto", "effective": 4, "gene_search": 2}.items() <= metadata["threads"].items()
+    assert {"command", "started", "finished", "version"} <= set(metadata)
+
+
+def test_run_metadata_per_job() -> None:
+    """
+    Test that jobs (of the daemon) that start their own run do not
+    mix their metadata with each other or with the process.
+    """
+
+    def run_job(threads: int) -> dict:
+        run_metadata.start_run(["--threads", str(threads)])
+        run_metadata.record("threads", {"effective": threads})
+        return run_metadata.get_run_metadata()
+
+    first = contextvars.copy_context().run(run_job, 2)
+    second = contextvars.copy_context().run(run_job, 6)
+    assert (first["command"], first["threads"]) == (["--threads", "2"], {"effective": 2})
+    assert (second["command"], second["threads"]) == (["--threads", "6"], {"effective": 6})
+    assert run_metadata.get_run_metadata()["command"] != ["--threads", "2"]
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Test module for the tool registry and its version cache.
+A small script replaces the tool, which counts how often it runs.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = [
+    "test_version_is_cached_in_process_and_on_disk",
+    "test_changed_tool_is_requested_again",
+]
+
+import os
+import re
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+import run_metadata
+from queries import tool_registry
+
+
+def extract(stdout: str) -> str | None:
+    """
+    Extracts the version like the gene query runner.
+    """
+    match = re.search(r"(\d+\.\d+\.\d+)", stdout)
+    return match.group(1) if match else None
+
+
+@pytest.fixture
+def fake_tool(tmp_path: Path) -> Path:
+    """
+    Fixture with an executable that prints a version
+    and appends a line to calls.txt on every run.
+    """
+    tool = tmp_path / "kma"
+    tool.write_text(f"#!/bin/sh\necho run >> {tmp_path / 'calls.txt'}\necho 'KMA-1.4.15'\n", encoding="utf-8")
+    tool.chmod(0o755)
+    return tool
+
+
+def count_calls(tool: Path) -> int:
+    """
+    Returns how often the fake tool ran.
+    """
+    calls = tool.parent / "calls.txt"
+    return len(calls.read_text(encoding="utf-8").splitlines()) if calls.exists() else 0
+
+
+def test_version_is_cached_in_process_and_on_disk(fake_tool: Path, tmp_path: Path) -> None:
+    """
+    Test that the version command only runs once, also for a new process.
+    """
+    cache = tmp_path / "cache" / "tool_versions.json"
+    assert tool_registry.get_tool_version([str(fake_tool), "-v"], extract, cache_file=cache) == "1.4.15"
+    assert tool_registry.get_tool_version([str(fake_tool), "-v"], extract, cache_file=cache) == "1.4.15"
+    with mock.patch.dict(tool_registry._versions, clear=True):
+        assert tool_registry.get_tool_version([str(fake_tool), "-v"], extract, cache_file=cache) == "1.4.15"
+
+    assert count_calls(fake_tool) == 1
+    assert run_metadata.get_run_metadata()["tools"]["kma"] == {"path": os.path.realpath(fake_tool), "version": "1.4.15"}
+
+
+def test_changed_tool_is_requested_again(fake_tool: Path, tmp_path: Path) -> None:
+    """
+    Test that a replaced tool (other modification time) is requested again.
+    """
+    cache = tmp_path / "tool_versions.json"
+    tool_registry.get_tool_version([str(fake_tool), "-v"], extract, cache_file=cache)
+    stat = fake_tool.stat()
+    os.utime(fake_tool, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    tool_registry.get_tool_version([str(fake_tool), "-v"], extract, cache_file=cache)
+
+    assert count_calls(fake_tool) == 2
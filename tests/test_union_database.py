@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Test module for the union database of multiple configurations (--union-database).
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = [
+    "test_union_shares_identical_sequences",
+    "test_union_name_follows_content",
+    "test_demultiplex_kma_results",
+    "test_demultiplex_blast_results",
+]
+
+from pathlib import Path
+
+from queries.union_database import UnionDatabase
+
+RES_HEADER = "#Template\tScore\tExpected\tTemplate_length\tTemplate_Identity\tTemplate_Coverage\tQuery_Identity\tQuery_Coverage\tDepth\tq_value\tp_value\n"
+
+
+def write_targets(tmp_path: Path) -> dict[str, str]:
+    """
+    Helper that writes the target genes of two configurations,
+    which share the ctxA sequence.
+    """
+    o1 = tmp_path / "O1.fasta"
+    o1.write_text(">ctxA:1:CP001235 cholera toxin\nACGT\nACGT\n>rfbV:1:CP001235\nGGGG\n", encoding="utf-8")
+    o139 = tmp_path / "O139.fasta"
+    o139.write_text(">ctxA:1:CP001235\nACGTACGT\n>wbfZ:1:AB012956\nTTTT\n", encoding="utf-8")
+    return {"O1": str(o1), "O139": str(o139)}
+
+
+def test_union_shares_identical_sequences(tmp_path: Path) -> None:
+    """
+    Test that a sequence of multiple configurations is stored once
+    and that its template points to both configurations.
+    """
+    union = UnionDatabase(write_targets(tmp_path), tmp_path / "databases")
+    union.write()
+
+    assert [header for header, _ in union.records] == [
+        "O1__ctxA:1:CP001235 cholera toxin",
+        "O1__rfbV:1:CP001235",
+        "O139__wbfZ:1:AB012956",
+    ]
+    assert union.templates["O1__ctxA:1:CP001235"] == [("O1", "ctxA:1:CP001235 cholera toxin"), ("O139", "ctxA:1:CP001235")]
+    assert Path(union.fasta_file).read_text(encoding="utf-8").startswith(">O1__ctxA:1:CP001235 cholera toxin\nACGTACGT\n")
+    assert (Path(union.database_path) / "templates.json").exists()
+
+
+def test_union_name_follows_content(tmp_path: Path) -> None:
+    """
+    Test that the union database is only renamed when a target genes file changes.
+    """
+    targets = write_targets(tmp_path)
+    first = UnionDatabase(targets, tmp_path)
+    assert UnionDatabase(targets, tmp_path).database_name == first.database_name
+
+    with open(targets["O139"], "a", encoding="utf-8") as handle:
+        handle.write(">toxR:1:CP001235\nCCCC\n")
+    assert UnionDatabase(targets, tmp_path).database_name != first.database_name
+
+
+def test_demultiplex_kma_results(tmp_path: Path) -> None:
+    """
+    Test that the KMA results are split per configuration with the original names.
+    """
+    union = UnionDatabase(write_targets(tmp_path), tmp_path)
+    (tmp_path / "union.res").write_text(
+        RES_HEADER
+        + "O1__ctxA:1:CP001235 cholera toxin\t10\t0\t8\t100.00\t100.00\t100.00\t100.00\t6.00\t10\t1e-5\n"
+        + "O139__wbfZ:1:AB012956\t10\t0\t4\t100.00\t100.00\t100.00\t100.00\t6.00\t10\t1e-5\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "union.aln").write_text(
+        "# O1__ctxA:1:CP001235 cholera toxin\ntemplate: ACGTACGT\nquery:    ACGTACGT\n\n# O139__wbfZ:1:AB012956\ntemplate: TTTT\n\n",
+        encoding="utf-8",
+    )
+    outputs = {"O1": str(tmp_path / "O1" / "sample"), "O139": str(tmp_path / "O139" / "sample")}
+    union.demultiplex(str(tmp_path / "union"), outputs, "FASTQ")
+
+    o1_res = (tmp_path / "O1" / "sample.res").read_text(encoding="utf-8").splitlines()
+    o139_res = (tmp_path / "O139" / "sample.res").read_text(encoding="utf-8").splitlines()
+    assert o1_res[0] == o139_res[0] == RES_HEADER.strip()
+    assert [line.split("\t")[0] for line in o1_res[1:]] == ["ctxA:1:CP001235 cholera toxin"]
+    assert [line.split("\t")[0] for line in o139_res[1:]] == ["ctxA:1:CP001235", "wbfZ:1:AB012956"]
+    assert (tmp_path / "O139" / "sample.aln").read_text(encoding="utf-8") == (
+        "# ctxA:1:CP001235\ntemplate: ACGTACGT\nquery:    ACGTACGT\n\n# wbfZ:1:AB012956\ntemplate: TTTT\n\n"
+    )
+
+
+def test_demultiplex_blast_results(tmp_path: Path) -> None:
+    """
+    Test that the BLASTn results are split per configuration.
+    """
+    union = UnionDatabase(write_targets(tmp_path), tmp_path)
+    (tmp_path / "union.tsv").write_text(
+        "contig_1\tO1__ctxA:1:CP001235\t100.0\t8\n" + "contig_2\tO1__rfbV:1:CP001235\t100.0\t4\n",
+        encoding="utf-8",
+    )
+    outputs = {"O1": str(tmp_path / "O1"), "O139": str(tmp_path / "O139")}
+    union.demultiplex(str(tmp_path / "union"), outputs, "FASTA")
+
+    assert (tmp_path / "O1.tsv").read_text(encoding="utf-8") == "contig_1\tctxA:1:CP001235\t100.0\t8\ncontig_2\trfbV:1:CP001235\t100.0\t4\n"
+    assert (tmp_path / "O139.tsv").read_text(encoding="utf-8") == "contig_1\tctxA:1:CP001235\t100.0\t8\n"
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Test module for the watch_folder module (--watch mode).
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = [
+    "test_get_mate_key",
+    "test_file_is_complete_after_settle_time",
+    "test_file_is_complete_with_sentinel",
+    "test_fastq_mates_are_paired",
+    "test_processed_samples_survive_restart",
+    "test_append_to_combined_report",
+    "test_exiting_sample_does_not_stop_watcher",
+]
+
+import json
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+import pacini_typing as pacini_typing_module
+import preprocessing.argsparse.build_parser
+from batch.watch_folder import SENTINEL_SUFFIX, WatchFolder, append_to_combined_report, get_mate_key
+from command_utils import set_termination_signal
+from pacini_typing import PaciniTyping
+
+
+@pytest.mark.parametrize(
+    "file, expected",
+    [
+        ("/in/VIB_1.fastq.gz", ("/in/VIB", "1")),
+        ("/in/VIB_R2.fq", ("/in/VIB", "2")),
+        ("/in/VIB_pR1.fastq", ("/in/VIB", "1")),
+        ("/in/VIB_S1_L001_R2_001.fastq.gz", ("/in/VIB_S1_L001", "2")),
+        ("/in/VIB.fastq", ("/in/VIB", "")),
+    ],
+)
+def test_get_mate_key(file: str, expected: tuple[str, str]) -> None:
+    """
+    Test the detection of the mate suffixes of paired files.
+    """
+    assert get_mate_key(file) == expected
+
+
+def test_file_is_complete_after_settle_time(tmp_path: Path) -> None:
+    """
+    Test that a file is only ready when its size is stable for the settle time.
+    """
+    watcher = WatchFolder(tmp_path, tmp_path / "state.json", settle_seconds=0)
+    sample = tmp_path / "VIB_1.fasta"
+    sample.write_text(">contig\nACGT\n", encoding="utf-8")
+    assert not watcher.poll()
+    assert watcher.poll() == [[str(sample)]]
+
+    with open(sample, "a", encoding="utf-8") as handle:
+        handle.write("ACGT\n")
+    watcher = WatchFolder(tmp_path, tmp_path / "state.json", settle_seconds=3600)
+    watcher.poll()
+    assert not watcher.poll()
+
+
+def test_file_is_complete_with_sentinel(tmp_path: Path) -> None:
+    """
+    Test that a sentinel file marks a file as complete immediately.
+    """
+    watcher = WatchFolder(tmp_path, tmp_path / "state.json", settle_seconds=3600)
+    sample = tmp_path / "VIB_1.fasta"
+    sample.write_text(">contig\nACGT\n", encoding="utf-8")
+    Path(f"{sample}.done").touch()
+    assert watcher.poll() == [[str(sample)]]
+
+
+def test_fastq_mates_are_paired(tmp_path: Path) -> None:
+    """
+    Test that FASTQ files are only returned once both mates are complete.
+    """
+    watcher = WatchFolder(tmp_path, tmp_path / "state.json", settle_seconds=0)
+    (tmp_path / "VIB_R1.fastq").write_text("@r\nA\n+\n!\n", encoding="utf-8")
+    watcher.poll()
+    assert not watcher.poll()
+    (tmp_path / "VIB_R2.fastq").write_text("@r\nA\n+\n!\n", encoding="utf-8")
+    watcher.poll()
+    assert watcher.poll() == [[str(tmp_path / "VIB_R1.fastq"), str(tmp_path / "VIB_R2.fastq")]]
+
+
+def test_processed_samples_survive_restart(tmp_path: Path) -> None:
+    """
+    Test that processed samples are not returned again after a restart,
+    including the unzipped copy of a zipped input.
+    """
+    staging = tmp_path / "staging"
+    staging.mkdir()
+    for name in ("A.fasta.gz", "B_1.fq", "B_2.fq"):
+        (staging / name).write_text("data", encoding="utf-8")
+        Path(f"{staging / name}.done").touch()
+
+    watcher = WatchFolder(staging, tmp_path / "state.json")
+    for sample in watcher.poll():
+        watcher.mark(sample, "done")
+    (staging / "A.fasta").write_text(">unzipped\nACGT\n", encoding="utf-8")
+    Path(f"{staging / 'A.fasta'}.done").touch()
+
+    assert not WatchFolder(staging, tmp_path / "state.json").poll()
+
+
+def test_append_to_combined_report(tmp_path: Path) -> None:
+    """
+    Test that reports are appended with continued IDs and
+    that new columns are added to the combined report.
+    """
+    combined = tmp_path / "combined_report.csv"
+    first = tmp_path / "A_report.csv"
+    second = tmp_path / "B_report.csv"
+    third = tmp_path / "C_report.csv"
+    first.write_text("ID,Input,Hits\n1,A,ctxA\n", encoding="utf-8")
+    second.write_text("ID,Input,Hits\n1,B,ctxB\n2,B,rfbV\n", encoding="utf-8")
+    third.write_text("ID,Input,Hits,Position\n1,C,gyrA,83\n", encoding="utf-8")
+
+    for report in (first, second, third):
+        append_to_combined_report(report, combined)
+
+    assert combined.read_text(encoding="utf-8").splitlines() == [
+        "ID,Input,Hits,Position",
+        "1,A,ctxA,",
+        "2,B,ctxB,",
+        "3,B,rfbV,",
+        "4,C,gyrA,83",
+    ]
+
+
+@pytest.mark.parametrize("signum", [None, 15])
+def test_exiting_sample_does_not_stop_watcher(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, signum: int | None) -> None:
+    """
+    Test that a sample that exits the run (sys.exit of the validation)
+    is marked as failed and the watcher continues with the next sample,
+    while a SystemExit of a termination signal stops the watcher.
+    ----------
+    Input:
+        - tmp_path: temporary directory of pytest
+        - monkeypatch: pytest fixture to replace the analysis
+        - signum: the termination signal that was received
+    ----------
+    """
+    staging = tmp_path / "staging"
+    staging.mkdir()
+    for sample in ("sample_A", "sample_B"):
+        (staging / f"{sample}.fasta").write_text(">contig\nACGT\n", encoding="utf-8")
+        (staging / f"{sample}.fasta{SENTINEL_SUFFIX}").touch()
+
+    def exit_run(self: PaciniTyping) -> None:
+        set_termination_signal(signum)
+        raise SystemExit(1 if signum is None else 128 + signum)
+
+    args = preprocessing.argsparse.build_parser.main(["-c", "config/O1.yaml", "-o", str(tmp_path / "reports"), "--watch", str(staging)])
+    pacini_typing = PaciniTyping(args)
+    pacini_typing.parse_all_args()
+    monkeypatch.setattr(PaciniTyping, "execute", exit_run)
+    try:
+        # ? the watcher is stopped (Ctrl-C) after the first poll
+        with mock.patch.object(pacini_typing_module.time, "sleep", side_effect=KeyboardInterrupt):
+            if signum is None:
+                pacini_typing.execute_watch()
+            else:
+                with pytest.raises(SystemExit):
+                    pacini_typing.execute_watch()
+    finally:
+        set_termination_signal(None)
+
+    state_file = tmp_path / "reports" / "watch_state.json"
+    if signum is None:
+        with open(state_file, "r", encoding="utf-8") as handle:
+            assert set(json.load(handle).values()) == {"failed"}
+        assert (tmp_path / "reports" / "watch_journal.tsv").read_text(encoding="utf-8").count("failed") == 2
+    else:
+        assert not state_file.exists()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Test module for the work_queue module.
+Several local processes are used to simulate workers on different nodes.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = [
+    "test_enqueue_is_idempotent",
+    "test_every_job_is_processed_once",
+    "test_expired_lease_is_reclaimed",
+    "test_jobs_are_claimed_by_priority",
+    "test_fresh_lease_is_not_reclaimed",
+    "test_only_lease_holder_finishes_job",
+    "test_stopped_worker_leaves_queue_consistent",
+]
+
+import json
+import multiprocessing
+import os
+import time
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+import pytest
+
+import preprocessing.argsparse.build_parser
+from batch.work_queue import WorkQueue
+from command_utils import set_termination_signal
+from pacini_typing import PaciniTyping
+
+
+def _work(queue_dir: Path, worker_id: str) -> None:
+    """
+    Worker function that processes jobs until the queue is empty.
+    ----------
+    Input:
+        - queue_dir: directory of the queue
+        - worker_id: id of the worker
+    ----------
+    """
+    queue = WorkQueue(queue_dir, lease_seconds=60, worker_id=worker_id)
+    while job := queue.claim():
+        time.sleep(0.001)
+        queue.complete(job["sample"])
+
+
+def test_enqueue_is_idempotent(tmp_path: Path) -> None:
+    """
+    Test that enqueueing the same sample twice only adds it once,
+    and that finished samples are not added again.
+    ----------
+    Input:
+        - tmp_path: temporary directory of pytest
+    ----------
+    """
+    queue = WorkQueue(tmp_path)
+    assert queue.enqueue("sample_A", ["sample_A.fasta"])
+    assert not queue.enqueue("sample_A", ["sample_A.fasta"])
+    job = queue.claim()
+    assert job is not None and job["sample"] == "sample_A"
+    queue.complete("sample_A")
+    assert not queue.enqueue("sample_A", ["sample_A.fasta"])
+    assert not queue.pending_jobs()
+
+
+def test_every_job_is_processed_once(tmp_path: Path) -> None:
+    """
+    Test that multiple worker processes together process
+    every job exactly once.
+    ----------
+    Input:
+        - tmp_path: temporary directory of pytest
+    ----------
+    """
+    queue = WorkQueue(tmp_path)
+    for number in range(40):
+        queue.enqueue(f"sample_{number:02d}", [f"sample_{number:02d}.fasta"])
+
+    workers = [multiprocessing.Process(target=_work, args=(tmp_path, f"worker_{number}")) for number in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    done = sorted(path.stem for path in (tmp_path / "done").glob("*.json"))
+    assert done == [f"sample_{number:02d}" for number in range(40)]
+    assert not queue.pending_jobs()
+    assert not list((tmp_path / "leases").iterdir())
+
+
+def test_expired_lease_is_reclaimed(tmp_path: Path) -> None:
+    """
+    Test that the lease of a dead worker is only reclaimed
+    once it is expired.
+    ----------
+    Input:
+        - tmp_path: temporary directory of pytest
+    ----------
+    """
+    dead_worker = WorkQueue(tmp_path, lease_seconds=10, worker_id="dead")
+    dead_worker.enqueue("sample_A", ["sample_A.fasta"])
+    assert dead_worker.claim() is not None
+
+    live_worker = WorkQueue(tmp_path, lease_seconds=10, worker_id="live")
+    assert live_worker.claim() is None
+
+    old = time.time() - 60
+    os.utime(live_worker.lease_path("sample_A"), (old, old))
+    job = live_worker.claim()
+    assert job is not None and job["sample"] == "sample_A"
+    with open(live_worker.lease_path("sample_A"), "r", encoding="utf-8") as handle:
+        assert json.load(handle)["worker"] == "live"
+
+
+def test_jobs_are_claimed_by_priority(tmp_path: Path) -> None:
+    """
+    Test that the job with the highest priority is claimed first.
+    ----------
+    Input:
+        - tmp_path: temporary directory of pytest
+    ----------
+    """
+    queue = WorkQueue(tmp_path)
+    queue.enqueue("sample_A", ["sample_A.fasta"], priority=1)
+    queue.enqueue("sample_B", ["sample_B.fasta"], priority=3)
+    queue.enqueue("sample_C", ["sample_C.fasta"])
+    claimed = []
+    while job := queue.claim():
+        claimed.append(job["sample"])
+        queue.complete(job["sample"])
+    assert claimed == ["sample_B", "sample_A", "sample_C"]
+
+
+def test_fresh_lease_is_not_reclaimed(tmp_path: Path) -> None:
+    """
+    Test that a worker that saw an expired lease does not take over
+    the job, if another worker reclaimed it before the rename.
+    A worker only releases its own lease.
+    ----------
+    Input:
+        - tmp_path: temporary directory of pytest
+    ----------
+    """
+    dead_worker = WorkQueue(tmp_path, lease_seconds=10, worker_id="dead")
+    dead_worker.enqueue("sample_A", ["sample_A.fasta"])
+    assert dead_worker.claim() is not None
+    old = time.time() - 60
+    os.utime(dead_worker.lease_path("sample_A"), (old, old))
+
+    worker_a = WorkQueue(tmp_path, lease_seconds=10, worker_id="A")
+    worker_b = WorkQueue(tmp_path, lease_seconds=10, worker_id="B")
+    take_lease = worker_b._take_lease
+
+    def reclaimed_in_between(job_id: str, reason: str) -> Path | None:
+        # ? worker A reclaims the job between the age check and the rename of worker B
+        assert worker_a.claim() is not None
+        return take_lease(job_id, reason)
+
+    with mock.patch.object(worker_b, "_take_lease", side_effect=reclaimed_in_between):
+        assert worker_b.claim() is None
+    dead_worker.release("sample_A")
+    worker_b.release("sample_A")
+
+    with open(worker_a.lease_path("sample_A"), "r", encoding="utf-8") as handle:
+        assert json.load(handle)["worker"] == "A"
+    worker_a.complete("sample_A")
+    assert not list((tmp_path / "leases").iterdir())
+
+
+def test_only_lease_holder_finishes_job(tmp_path: Path) -> None:
+    """
+    Test that a worker of which the lease expired and was reclaimed
+    does not finish the job of the new holder, and that a job that
+    was finished elsewhere is skipped.
+    ----------
+    Input:
+        - tmp_path: temporary directory of pytest
+    ----------
+    """
+    slow_worker = WorkQueue(tmp_path, lease_seconds=10, worker_id="slow")
+    slow_worker.enqueue("sample_A", ["sample_A.fasta"])
+    assert slow_worker.claim() is not None
+    old = time.time() - 60
+    os.utime(slow_worker.lease_path("sample_A"), (old, old))
+    live_worker = WorkQueue(tmp_path, lease_seconds=10, worker_id="live")
+    assert live_worker.claim() is not None
+
+    assert not slow_worker.fail("sample_A", "late failure")
+    assert slow_worker.pending_jobs() == ["sample_A"]
+    assert not (slow_worker.failed_dir / "sample_A.json").exists()
+    assert live_worker.complete("sample_A")
+
+    live_worker.enqueue("sample_B", ["sample_B.fasta"])
+    assert live_worker.claim() is not None
+    (live_worker.jobs_dir / "sample_B.json").unlink()
+    assert not live_worker.complete("sample_B")
+    assert not list(live_worker.leases_dir.iterdir())
+
+
+@pytest.mark.parametrize("signum, status", [(None, "failed"), (15, "released")])
+def test_stopped_worker_leaves_queue_consistent(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, signum: int | None, status: str) -> None:
+    """
+    Test that a SystemExit during a sample does not leave the sample leased:
+    an exit of the run (sys.exit) marks the sample as failed and the worker
+    continues, a stopped worker (SIGTERM) releases the sample for the other workers.
+    ----------
+    Input:
+        - tmp_path: temporary directory of pytest
+        - monkeypatch: pytest fixture to replace the analysis
+        - signum: the termination signal that was received
+        - status: the expected state of the sample
+    ----------
+    """
+
+    def exit_run(self: PaciniTyping) -> None:
+        set_termination_signal(signum)
+        raise SystemExit(1 if signum is None else 128 + signum)
+
+    args = preprocessing.argsparse.build_parser.main(
+        ["-c", "config/O1.yaml", "-i", "sample_A.fasta", "-o", str(tmp_path / "reports"), "--worker", str(tmp_path / "queue")]
+    )
+    pacini_typing = PaciniTyping(args)
+    pacini_typing.parse_all_args()
+    pacini_typing.get_input_filenames()
+    groups: Any = lambda self, input_groups, *_: [(group, 0.0, None) for group in input_groups]
+    monkeypatch.setattr(PaciniTyping, "order_input_groups", groups)
+    monkeypatch.setattr(PaciniTyping, "execute", exit_run)
+    try:
+        if status == "failed":
+            pacini_typing.execute_worker()
+        else:
+            with pytest.raises(SystemExit):
+                pacini_typing.execute_worker()
+    finally:
+        set_termination_signal(None)
+
+    queue = WorkQueue(tmp_path / "queue")
+    assert not list(queue.leases_dir.iterdir())
+    assert queue.pending_jobs() == ([] if status == "failed" else ["sample_A"])
+    assert (queue.failed_dir / "sample_A.json").exists() == (status == "failed")
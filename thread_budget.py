@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+> This script was developed with assistance from GitHub Copilot for code suggestions.
+> AI-generated suggestions have been reviewed and modified as necessary by the developer.
+> GitHub, OpenAI, & Microsoft. (2021). GitHub Copilot [Software]. In
+    “GitHub Copilot: Your AI pair programmer” (GPT-3). GitHub, Inc.
+    https://github.com/features/copilot
+
+Module that determines the number of threads that Pacini-typing
+may use (--threads auto).
+
+On shared (Kubernetes/HPC) nodes, os.cpu_count() returns the CPUs
+of the whole node, while the process is only allowed to use a part:
+    - the CPU affinity (taskset, cpuset) limits the usable CPUs
+    - the cgroup CPU quota (v1: cpu.cfs_quota_us, v2: cpu.max) limits
+        the CPU time; using more threads than the quota only causes throttling
+The usable number of CPUs is the lowest of these limits.
+"""
+
+__author__ = "Mark van de Streek"
+__date__ = "2026-10-18"
+__all__ = [
+    "parse_threads",
+    "get_affinity_cpus",
+    "get_cgroup_cpu_limit",
+    "get_usable_cpus",
+    "divide_threads",
+]
+
+import argparse
+import logging
+import math
+import os
+from pathlib import Path
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+PROC_CGROUP = Path("/proc/self/cgroup")
+
+
+def parse_threads(value: str) -> int | str:
+    """
+    Function that parses the value of the --threads argument.
+    Either 'auto' or a number (rounded to the nearest integer).
+    The function is used as type in the argument parser.
+    ----------
+    Input:
+        - value: the incoming argument
+    Output:
+        - int with the number of threads, or 'auto'
+    Raises:
+        - argparse.ArgumentTypeError: if the value is invalid
+    ----------
+    """
+    if value.lower() == "auto":
+        return "auto"
+    try:
+        threads = int(float(value))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"invalid thread count '{value}', use a number or 'auto'") from e
+    if threads < 1:
+        raise argparse.ArgumentTypeError(f"invalid thread count '{value}', at least 1 thread is required")
+    return threads
+
+
+def get_affinity_cpus() -> int:
+    """
+    Function that returns the number of CPUs this
+    process is allowed to run on (CPU affinity).
+    ----------
+    Output:
+        - int: number of CPUs
+    ----------
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _read_cgroup_v2_limit(directory: Path) -> float | None:
+    """
+    Function that reads the CPU limit of a cgroup v2 directory.
+    The cpu.max file contains '<quota> <period>' or 'max <period>'.
+    ----------
+    Input:
+        - directory: the cgroup directory
+    Output:
+        - float: the limit in CPUs, or None if there is no limit
+    ----------
+    """
+    try:
+        quota, period = (directory / "cpu.max").read_text(encoding="utf-8").split()[:2]
+    except (OSError, ValueError):
+        return None
+    if quota == "max":
+        return None
+    return int(quota) / int(period)
+
+
+def _read_cgroup_v1_limit(directory: Path) -> float | None:
+    """
+    Function that reads the CPU limit of a cgroup v1 directory.
+    A quota of -1 means that there is no limit.
+    ----------
+    Input:
+        - directory: the cgroup directory of the cpu controller
+    Output:
+        - float: the limit in CPUs, or None if there is no limit
+    ----------
+    """
+    try:
+        quota = int((directory / "cpu.cfs_quota_us").read_text(encoding="utf-8"))
+        period = int((directory / "cpu.cfs_period_us").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if quota <= 0 or period <= 0:
+        return None
+    return quota / period
+
+
+def _walk_cgroup(mount: Path, cgroup_path: str) -> list[Path]:
+    """
+    Function that returns the directory of the cgroup and all of its
+    parents up to the mount point. Inside a container, the path from
+    /proc/self/cgroup may not exist below the mount, then only the
+    mount point itself is returned.
+    ----------
+    Input:
+        - mount: the mount point of the cgroup (controller)
+        - cgroup_path: the path of the cgroup in /proc/self/cgroup
+    Output:
+        - list with the existing directories
+    ----------
+    """
+    directories = [mount]
+    current = mount
+    for part in Path(cgroup_path.lstrip("/")).parts:
+        current = current / part
+        if current.is_dir():
+            directories.append(current)
+    return directories
+
+
+def get_cgroup_cpu_limit(cgroup_root: Path = CGROUP_ROOT, proc_cgroup: Path = PROC_CGROUP) -> float | None:
+    """
+    Function that returns the CPU quota of the cgroup(s) of this process.
+    Both cgroup v2 (unified) and v1 (cpu controller) are supported,
+    also in hybrid setups. Nested limits are taken into account,
+    the lowest limit is returned.
+    ----------
+    Input:
+        - cgroup_root: mount point of the cgroup filesystem
+        - proc_cgroup: the cgroup file of the process
+    Output:
+        - float: the limit in CPUs, or None if there is no limit
+    ----------
+    """
+    try:
+        lines = proc_cgroup.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return None
+    limits: list[float] = []
+    for line in lines:
+        try:
+            hierarchy, controllers, cgroup_path = line.split(":", 2)
+        except ValueError:
+            continue
+        if hierarchy == "0" and not controllers:
+            mount = cgroup_root / "unified" if (cgroup_root / "unified").is_dir() else cgroup_root
+            candidates = [_read_cgroup_v2_limit(directory) for directory in _walk_cgroup(mount, cgroup_path)]
+        elif "cpu" in controllers.split(","):
+            mount = cgroup_root / controllers
+            if not mount.is_dir():
+                mount = cgroup_root / "cpu"
+            candidates = [_read_cgroup_v1_limit(directory) for directory in _walk_cgroup(mount, cgroup_path)]
+        else:
+            continue
+        limits.extend(limit for limit in candidates if limit is not None)
+    return min(limits) if limits else None
+
+
+def get_usable_cpus() -> tuple[int, int, float | None]:
+    """
+    Function that determines the number of CPUs that may be used,
+    based on the CPU affinity and the cgroup CPU quota.
+    A fractional quota is rounded down, with a minimum of 1.
+    ----------
+    Output:
+        - tuple with the usable CPUs, the affinity CPUs and
+            the cgroup limit (None if there is no limit)
+    ----------
+    """
+    affinity = get_affinity_cpus()
+    quota = get_cgroup_cpu_limit()
+    usable = affinity if quota is None else max(min(affinity, math.floor(quota)), 1)
+    logging.info(
+        "Usable CPUs: %d (CPU affinity: %d, cgroup quota: %s)",
+        usable,
+        affinity,
+        f"{quota:g}" if quota is not None else "none",
+    )
+    return usable, affinity, quota
+
+
+def divide_threads(total: int, parts: int) -> int:
+    """
+    Function that divides a number of threads between
+    concurrent tools or samples, every part gets at least one thread.
+    ----------
+    Input:
+        - total: total number of threads
+        - parts: number of concurrent tools or samples
+    Output:
+        - int: number of threads per part
+    ----------
+    """
+    return max(total // max(parts, 1), 1)